@@ -1,32 +1,123 @@
-from fastapi import FastAPI
-from db import engine, Base
-from routes.user import router as user_router
+import logging
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+import config
+
+logging.basicConfig(level=config.LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+from startup import boot
+from db import async_engine, has_replica, pin_to_primary
+from routes.user import router as user_router, session_store, get_user_from_cache
 from routes.workouts import router as workouts_router
 from routes.nutrition import router as nutrition_router
-from models import User, WorkoutPlans, Exercise, WorkoutPlanExercise, WorkoutProgress, NutritionalLogs
+from routes.export import router as export_router
+from routes.imports import router as imports_router
+from routes.chat import router as chat_router
+from routes.metrics import router as metrics_router
+from routes.health import router as health_router
+from sessions import SessionSweeper
+from knowledge import knowledge_base
+import credentials
+from ratelimit import create_rate_limiter, retry_after_header
+from metrics import RequestMetricsMiddleware
 
 
 
 app = FastAPI()
 
 
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    response = await call_next(request)
+    # Pin the client to the primary after a successful write so its next reads
+    # don't hit a replica that hasn't caught up yet
+    if has_replica() and request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        pin_to_primary(request, response)
+    return response
+
+
+rate_limiter = create_rate_limiter() if config.RATE_LIMIT_ENABLED else None
+
+
+def rate_limit_key(request: Request) -> str:
+    # One budget per user across all of their sessions; per address before login
+    session_id = request.cookies.get("session_id")
+    user_id = get_user_from_cache(session_id) if session_id else None
+    if user_id is not None:
+        return f"user:{user_id}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def _rate_limit_wait(request: Request) -> float:
+    return rate_limiter.acquire(rate_limit_key(request))
+
+
+@app.middleware("http")
+async def rate_limit(request: Request, call_next):
+    # Runs before routing and dependencies, so a throttled request never checks
+    # out a database connection
+    if rate_limiter is not None and request.method in config.RATE_LIMIT_METHODS:
+        if config.RATE_LIMIT_BACKEND == "memory" and config.SESSION_BACKEND == "memory":
+            wait = _rate_limit_wait(request)
+        else:
+            wait = await run_in_threadpool(_rate_limit_wait, request)
+        if wait > 0:
+            return JSONResponse(
+                status_code=429,
+                content={"detail": "Too many requests"},
+                headers={"Retry-After": retry_after_header(wait)},
+            )
+    return await call_next(request)
+
+
+# Added last so it wraps every other middleware, rate limiting included
+app.add_middleware(RequestMetricsMiddleware)
+
+
 @app.get("/")
 def read_root():
     return {"message": "Hello, World!"}
 
+if config.DB_MODE == "async":
+    from routes.async_user import router as async_user_router
+    from routes.async_workouts import router as async_workouts_router
+    from routes.async_nutrition import router as async_nutrition_router
+
+    # Registered first so they take precedence over the sync routes with the same paths
+    app.include_router(async_user_router)
+    app.include_router(async_workouts_router)
+    app.include_router(async_nutrition_router)
+
 app.include_router(user_router)
 app.include_router(workouts_router)
 app.include_router(nutrition_router)
+app.include_router(export_router)
+app.include_router(imports_router)
+app.include_router(chat_router)
+app.include_router(metrics_router)
+app.include_router(health_router)
 
 
-def create_database():
+session_sweeper = SessionSweeper(session_store)
 
-    try:
-        Base.metadata.create_all(bind=engine)
-        print("Database tables created successfully")
-    except Exception as e:
-        print(f"Error creating database tables: {e}")
 
 @app.on_event("startup")
 async def startup_event():
-    create_database()
\ No newline at end of file
+    session_sweeper.start()
+    knowledge_base.start()
+    # Never raises: a worker that can't finish booting stays up but not ready,
+    # and /health/ready retries the boot
+    await boot()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    session_sweeper.stop()
+    knowledge_base.stop()
+    credentials.shutdown()
+    session_store.close()
+    if rate_limiter is not None:
+        rate_limiter.close()
+    if async_engine is not None:
+        await async_engine.dispose()
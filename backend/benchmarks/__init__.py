@@ -0,0 +1,13 @@
+"""Load tests for the user, workouts and nutrition routers.
+
+Run from ``backend/``, against the database in ``SMARTFIT_DATABASE_URL``::
+
+    python -m benchmarks.seed --users 2000 --progress 1000000 --nutrition 1000000
+    python -m benchmarks.run --output results/$(git rev-parse --short HEAD).json
+    python -m benchmarks.run --url http://localhost:8000 --output over-http.json
+    python -m benchmarks.compare results/old.json results/new.json
+
+``run`` drives the app in-process through its ASGI interface unless ``--url``
+points it at a running server. A server under test should be started with
+``SMARTFIT_RATE_LIMIT_ENABLED=0``, or the login scenario will mostly measure 429s.
+"""
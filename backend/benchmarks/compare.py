@@ -0,0 +1,44 @@
+"""Compare two ``benchmarks.run`` JSON reports scenario by scenario."""
+import argparse
+import json
+
+METRICS = ("throughput_rps", "p50", "p95", "p99")
+
+
+def _metric(result: dict, name: str) -> float:
+    return result[name] if name == "throughput_rps" else result["latency_ms"][name]
+
+
+def compare(baseline: dict, candidate: dict) -> dict:
+    """Per-scenario metrics of both runs and the relative change, in percent."""
+    changes = {}
+    for scenario, new in candidate["results"].items():
+        old = baseline["results"].get(scenario)
+        if old is None or not old["latency_ms"] or not new["latency_ms"]:
+            continue
+        changes[scenario] = {}
+        for name in METRICS:
+            before, after = _metric(old, name), _metric(new, name)
+            change = (after - before) / before * 100 if before else 0.0
+            changes[scenario][name] = {"baseline": before, "candidate": after, "change_pct": round(change, 1)}
+    return changes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.candidate, encoding="utf-8") as f:
+        candidate = json.load(f)
+
+    print(f"baseline  {baseline['meta']['commit']}  {baseline['meta']['target']}")
+    print(f"candidate {candidate['meta']['commit']}  {candidate['meta']['target']}")
+    for scenario, metrics in compare(baseline, candidate).items():
+        print(scenario)
+        for name, values in metrics.items():
+            # Higher throughput is better; for latencies lower is
+            print(f"  {name:<15} {values['baseline']:>10.2f} -> {values['candidate']:>10.2f}  {values['change_pct']:+6.1f}%")
@@ -0,0 +1,214 @@
+"""Concurrent load runner: throughput and latency percentiles per endpoint.
+
+Each virtual client logs in as its own seeded user, then every scenario runs
+``--requests`` requests spread over ``--concurrency`` clients.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+import config
+from benchmarks.seed import DAYS, PASSWORD, user_email
+
+# (method, path, httpx request kwargs)
+Request = Tuple[str, str, dict]
+
+
+@dataclass
+class Context:
+    users: int
+    plan_ids: List[int]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    make_request: Callable[[random.Random, Context], Request]
+
+
+def _login(rng: random.Random, ctx: Context) -> Request:
+    return "POST", "/auth/login", {"json": {"email": user_email(rng.randrange(ctx.users)), "password": PASSWORD}}
+
+
+def _nutrition_summary(rng: random.Random, ctx: Context) -> Request:
+    end = date.today() - timedelta(days=rng.randrange(DAYS - 30))
+    params = {"start_date": (end - timedelta(days=29)).isoformat(), "end_date": end.isoformat()}
+    return "GET", "/nutrition/summary", {"params": params}
+
+
+SCENARIOS = [
+    Scenario("login", _login),
+    Scenario("exercises", lambda rng, ctx: ("GET", "/workouts/exercises", {"params": {"limit": 50}})),
+    Scenario("nutrition_logs", lambda rng, ctx: ("GET", "/nutrition/logs", {"params": {"limit": 50}})),
+    Scenario("workout_progress", lambda rng, ctx: ("GET", "/workouts/progress", {"params": {"limit": 50}})),
+    Scenario("nutrition_summary", _nutrition_summary),
+    Scenario("plan_exercises", lambda rng, ctx: ("GET", f"/workouts/plans/{rng.choice(ctx.plan_ids)}/exercises", {})),
+]
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))]
+
+
+def summarize(latencies: List[float], statuses: Counter, seconds: float) -> dict:
+    ordered = sorted(latencies)
+    ms = lambda value: round(value * 1000, 3)
+    return {
+        "requests": len(ordered),
+        "seconds": round(seconds, 3),
+        "throughput_rps": round(len(ordered) / seconds, 1) if seconds else 0.0,
+        "errors": sum(count for status, count in statuses.items() if not str(status).startswith("2")),
+        "statuses": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        "latency_ms": {
+            "mean": ms(sum(ordered) / len(ordered)),
+            "p50": ms(percentile(ordered, 50)),
+            "p95": ms(percentile(ordered, 95)),
+            "p99": ms(percentile(ordered, 99)),
+            "max": ms(ordered[-1]),
+        } if ordered else {},
+    }
+
+
+async def log_in(client: httpx.AsyncClient, n: int):
+    response = await client.post("/auth/login", json={"email": user_email(n), "password": PASSWORD})
+    response.raise_for_status()
+    # The cookie is marked Secure, so httpx won't send it back over plain http on its own
+    client.cookies.set("session_id", response.cookies["session_id"])
+
+
+async def run_scenario(clients: List[httpx.AsyncClient], scenario: Scenario, ctx: Context, requests: int, seed: int) -> dict:
+    latencies, statuses = [], Counter()
+    remaining = iter(range(requests))
+
+    async def client_loop(client: httpx.AsyncClient, rng: random.Random):
+        for _ in remaining:
+            method, path, kwargs = scenario.make_request(rng, ctx)
+            start = time.perf_counter()
+            try:
+                status = (await client.request(method, path, **kwargs)).status_code
+            except Exception as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[status] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop(client, random.Random(seed + i)) for i, client in enumerate(clients)))
+    return summarize(latencies, statuses, time.perf_counter() - start)
+
+
+async def run_all(transport: Optional[httpx.AsyncBaseTransport], base_url: str, args) -> Dict[str, dict]:
+    limits = httpx.Limits(max_connections=args.concurrency)
+    clients = [
+        httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits, timeout=args.timeout)
+        for _ in range(args.concurrency)
+    ]
+    try:
+        await asyncio.gather(*(log_in(client, i % args.users) for i, client in enumerate(clients)))
+        plans = (await clients[0].get("/workouts/plans", params={"limit": 100})).json()
+        ctx = Context(args.users, [plan["id"] for plan in plans] or [1])
+
+        results = {}
+        for scenario in SCENARIOS:
+            if args.only and scenario.name not in args.only:
+                continue
+            await run_scenario(clients, scenario, ctx, args.warmup, args.seed)
+            results[scenario.name] = result = await run_scenario(clients, scenario, ctx, args.requests, args.seed)
+            latency = result["latency_ms"]
+            print(
+                f"{scenario.name:<18} {result['throughput_rps']:>9.1f} req/s  p50 {latency['p50']:>8.2f}  "
+                f"p95 {latency['p95']:>8.2f}  p99 {latency['p99']:>8.2f} ms  errors {result['errors']}",
+                flush=True,
+            )
+        return results
+    finally:
+        await asyncio.gather(*(client.aclose() for client in clients))
+
+
+async def run_in_process(args) -> Dict[str, dict]:
+    if not args.rate_limit:
+        config.RATE_LIMIT_ENABLED = False
+    from app import app
+
+    # Runs the app's startup and shutdown handlers, as a server would
+    async with app.router.lifespan_context(app):
+        # Unhandled errors come back as 500s, as they would from a server
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        return await run_all(transport, "http://benchmark", args)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the SmartFit API")
+    parser.add_argument("--url", help="base URL of a running server; default drives the app in-process")
+    parser.add_argument("--users", type=int, default=2000, help="seeded users to log in as")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=100, help="unmeasured requests per scenario")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="*", choices=[scenario.name for scenario in SCENARIOS])
+    parser.add_argument("--rate-limit", action="store_true", help="keep rate limiting on in-process")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    started = datetime.now(timezone.utc)
+    if args.url:
+        results = asyncio.run(run_all(None, args.url, args))
+    else:
+        results = asyncio.run(run_in_process(args))
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "started_at": started.isoformat(),
+            "target": args.url or "in-process",
+            "db_mode": config.DB_MODE,
+            "database": None if args.url else _database_name(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "users": args.users,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def _database_name() -> str:
+    from db import engine
+
+    return engine.url.render_as_string(hide_password=True)
+
+
+if __name__ == "__main__":
+    main()
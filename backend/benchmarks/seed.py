@@ -0,0 +1,120 @@
+"""Seed a database with benchmark-sized data.
+
+Every user is ``bench-user-<n>@example.com`` with password ``benchmark``,
+hashed once with the current scrypt cost so logins never trigger a rehash.
+"""
+import argparse
+import logging
+import random
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, List
+
+from sqlalchemy import select
+
+from credentials import hash_password_sync
+from db import SessionLocal, engine
+from importer import write_rows
+from migrations import run_migrations
+from models import Exercise, NutritionalLogs, User, WorkoutPlanExercise, WorkoutPlans, WorkoutProgress
+from rollups import rebuild_nutrition_totals, rebuild_workout_progress_totals
+
+logger = logging.getLogger(__name__)
+
+PASSWORD = "benchmark"
+CHUNK_SIZE = 10000
+DAYS = 365
+
+CATEGORIES = ("strength", "cardio", "mobility", "plyometrics", "core")
+DIFFICULTIES = ("beginner", "intermediate", "advanced")
+MUSCLES = ("chest", "back", "quadriceps", "hamstrings", "glutes", "shoulders", "biceps", "triceps", "abs", "calves")
+EQUIPMENT = ("barbell", "dumbbell", "kettlebell", "machine", "cable", "bodyweight", "band")
+MEALS = ("breakfast", "lunch", "dinner", "snack")
+FOODS = ("oats", "chicken breast", "rice", "salmon", "eggs", "greek yogurt", "banana", "almonds", "broccoli", "pasta")
+
+
+def user_email(n: int) -> str:
+    return f"bench-user-{n}@example.com"
+
+
+def _write(db, model, total: int, make_row: Callable[[int], dict]):
+    start = time.perf_counter()
+    for offset in range(0, total, CHUNK_SIZE):
+        write_rows(db, model, [make_row(i) for i in range(offset, min(total, offset + CHUNK_SIZE))])
+        db.commit()
+    elapsed = time.perf_counter() - start
+    logger.info("Seeded %d %s rows in %.1fs (%.0f rows/s)", total, model.__tablename__, elapsed, total / max(elapsed, 1e-9))
+
+
+def _ids(db, column) -> List[int]:
+    return list(db.scalars(select(column).order_by(column)))
+
+
+def seed(users: int, exercises: int, plans: int, progress: int, nutrition: int, rng_seed: int = 0):
+    rng = random.Random(rng_seed)
+    first_day = date.today() - timedelta(days=DAYS - 1)
+
+    def day() -> date:
+        return first_day + timedelta(days=rng.randrange(DAYS))
+
+    run_migrations(engine)
+    with SessionLocal() as db:
+        if db.scalar(select(User.id).where(User.email == user_email(0))) is not None:
+            raise SystemExit("Benchmark data is already seeded; start from an empty database")
+
+        password = hash_password_sync(PASSWORD)
+        _write(db, User, users, lambda n: {
+            "name": f"Bench User {n}", "email": user_email(n), "password": password,
+            "age": rng.randint(18, 70), "weight": rng.randint(50, 120), "height": rng.randint(150, 200),
+            "fitness_goals": rng.choice(("strength", "endurance", "weight loss")), "activity_level": rng.choice(DIFFICULTIES),
+            "created_at": datetime.now(),
+        })
+        _write(db, Exercise, exercises, lambda n: {
+            "exercise_name": f"Bench Exercise {n}", "category": rng.choice(CATEGORIES),
+            "equipment_needed": rng.choice(EQUIPMENT), "difficulty": rng.choice(DIFFICULTIES),
+            "target_muscle": rng.choice(MUSCLES),
+            "instructions": "Brace, move through the full range of motion under control, and breathe out on the effort.",
+        })
+        _write(db, WorkoutPlans, plans, lambda n: {
+            "plan_name": f"Bench Plan {n}", "difficulty_level": rng.choice(DIFFICULTIES), "duration": f"{rng.choice((4, 6, 8, 12))} weeks",
+        })
+
+        user_ids, exercise_ids, plan_ids = _ids(db, User.id), _ids(db, Exercise.id), _ids(db, WorkoutPlans.id)
+        plan_exercises = [
+            {"workout_plan_id": plan_id, "exercise_id": exercise_id, "sets": rng.randint(3, 5), "reps": rng.randint(5, 15), "order": order}
+            for plan_id in plan_ids
+            for order, exercise_id in enumerate(rng.sample(exercise_ids, min(8, len(exercise_ids))), 1)
+        ]
+        write_rows(db, WorkoutPlanExercise, plan_exercises)
+        db.commit()
+
+        _write(db, WorkoutProgress, progress, lambda n: {
+            "user_id": rng.choice(user_ids), "workout_id": rng.choice(plan_ids), "exercise_id": rng.choice(exercise_ids),
+            "date": day(), "sets": rng.randint(1, 5), "reps": rng.randint(1, 20), "weights": rng.randint(0, 200),
+            "duration": None, "notes": None,
+        })
+        _write(db, NutritionalLogs, nutrition, lambda n: {
+            "user_id": rng.choice(user_ids), "date": day(), "meal_type": rng.choice(MEALS), "food_name": rng.choice(FOODS),
+            "calories": rng.randint(50, 900), "fat": round(rng.uniform(0, 40), 1), "protein": round(rng.uniform(0, 60), 1),
+            "carbs": round(rng.uniform(0, 120), 1), "serving_size": "1 serving",
+        })
+
+        start = time.perf_counter()
+        rebuild_nutrition_totals(db)
+        rebuild_workout_progress_totals(db)
+        db.commit()
+        logger.info("Rebuilt daily totals in %.1fs", time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed the SmartFit database with benchmark data")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--exercises", type=int, default=300)
+    parser.add_argument("--plans", type=int, default=100)
+    parser.add_argument("--progress", type=int, default=1000000)
+    parser.add_argument("--nutrition", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=0, help="random seed, for reproducible data")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    seed(args.users, args.exercises, args.plans, args.progress, args.nutrition, args.seed)
@@ -0,0 +1,44 @@
+"""Size limits for the bulk ingest endpoints.
+
+Bodies are refused with a 413 before they are parsed: on the declared
+``Content-Length`` when there is one, otherwise as soon as the streamed body
+passes the limit. Entry counts are checked by the endpoints themselves.
+"""
+import json
+from typing import AsyncIterator, Optional
+
+from fastapi import HTTPException, Request
+from pydantic import ValidationError
+
+import config
+
+
+def validation_detail(error: ValidationError, line: Optional[int] = None):
+    detail = json.loads(error.json(include_url=False))
+    if line is not None:
+        return {"line": line, "errors": detail}
+    return detail
+
+
+def too_many_entries(max_entries: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"At most {max_entries} entries per request")
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Request body larger than {max_bytes} bytes")
+
+
+async def stream_body(request: Request, max_bytes: int = config.BULK_MAX_BYTES) -> AsyncIterator[bytes]:
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > max_bytes:
+        raise _too_large(max_bytes)
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > max_bytes:
+            raise _too_large(max_bytes)
+        yield chunk
+
+
+async def read_body(request: Request, max_bytes: int = config.BULK_MAX_BYTES) -> bytes:
+    return b"".join([chunk async for chunk in stream_body(request, max_bytes)])
@@ -0,0 +1,113 @@
+import bisect
+import threading
+from collections import defaultdict
+from typing import List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+
+from db import SessionLocal
+from models import Exercise
+from versions import TableVersions, read_table_version, table_versions
+
+FACETS = ("category", "difficulty", "target_muscle", "equipment_needed")
+
+
+class ExerciseEntry(BaseModel):
+    id: int
+    exercise_name: str
+    category: Optional[str] = None
+    equipment_needed: Optional[str] = None
+    difficulty: Optional[str] = None
+    instructions: Optional[str] = None
+    target_muscle: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+        frozen = True
+
+
+class _CatalogState:
+    def __init__(self, version: int, exercises: List[ExerciseEntry]):
+        self.version = version
+        self.by_id = {exercise.id: exercise for exercise in exercises}
+        self.ids = sorted(self.by_id)
+        self.indexes = {facet: defaultdict(set) for facet in FACETS}
+        for exercise in exercises:
+            for facet in FACETS:
+                self.indexes[facet][getattr(exercise, facet)].add(exercise.id)
+
+
+class ExerciseCatalog:
+    """Process-local copy of the Exercise table with hash indexes on each facet.
+
+    The catalog is rebuilt whenever the ``exercise`` table version moves:
+    immediately after a write in this process, and within
+    ``TableVersions.check_interval`` seconds of a write in another worker.
+    """
+
+    TABLE = "exercise"
+
+    def __init__(self, session_factory=SessionLocal, versions: TableVersions = table_versions):
+        self.session_factory = session_factory
+        self.versions = versions
+        self._state: Optional[_CatalogState] = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self.session_factory() as db:
+            version = read_table_version(db, self.TABLE)
+            exercises = [ExerciseEntry.model_validate(row) for row in db.query(Exercise)]
+        # Swap in the new state in one assignment so readers never see a partial build
+        self._state = _CatalogState(version, exercises)
+
+    def reload(self):
+        """Rebuild after a write made by this process."""
+        self.versions.expire(self.TABLE)
+        with self._lock:
+            self.load()
+
+    def _current(self) -> _CatalogState:
+        state = self._state
+        if state is None or state.version < self.versions.get(self.TABLE):
+            with self._lock:
+                if self._state is state:
+                    self.load()
+            state = self._state
+        return state
+
+    async def refresh_async(self):
+        """Bring the catalog up to date without blocking the event loop, ahead of ``get``/``filter``."""
+        state = self._state
+        if state is None or state.version < await self.versions.get_async(self.TABLE):
+            await run_in_threadpool(self._current)
+
+    def get(self, exercise_id: int) -> Optional[ExerciseEntry]:
+        return self._current().by_id.get(exercise_id)
+
+    def filter(
+        self,
+        skip: int = 0,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None,
+        **facets,
+    ) -> List[ExerciseEntry]:
+        """Exercises matching every given facet value, ordered by id."""
+        state = self._current()
+        wanted = [(facet, value) for facet, value in facets.items() if value is not None]
+        if wanted:
+            # Intersect starting from the smallest posting set
+            postings = sorted((state.indexes[facet].get(value, set()) for facet, value in wanted), key=len)
+            matched = set(postings[0])
+            for posting in postings[1:]:
+                matched &= posting
+            ids = sorted(matched)
+        else:
+            ids = state.ids
+
+        start = bisect.bisect_right(ids, after_id) if after_id is not None else skip
+        end = None if limit is None else start + limit
+        return [state.by_id[exercise_id] for exercise_id in ids[start:end]]
+
+
+exercise_catalog = ExerciseCatalog()
@@ -0,0 +1,136 @@
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Sessions
+SESSION_EXPIRY = _env_int("SMARTFIT_SESSION_EXPIRY", 3600)
+# "memory" (single process), "sqlite" (shared by every worker on the host) or "redis"
+SESSION_BACKEND = os.getenv("SMARTFIT_SESSION_BACKEND", "memory")
+SESSION_SQLITE_PATH = os.getenv("SMARTFIT_SESSION_SQLITE_PATH", "./sessions.db")
+SESSION_REDIS_URL = os.getenv("SMARTFIT_SESSION_REDIS_URL", "redis://localhost:6379/0")
+SESSION_SWEEP_INTERVAL = _env_float("SMARTFIT_SESSION_SWEEP_INTERVAL", 60.0)
+
+# Users (by email) allowed to change shared data such as the exercise catalog import
+ADMIN_EMAILS = frozenset(
+    email.strip().lower() for email in os.getenv("SMARTFIT_ADMIN_EMAILS", "").split(",") if email.strip()
+)
+
+# Identity cache used by get_current_user
+USER_CACHE_SIZE = _env_int("SMARTFIT_USER_CACHE_SIZE", 10000)
+USER_CACHE_TTL = _env_float("SMARTFIT_USER_CACHE_TTL", 60.0)
+
+# Bulk ingest
+NUTRITION_BULK_MAX_ENTRIES = _env_int("SMARTFIT_NUTRITION_BULK_MAX_ENTRIES", 10000)
+WORKOUT_PROGRESS_BULK_MAX_ENTRIES = _env_int("SMARTFIT_WORKOUT_PROGRESS_BULK_MAX_ENTRIES", 10000)
+# Bodies past this size get a 413 before they are parsed
+BULK_MAX_BYTES = _env_int("SMARTFIT_BULK_MAX_BYTES", 8 * 1024 * 1024)
+
+# Materialized workout plan views
+PLAN_CACHE_SIZE = _env_int("SMARTFIT_PLAN_CACHE_SIZE", 1024)
+PLAN_CACHE_TTL = _env_float("SMARTFIT_PLAN_CACHE_TTL", 300.0)
+
+# How often (seconds) a worker re-reads table version counters to notice
+# writes made by other workers
+TABLE_VERSION_CHECK_INTERVAL = _env_float("SMARTFIT_TABLE_VERSION_CHECK_INTERVAL", 2.0)
+
+# Database engine. Defaults to the local Postgres database in db.py; use
+# e.g. sqlite:///./test.db for local mode.
+DATABASE_URL = os.getenv("SMARTFIT_DATABASE_URL")
+# Optional read replica used by read-only handlers
+READ_DATABASE_URL = os.getenv("SMARTFIT_READ_DATABASE_URL")
+# After a client writes, its reads go to the primary for this many seconds
+# so it sees its own writes despite replica lag
+READ_YOUR_WRITES_SECONDS = _env_float("SMARTFIT_READ_YOUR_WRITES_SECONDS", 5.0)
+DB_POOL_SIZE = _env_int("SMARTFIT_DB_POOL_SIZE", 5)
+DB_MAX_OVERFLOW = _env_int("SMARTFIT_DB_MAX_OVERFLOW", 10)
+DB_POOL_TIMEOUT = _env_float("SMARTFIT_DB_POOL_TIMEOUT", 30.0)
+DB_POOL_PRE_PING = _env_bool("SMARTFIT_DB_POOL_PRE_PING", True)
+DB_POOL_RECYCLE = _env_int("SMARTFIT_DB_POOL_RECYCLE", 1800)
+# Per-statement timeout in milliseconds (0 disables it)
+DB_STATEMENT_TIMEOUT_MS = _env_int("SMARTFIT_DB_STATEMENT_TIMEOUT_MS", 0)
+# Pool checkouts that wait longer than this are logged as a warning
+DB_POOL_WAIT_WARN_MS = _env_float("SMARTFIT_DB_POOL_WAIT_WARN_MS", 100.0)
+# Connections each pool opens while the worker boots, so early requests skip the connect
+DB_POOL_WARM_CONNECTIONS = _env_int("SMARTFIT_DB_POOL_WARM_CONNECTIONS", DB_POOL_SIZE)
+# SQLite only: how long a writer waits on a locked database, and the page cache size in KiB
+SQLITE_BUSY_TIMEOUT_MS = _env_int("SMARTFIT_SQLITE_BUSY_TIMEOUT_MS", 5000)
+SQLITE_CACHE_SIZE_KB = _env_int("SMARTFIT_SQLITE_CACHE_SIZE_KB", 65536)
+
+# Database access mode: "sync" (threadpool handlers) or "async" (AsyncSession
+# handlers for the hot user/workouts/nutrition routes)
+DB_MODE = os.getenv("SMARTFIT_DB_MODE", "sync")
+# Defaults to the sync URL with its async driver (asyncpg / aiosqlite)
+ASYNC_DATABASE_URL = os.getenv("SMARTFIT_ASYNC_DATABASE_URL")
+
+# HTTP response caching for catalog and plan endpoints
+HTTP_CACHE_SIZE = _env_int("SMARTFIT_HTTP_CACHE_SIZE", 4096)
+HTTP_CACHE_TTL = _env_float("SMARTFIT_HTTP_CACHE_TTL", 600.0)
+# Cache-Control max-age sent to clients; 0 makes them revalidate with If-None-Match
+HTTP_CACHE_MAX_AGE = _env_int("SMARTFIT_HTTP_CACHE_MAX_AGE", 0)
+
+# Data export: rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = _env_int("SMARTFIT_EXPORT_BATCH_SIZE", 1000)
+
+# Bulk import: rows validated and committed per chunk
+IMPORT_CHUNK_SIZE = _env_int("SMARTFIT_IMPORT_CHUNK_SIZE", 5000)
+
+# Password hashing (scrypt). Raising the cost rehashes each user on their next login.
+PASSWORD_SCRYPT_N = _env_int("SMARTFIT_PASSWORD_SCRYPT_N", 2 ** 14)
+PASSWORD_SCRYPT_R = _env_int("SMARTFIT_PASSWORD_SCRYPT_R", 8)
+PASSWORD_SCRYPT_P = _env_int("SMARTFIT_PASSWORD_SCRYPT_P", 1)
+# Worker processes for hashing, and how many hash/verify calls may queue for them
+PASSWORD_HASH_WORKERS = _env_int("SMARTFIT_PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1))
+PASSWORD_HASH_MAX_PENDING = _env_int("SMARTFIT_PASSWORD_HASH_MAX_PENDING", 64)
+
+# Rate limiting: token bucket per user (or client address when not logged in)
+RATE_LIMIT_ENABLED = _env_bool("SMARTFIT_RATE_LIMIT_ENABLED", True)
+# Tokens per second and bucket size; each limited request costs one token
+RATE_LIMIT_RATE = _env_float("SMARTFIT_RATE_LIMIT_RATE", 20.0)
+RATE_LIMIT_BURST = _env_float("SMARTFIT_RATE_LIMIT_BURST", 100.0)
+# Only these methods are limited; reads are served from caches and replicas
+RATE_LIMIT_METHODS = frozenset(os.getenv("SMARTFIT_RATE_LIMIT_METHODS", "POST,PUT,PATCH,DELETE").upper().split(","))
+# "memory" (per process, at most RATE_LIMIT_MAX_KEYS buckets), "sqlite" (per host) or "redis"
+RATE_LIMIT_BACKEND = os.getenv("SMARTFIT_RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_MAX_KEYS = _env_int("SMARTFIT_RATE_LIMIT_MAX_KEYS", 100000)
+RATE_LIMIT_SQLITE_PATH = os.getenv("SMARTFIT_RATE_LIMIT_SQLITE_PATH", "./ratelimit.db")
+RATE_LIMIT_REDIS_URL = os.getenv("SMARTFIT_RATE_LIMIT_REDIS_URL", SESSION_REDIS_URL)
+
+# Retrieval for /chat/ask
+KNOWLEDGE_DIR = os.getenv("SMARTFIT_KNOWLEDGE_DIR", "./knowledge")
+VECTOR_INDEX_DIR = os.getenv("SMARTFIT_VECTOR_INDEX_DIR", "./vector_index")
+EMBEDDING_DIM = _env_int("SMARTFIT_EMBEDDING_DIM", 384)
+CHAT_TOP_K = _env_int("SMARTFIT_CHAT_TOP_K", 5)
+# Corpora at least this large get an IVF index; 0 lists means sqrt(documents)
+VECTOR_IVF_MIN_SIZE = _env_int("SMARTFIT_VECTOR_IVF_MIN_SIZE", 50000)
+VECTOR_IVF_LISTS = _env_int("SMARTFIT_VECTOR_IVF_LISTS", 0)
+VECTOR_IVF_NPROBE = _env_int("SMARTFIT_VECTOR_IVF_NPROBE", 8)
+# Embedding pipeline: chunk size in (whitespace) tokens, and chunks per embedder call
+CHUNK_MAX_TOKENS = _env_int("SMARTFIT_CHUNK_MAX_TOKENS", 800)
+EMBED_BATCH_SIZE = _env_int("SMARTFIT_EMBED_BATCH_SIZE", 256)
+
+# Request metrics, served at /metrics and summarised in a Server-Timing header
+METRICS_ENABLED = _env_bool("SMARTFIT_METRICS_ENABLED", True)
+SERVER_TIMING_ENABLED = _env_bool("SMARTFIT_SERVER_TIMING_ENABLED", True)
+# Log requests slower than this, with the SQL they ran; 0 turns the log off
+SLOW_REQUEST_MS = _env_float("SMARTFIT_SLOW_REQUEST_MS", 0.0)
+
+# Startup. Workers don't migrate unless told to: run `python manage.py migrate`
+# once per deploy; until then workers report not ready.
+MIGRATE_ON_STARTUP = _env_bool("SMARTFIT_MIGRATE_ON_STARTUP", False)
+LOG_LEVEL = os.getenv("SMARTFIT_LOG_LEVEL", "INFO")
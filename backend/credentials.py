@@ -0,0 +1,207 @@
+"""Password hashing and verification off the request path.
+
+Hashes are scrypt (``hashlib.scrypt``) stored as ``scrypt$n$r$p$salt$hash``.
+The work runs in a bounded process pool, so a burst of logins neither blocks
+the event loop nor ties up the threadpool that serves sync handlers. Rows
+still holding a legacy plaintext password, or a hash made with older cost
+parameters, verify as before and report that they need rehashing.
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+import config
+
+PREFIX = "scrypt"
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+_pool: Optional[ProcessPoolExecutor] = None
+_slots: Optional[asyncio.Semaphore] = None
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.b64encode(raw).decode().rstrip("=")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    # Top-level so it can be pickled over to the worker processes
+    return hashlib.scrypt(
+        password.encode(), salt=salt, n=n, r=r, p=p,
+        maxmem=256 * n * r + 1024 * 1024, dklen=KEY_BYTES
+    )
+
+
+def _cost() -> Tuple[int, int, int]:
+    return config.PASSWORD_SCRYPT_N, config.PASSWORD_SCRYPT_R, config.PASSWORD_SCRYPT_P
+
+
+def _parse(stored: str) -> Optional[tuple]:
+    parts = stored.split("$")
+    if len(parts) != 6 or parts[0] != PREFIX:
+        return None
+    try:
+        return int(parts[1]), int(parts[2]), int(parts[3]), _b64decode(parts[4]), _b64decode(parts[5])
+    except ValueError:
+        return None
+
+
+def is_hashed(stored: str) -> bool:
+    return _parse(stored) is not None
+
+
+def needs_rehash(stored: str) -> bool:
+    """True for plaintext rows and hashes made with other cost parameters."""
+    parsed = _parse(stored)
+    return parsed is None or parsed[:3] != _cost()
+
+
+def hash_password_sync(password: str, n: Optional[int] = None, r: Optional[int] = None, p: Optional[int] = None) -> str:
+    if n is None:
+        n, r, p = _cost()
+    salt = os.urandom(SALT_BYTES)
+    digest = _scrypt(password, salt, n, r, p)
+    return f"{PREFIX}${n}${r}${p}${_b64encode(salt)}${_b64encode(digest)}"
+
+
+def verify_password_sync(password: str, stored: str) -> bool:
+    parsed = _parse(stored)
+    if parsed is None:
+        # Legacy plaintext row
+        return hmac.compare_digest(password.encode(), stored.encode())
+    n, r, p, salt, expected = parsed
+    return hmac.compare_digest(_scrypt(password, salt, n, r, p), expected)
+
+
+def _executor() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: forking a process that already runs threads and holds DB sockets isn't safe
+        _pool = ProcessPoolExecutor(
+            max_workers=config.PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def _semaphore() -> asyncio.Semaphore:
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(config.PASSWORD_HASH_MAX_PENDING)
+    return _slots
+
+
+async def _run(func, *args):
+    # Bound the queue in front of the pool so a login storm waits here instead
+    # of piling unbounded work onto the workers
+    async with _semaphore():
+        return await asyncio.get_running_loop().run_in_executor(_executor(), func, *args)
+
+
+async def hash_password(password: str) -> str:
+    # Cost parameters go along explicitly so workers always hash with this process's settings
+    return await _run(hash_password_sync, password, *_cost())
+
+
+async def verify_password(password: str, stored: str) -> bool:
+    if not is_hashed(stored):
+        # Plaintext comparison is cheap; no need for a round trip to the pool
+        return verify_password_sync(password, stored)
+    return await _run(verify_password_sync, password, stored)
+
+
+async def dummy_verify(password: str) -> bool:
+    """Do the work of a verify for an email with no account; always False.
+
+    Login then takes as long for unknown emails as for wrong passwords.
+    """
+    n, r, p = _cost()
+    stored = f"{PREFIX}${n}${r}${p}${_b64encode(os.urandom(SALT_BYTES))}${_b64encode(os.urandom(KEY_BYTES))}"
+    await _run(verify_password_sync, password, stored)
+    return False
+
+
+def warm_up(wait: bool = True):
+    """Start the worker processes now rather than on the first login.
+
+    With ``wait=False`` they spawn in the background and only a login that
+    arrives before they're up waits for them.
+    """
+    pool = _executor()
+    futures = [pool.submit(int) for _ in range(config.PASSWORD_HASH_WORKERS)]
+    if wait:
+        for future in futures:
+            future.result()
+
+
+def shutdown():
+    global _pool, _slots
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+    _pool = None
+    _slots = None
+
+
+async def _benchmark(logins: int, concurrency: int):
+    import statistics
+    import time
+
+    stored = hash_password_sync("correct horse battery staple")
+    latencies = []
+    limit = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with limit:
+            start = time.perf_counter()
+            assert await verify_password("correct horse battery staple", stored)
+            latencies.append(time.perf_counter() - start)
+
+    # A loop-responsiveness probe: how late does a 10 ms sleep wake up while verifying?
+    lag = []
+
+    async def probe():
+        while len(latencies) < logins:
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lag.append(time.perf_counter() - start - 0.01)
+
+    start = time.perf_counter()
+    await asyncio.gather(probe(), *(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"workers={config.PASSWORD_HASH_WORKERS} concurrency={concurrency} logins={logins}")
+    print(f"  throughput {logins / elapsed:.1f} verifies/s")
+    print(f"  latency p50={latencies[len(latencies) // 2] * 1000:.1f}ms "
+          f"p95={latencies[int(len(latencies) * 0.95)] * 1000:.1f}ms max={latencies[-1] * 1000:.1f}ms")
+    print(f"  event loop lag mean={statistics.mean(lag or [0]) * 1000:.2f}ms max={max(lag or [0]) * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Measure password hashing cost and login throughput")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    hash_password_sync("benchmark")
+    n, r, p = _cost()
+    print(f"scrypt n={n} r={r} p={p}: {(time.perf_counter() - start) * 1000:.1f} ms per hash")
+
+    warm_up()
+    try:
+        asyncio.run(_benchmark(args.logins, args.concurrency))
+    finally:
+        shutdown()
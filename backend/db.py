@@ -1,8 +1,18 @@
-from sqlalchemy import create_engine
+import logging
+import threading
+import time
+from sqlalchemy import create_engine, event, exc
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.engine import URL
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from fastapi import Request, Response
+import config
+from cache import TTLCache
+from metrics import instrument_engine, metrics
+
+logger = logging.getLogger(__name__)
 
-DATABASE_URL = "sqlite:///./test.db"
 DB_URL = URL.create(
     drivername="postgresql",
     username="postgres",
@@ -11,15 +21,229 @@ DB_URL = URL.create(
     database="hassan",
     port=5432
 )
+DATABASE_URL = make_url(config.DATABASE_URL) if config.DATABASE_URL else DB_URL
+
+
+class PoolStats:
+    """Checkout counters for one engine's connection pool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.engine = None
+        self._lock = threading.Lock()
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += timed_out
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+
+class _TimedPoolMixin:
+    """Times every checkout so pool exhaustion shows up as waits, not just latency."""
+    stats = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            if self.stats is not None:
+                self.stats.record_wait(waited, timed_out)
+            metrics.record_pool_wait(waited)
+            if waited * 1000 >= config.DB_POOL_WAIT_WARN_MS:
+                logger.warning(
+                    "Waited %.1f ms for a %s connection (%s)",
+                    waited * 1000, self.stats.name if self.stats else "database", self.status()
+                )
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+# SQLAlchemy logs pools under their class's module; keep these as quiet as its own
+for _pool_class in (TimedQueuePool, TimedAsyncQueuePool):
+    logging.getLogger(f"{__name__}.{_pool_class.__name__}").setLevel(logging.WARNING)
+
+
+pool_stats = {}
+
+
+def _tune_sqlite(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in (
+        "journal_mode=WAL",
+        "synchronous=NORMAL",
+        "foreign_keys=ON",
+        "temp_store=MEMORY",
+        f"busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}",
+        f"cache_size=-{config.SQLITE_CACHE_SIZE_KB}",
+    ):
+        cursor.execute(f"PRAGMA {pragma}")
+    cursor.close()
+
+
+def engine_options(url: URL, is_async: bool = False) -> dict:
+    options = {"pool_pre_ping": config.DB_POOL_PRE_PING}
+    if url.get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+        if url.database in (None, "", ":memory:"):
+            # In-memory databases live in a single connection; keep SQLAlchemy's default pool
+            return options
+    else:
+        options["pool_recycle"] = config.DB_POOL_RECYCLE
+        if config.DB_STATEMENT_TIMEOUT_MS:
+            if url.get_driver_name() == "asyncpg":
+                options["connect_args"] = {"server_settings": {"statement_timeout": str(config.DB_STATEMENT_TIMEOUT_MS)}}
+            elif url.get_backend_name() == "postgresql":
+                options["connect_args"] = {"options": f"-c statement_timeout={config.DB_STATEMENT_TIMEOUT_MS}"}
+
+    options.update(
+        poolclass=TimedAsyncQueuePool if is_async else TimedQueuePool,
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+    )
+    return options
+
+
+def _register(sync_engine, name: str):
+    if sync_engine.dialect.name == "sqlite":
+        event.listen(sync_engine, "connect", _tune_sqlite)
+    instrument_engine(sync_engine)
+    stats = pool_stats[name] = PoolStats(name)
+    stats.engine = sync_engine
+    sync_engine.pool.stats = stats
+
+
+def build_engine(url, name: str = "primary"):
+    url = make_url(url)
+    built = create_engine(url, **engine_options(url))
+    _register(built, name)
+    return built
+
+
+def build_async_engine(url, name: str = "async"):
+    url = make_url(url)
+    built = create_async_engine(url, **engine_options(url, is_async=True))
+    _register(built.sync_engine, name)
+    return built
+
 
-engine = create_engine(DB_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine = build_engine(DATABASE_URL, "primary")
+# expire_on_commit=False: handlers return the objects they just wrote without reloading them
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 Base = declarative_base()
 
+# Read-only handlers may use the replica; without one it is the primary engine
+read_engine = build_engine(config.READ_DATABASE_URL, "replica") if config.READ_DATABASE_URL else engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=read_engine)
+
+# Read-your-writes: a client that just wrote is pinned to the primary. The pin is
+# kept in a cookie (so it follows the client to any worker) and, keyed on the
+# session id, in this process.
+PRIMARY_PIN_COOKIE = "db_primary_until"
+primary_pins = TTLCache(maxsize=100000, ttl=config.READ_YOUR_WRITES_SECONDS)
+
+
+def has_replica() -> bool:
+    return read_engine is not engine
+
+
+def pin_to_primary(request: Request, response: Response):
+    """Send this client's reads to the primary for READ_YOUR_WRITES_SECONDS."""
+    session_id = request.cookies.get("session_id")
+    if session_id:
+        primary_pins.set(session_id, True)
+    until = time.time() + config.READ_YOUR_WRITES_SECONDS
+    response.set_cookie(
+        PRIMARY_PIN_COOKIE, f"{until:.3f}",
+        max_age=max(1, int(config.READ_YOUR_WRITES_SECONDS)), httponly=True, samesite="lax"
+    )
+
+
+def reads_pinned_to_primary(request: Request) -> bool:
+    session_id = request.cookies.get("session_id")
+    if session_id and primary_pins.get(session_id):
+        return True
+    try:
+        return float(request.cookies.get(PRIMARY_PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_url_for(url) -> URL:
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
+
+# The async engine is only built in async mode so sync deployments don't need an async driver
+async_engine = None
+async_read_engine = None
+AsyncSessionLocal = None
+AsyncReadSessionLocal = None
+if config.DB_MODE == "async":
+    async_engine = build_async_engine(config.ASYNC_DATABASE_URL or async_url_for(DATABASE_URL))
+    AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+    async_read_engine = async_engine
+    if config.READ_DATABASE_URL:
+        async_read_engine = build_async_engine(async_url_for(config.READ_DATABASE_URL), "async_replica")
+    AsyncReadSessionLocal = async_sessionmaker(async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def read_session_factory(request: Request):
+    """Session factory for read-only work: the replica, unless this client just wrote."""
+    return SessionLocal if reads_pinned_to_primary(request) else ReadSessionLocal
+
+
+def get_read_db(request: Request):
+    db = read_session_factory(request)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db(request: Request):
+    factory = AsyncSessionLocal if reads_pinned_to_primary(request) else AsyncReadSessionLocal
+    async with factory() as db:
+        yield db
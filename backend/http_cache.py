@@ -0,0 +1,99 @@
+import hashlib
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Sequence
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+import config
+from cache import TTLCache
+from versions import table_versions
+
+# Serialized bodies keyed on ETag. An ETag already encodes the table versions,
+# so entries never need invalidating; they just stop being asked for.
+response_cache = TTLCache(maxsize=config.HTTP_CACHE_SIZE, ttl=config.HTTP_CACHE_TTL)
+
+
+@lru_cache(maxsize=None)
+def _adapter(response_model) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+
+def _tag(request: Request, versions: Sequence[tuple]) -> str:
+    versions = ",".join(f"{table}={version}" for table, version in versions)
+    key = f"{request.url.path}?{sorted(request.query_params.multi_items())}|{versions}"
+    return 'W/"' + hashlib.sha1(key.encode()).hexdigest()[:20] + '"'
+
+
+def _etag(request: Request, tables: Sequence[str]) -> str:
+    return _tag(request, [(table, table_versions.get(table)) for table in tables])
+
+
+async def _etag_async(request: Request, tables: Sequence[str]) -> str:
+    return _tag(request, [(table, await table_versions.get_async(table)) for table in tables])
+
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:]
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def _headers(etag: str, extra: dict = None) -> dict:
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={config.HTTP_CACHE_MAX_AGE}"}
+    if extra:
+        headers.update(extra)
+    return headers
+
+
+def _cached(request: Request, etag: str):
+    if _matches(request, etag):
+        return Response(status_code=304, headers=_headers(etag))
+    entry = response_cache.get(etag)
+    if entry is not None:
+        body, extra = entry
+        return Response(content=body, media_type="application/json", headers=_headers(etag, extra))
+    return None
+
+
+def _store(etag: str, response_model, payload: Any, scratch: Response) -> Response:
+    adapter = _adapter(response_model)
+    body = adapter.dump_json(adapter.validate_python(payload, from_attributes=True))
+    extra = {key: value for key, value in scratch.headers.items() if key.lower().startswith("x-")}
+    response_cache.set(etag, (body, extra))
+    return Response(content=body, media_type="application/json", headers=_headers(etag, extra))
+
+
+def cached_json(request: Request, tables: Sequence[str], response_model, build: Callable[[Response], Any]) -> Response:
+    """Serve a read-only endpoint with ETag revalidation and a serialized body cache.
+
+    The ETag is derived from the request and the current versions of
+    ``tables``, so a matching ``If-None-Match`` gets a 304 and a repeat request
+    gets the cached bytes, both without running ``build``. ``build`` receives a
+    scratch response whose ``X-`` headers (e.g. ``X-Next-Cursor``) are cached
+    along with the body.
+    """
+    etag = _etag(request, tables)
+    cached = _cached(request, etag)
+    if cached is not None:
+        return cached
+    scratch = Response()
+    return _store(etag, response_model, build(scratch), scratch)
+
+
+async def cached_json_async(
+    request: Request,
+    tables: Sequence[str],
+    response_model,
+    build: Callable[[Response], Awaitable[Any]],
+) -> Response:
+    etag = await _etag_async(request, tables)
+    cached = _cached(request, etag)
+    if cached is not None:
+        return cached
+    scratch = Response()
+    return _store(etag, response_model, await build(scratch), scratch)
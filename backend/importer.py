@@ -0,0 +1,263 @@
+import argparse
+import csv
+import io
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import IO, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+import config
+from catalog import exercise_catalog
+from db import SessionLocal
+from knowledge import exercise_document_id, knowledge_base
+from models import Exercise, NutritionalLogs, WorkoutPlans, WorkoutProgress
+from rollups import apply_nutrition_logs, apply_workout_progress
+from routes.nutrition import NutritionalLogCreate
+from routes.workouts import ExerciseCreate, WorkoutProgressCreate, plans_changed
+from versions import bump_table_version
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "ndjson")
+KINDS = ("exercises", "nutrition", "progress")
+
+# Only the first few invalid rows are reported back; the rest are just counted
+MAX_REPORTED_ERRORS = 100
+
+# (line number, raw record): a JSON line, or a CSV row as a dict
+Record = Tuple[int, object]
+
+
+@dataclass
+class ImportReport:
+    kind: str
+    rows: int = 0
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+    errors: list = field(default_factory=list)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def skip(self, line: int, errors):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "errors": errors})
+
+    def as_dict(self) -> dict:
+        return {
+            "kind": self.kind,
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+            "errors": self.errors,
+        }
+
+
+def detect_format(filename: Optional[str] = None, content_type: Optional[str] = None) -> str:
+    name = (filename or "").lower()
+    content_type = content_type or ""
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in content_type or "jsonl" in content_type:
+        return "ndjson"
+    if name.endswith(".csv") or "csv" in content_type:
+        return "csv"
+    raise ValueError("Cannot tell the file format; pass csv or ndjson explicitly")
+
+
+def iter_records(stream: IO[str], fmt: str) -> Iterator[Record]:
+    """Yield records one at a time, so memory doesn't depend on the file size."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            # Empty cells mean "not given", same as a missing JSON key
+            yield reader.line_num, {key: value for key, value in row.items() if key and value != ""}
+    else:
+        for line_number, line in enumerate(stream, 1):
+            if line.strip():
+                yield line_number, line
+
+
+def _chunks(records: Iterable[Record], size: int) -> Iterator[List[Record]]:
+    records = iter(records)
+    while chunk := list(islice(records, size)):
+        yield chunk
+
+
+def _validate(model: type[BaseModel], chunk: Sequence[Record], report: ImportReport) -> List[Tuple[int, BaseModel]]:
+    valid = []
+    for line, raw in chunk:
+        report.rows += 1
+        try:
+            item = model.model_validate_json(raw) if isinstance(raw, str) else model.model_validate(raw)
+        except ValidationError as e:
+            report.skip(line, json.loads(e.json(include_url=False)))
+            continue
+        valid.append((line, item))
+    return valid
+
+
+def _csv_field(value) -> str:
+    # COPY reads an unquoted empty field as NULL, so every value is quoted and
+    # only None is left bare; otherwise "" would arrive as NULL too
+    if value is None:
+        return ""
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def copy_rows(db: Session, table, columns: Sequence[str], rows: Sequence[Sequence]) -> bool:
+    """Write ``rows`` with COPY when the database is Postgres.
+
+    Returns False when COPY isn't available, so the caller can fall back to an
+    executemany INSERT.
+    """
+    bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        return False
+    connection = db.connection().connection.driver_connection
+    sql = f"COPY {table.name} ({', '.join(columns)}) FROM STDIN"
+    if bind.dialect.driver == "psycopg":
+        with connection.cursor() as cursor, cursor.copy(sql) as copy:
+            for row in rows:
+                copy.write_row(row)
+        return True
+    if bind.dialect.driver == "psycopg2":
+        buffer = io.StringIO()
+        buffer.writelines(",".join(map(_csv_field, row)) + "\n" for row in rows)
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(f"{sql} WITH (FORMAT csv)", buffer)
+        return True
+    return False
+
+
+def write_rows(db: Session, model, rows: List[dict]):
+    if not rows:
+        return
+    columns = list(rows[0])
+    if not copy_rows(db, model.__table__, columns, [[row[column] for column in columns] for row in rows]):
+        db.execute(insert(model), rows)
+
+
+def import_exercises(db: Session, records: Iterable[Record], report: ImportReport, chunk_size: int, user_id: Optional[int] = None):
+    # Upsert on exercise_name; the last row for a name wins
+    ids_by_name = {name: exercise_id for name, exercise_id in db.execute(select(Exercise.exercise_name, Exercise.id))}
+    touched = set()
+    for chunk in _chunks(records, chunk_size):
+        latest = {item.exercise_name: item.model_dump() for _, item in _validate(ExerciseCreate, chunk, report)}
+        new = [row for name, row in latest.items() if name not in ids_by_name]
+        changed = [{"id": ids_by_name[name], **row} for name, row in latest.items() if name in ids_by_name]
+        if new:
+            inserted = db.execute(insert(Exercise).returning(Exercise.id, Exercise.exercise_name), new)
+            ids_by_name.update((name, exercise_id) for exercise_id, name in inserted)
+        if changed:
+            db.execute(update(Exercise), changed)
+        bump_table_version(db, "exercise")
+        db.commit()
+        touched.update(ids_by_name[name] for name in latest)
+        report.inserted += len(new)
+        report.updated += len(changed)
+    exercise_catalog.reload()
+    plans_changed()
+    knowledge_base.submit(exercise_document_id(exercise_id) for exercise_id in touched)
+
+
+def import_nutrition_logs(db: Session, records: Iterable[Record], report: ImportReport, chunk_size: int, user_id: Optional[int] = None):
+    for chunk in _chunks(records, chunk_size):
+        logs = [item for _, item in _validate(NutritionalLogCreate, chunk, report)]
+        write_rows(db, NutritionalLogs, [{"user_id": user_id, **log.model_dump()} for log in logs])
+        apply_nutrition_logs(db, user_id, logs)
+        db.commit()
+        report.inserted += len(logs)
+
+
+def import_workout_progress(db: Session, records: Iterable[Record], report: ImportReport, chunk_size: int, user_id: Optional[int] = None):
+    # Plans and exercises are small; load their ids once instead of checking per chunk
+    workout_ids = set(db.scalars(select(WorkoutPlans.id)))
+    exercise_ids = set(db.scalars(select(Exercise.id)))
+    for chunk in _chunks(records, chunk_size):
+        items = []
+        for line, item in _validate(WorkoutProgressCreate, chunk, report):
+            if item.workout_id not in workout_ids:
+                report.skip(line, f"Workout plan not found: {item.workout_id}")
+            elif item.exercise_id not in exercise_ids:
+                report.skip(line, f"Exercise not found: {item.exercise_id}")
+            else:
+                items.append(item)
+        write_rows(db, WorkoutProgress, [{"user_id": user_id, **item.model_dump()} for item in items])
+        apply_workout_progress(db, user_id, items)
+        db.commit()
+        report.inserted += len(items)
+
+
+IMPORTERS = {
+    "exercises": import_exercises,
+    "nutrition": import_nutrition_logs,
+    "progress": import_workout_progress,
+}
+
+
+def run_import(
+    kind: str,
+    stream: IO[str],
+    fmt: str,
+    user_id: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    session_factory=SessionLocal,
+) -> ImportReport:
+    """Import a CSV or NDJSON text stream, committing one validated chunk at a time.
+
+    Invalid rows are skipped and reported; the rest of the file still goes in.
+    Nutrition logs and progress entries belong to ``user_id``.
+    """
+    if kind not in IMPORTERS:
+        raise ValueError(f"Unknown import kind: {kind}")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown import format: {fmt}")
+    if kind != "exercises" and user_id is None:
+        raise ValueError(f"Importing {kind} needs a user id")
+
+    report = ImportReport(kind)
+    start = time.perf_counter()
+    with session_factory() as db:
+        IMPORTERS[kind](db, iter_records(stream, fmt), report, chunk_size or config.IMPORT_CHUNK_SIZE, user_id)
+    report.seconds = time.perf_counter() - start
+    logger.info(
+        "Imported %s: %d rows (%d inserted, %d updated, %d skipped) in %.2fs, %.0f rows/s",
+        kind, report.rows, report.inserted, report.updated, report.skipped, report.seconds, report.rows_per_second
+    )
+    return report
+
+
+def run_import_file(kind: str, binary: IO[bytes], fmt: str, user_id: Optional[int] = None, chunk_size: Optional[int] = None) -> ImportReport:
+    stream = io.TextIOWrapper(binary, encoding="utf-8", newline="")
+    try:
+        return run_import(kind, stream, fmt, user_id=user_id, chunk_size=chunk_size)
+    finally:
+        stream.detach()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import exercises, nutrition logs or workout progress from CSV/NDJSON")
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, help="defaults to the file extension")
+    parser.add_argument("--user-id", type=int, help="owner of imported nutrition logs / progress")
+    parser.add_argument("--chunk-size", type=int, default=config.IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with open(args.path, "rb") as source:
+        result = run_import_file(args.kind, source, args.format or detect_format(args.path), args.user_id, args.chunk_size)
+    print(json.dumps(result.as_dict(), indent=2))
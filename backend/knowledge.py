@@ -0,0 +1,343 @@
+"""Retrieval corpus for the chat endpoint: the exercise catalog plus knowledge documents.
+
+Knowledge documents are ``.md``/``.txt`` files under ``SMARTFIT_KNOWLEDGE_DIR``.
+Documents are split into chunks keyed by a sha256 of their content, and the
+index under ``SMARTFIT_VECTOR_INDEX_DIR`` is kept in step incrementally: a sync
+embeds only chunks whose hash it hasn't seen, tombstones the ones that went
+away and appends the rest. Exercise writes queue a sync of just that exercise
+on a background thread, so the request never waits for embedding; other
+workers notice the exercise version move on and run a full sync, which finds
+the work already done and just picks up the new files.
+"""
+import hashlib
+import logging
+import os
+import queue
+import re
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+import config
+from db import SessionLocal
+from models import Exercise
+from vector_index import HashingEmbedder, VectorIndex
+from versions import read_table_version, table_versions
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, run a single worker
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Document:
+    id: str
+    source: str
+    title: str
+    text: str
+
+
+@dataclass(frozen=True)
+class Chunk:
+    id: str
+    doc_id: str
+    source: str
+    title: str
+    text: str
+    hash: str
+
+    def meta(self) -> dict:
+        return {"doc_id": self.doc_id, "source": self.source, "title": self.title, "text": self.text, "hash": self.hash}
+
+
+def exercise_document_id(exercise_id: int) -> str:
+    return f"exercise:{exercise_id}"
+
+
+def exercise_text(exercise) -> str:
+    facts = [
+        f"{label}: {value}"
+        for label, value in (
+            ("Category", exercise.category),
+            ("Difficulty", exercise.difficulty),
+            ("Target muscle", exercise.target_muscle),
+            ("Equipment", exercise.equipment_needed),
+        )
+        if value
+    ]
+    return "\n".join([exercise.exercise_name, *facts, exercise.instructions or ""]).strip()
+
+
+def exercise_documents(session_factory=SessionLocal, ids: Optional[Iterable[int]] = None) -> List[Document]:
+    with session_factory() as db:
+        query = db.query(Exercise).order_by(Exercise.id)
+        if ids is not None:
+            query = query.filter(Exercise.id.in_(list(ids)))
+        return [
+            Document(exercise_document_id(exercise.id), "exercise", exercise.exercise_name, exercise_text(exercise))
+            for exercise in query
+        ]
+
+
+def knowledge_files(directory: str = config.KNOWLEDGE_DIR) -> List[str]:
+    paths = []
+    for root, _, files in os.walk(directory):
+        paths.extend(os.path.join(root, name) for name in files if name.endswith((".md", ".txt")))
+    return sorted(paths)
+
+
+def file_documents(directory: str = config.KNOWLEDGE_DIR) -> List[Document]:
+    documents = []
+    for path in knowledge_files(directory):
+        with open(path, encoding="utf-8") as f:
+            text = f.read().strip()
+        if text:
+            relative = os.path.relpath(path, directory)
+            title = os.path.splitext(os.path.basename(path))[0]
+            documents.append(Document(f"file:{relative}", "knowledge", title, text))
+    return documents
+
+
+def chunk_text(text: str, max_tokens: int = config.CHUNK_MAX_TOKENS) -> List[str]:
+    """Pack paragraphs into chunks of at most ``max_tokens`` whitespace tokens.
+
+    Paragraphs longer than a whole chunk are cut at word boundaries.
+    """
+    chunks, current, size = [], [], 0
+    for paragraph in re.split(r"\n\s*\n", text):
+        words = paragraph.split()
+        if len(words) > max_tokens:
+            pieces = [words[i:i + max_tokens] for i in range(0, len(words), max_tokens)]
+            pieces = [(" ".join(piece), len(piece)) for piece in pieces]
+        else:
+            pieces = [(paragraph.strip(), len(words))] if words else []
+        for piece, tokens in pieces:
+            if current and size + tokens > max_tokens:
+                chunks.append("\n\n".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def content_hash(text: str, model: str) -> str:
+    # The model is part of the key, so switching embedders re-embeds everything
+    return hashlib.sha256(f"{model}\0{text}".encode()).hexdigest()
+
+
+@contextmanager
+def _directory_lock(directory: str):
+    """Serialise index writers across worker processes."""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, ".lock"), "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class EmbeddingWorker(threading.Thread):
+    """Daemon thread that runs queued knowledge base syncs.
+
+    Everything queued while a sync runs is merged into one follow-up sync, so
+    a burst of exercise writes costs one pass, not one per write.
+    """
+
+    _STOP = object()
+
+    def __init__(self, knowledge_base: "KnowledgeBase"):
+        super().__init__(name="embedding-worker", daemon=True)
+        self.knowledge_base = knowledge_base
+        self._queue = queue.Queue()
+
+    def submit(self, doc_ids: Optional[Iterable[str]] = None):
+        """Queue a sync of ``doc_ids``, or of everything when None."""
+        self._queue.put(None if doc_ids is None else set(doc_ids))
+
+    def run(self):
+        stopping = False
+        while not stopping:
+            scope = self._queue.get()
+            if scope is self._STOP:
+                break
+            while True:
+                try:
+                    more = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if more is self._STOP:
+                    stopping = True
+                elif scope is None or more is None:
+                    scope = None
+                else:
+                    scope |= more
+            try:
+                self.knowledge_base.sync(scope)
+            except Exception:
+                logger.exception("Knowledge base sync failed")
+
+    def stop(self):
+        self._queue.put(self._STOP)
+
+
+class KnowledgeBase:
+    """Vector index over chunks of the exercises and knowledge files."""
+
+    TABLE = "exercise"
+
+    def __init__(self, directory: str = config.VECTOR_INDEX_DIR, embedder: Optional[HashingEmbedder] = None):
+        self.directory = directory
+        self.embedder = embedder or HashingEmbedder(config.EMBEDDING_DIM)
+        self.worker = EmbeddingWorker(self)
+        self._index: Optional[VectorIndex] = None
+        self._version = -1
+        self._lock = threading.Lock()
+
+    @property
+    def model(self) -> str:
+        return f"{self.embedder.name}/{self.embedder.dim}"
+
+    def chunks(self, document: Document) -> List[Chunk]:
+        return [
+            Chunk(f"{document.id}#{n}", document.id, document.source, document.title, text, content_hash(text, self.model))
+            for n, text in enumerate(chunk_text(document.text))
+        ]
+
+    def _documents(self, scope: Optional[Set[str]]) -> List[Document]:
+        if scope is None:
+            return exercise_documents() + file_documents()
+        exercise_ids = [int(doc_id.split(":", 1)[1]) for doc_id in scope if doc_id.startswith("exercise:")]
+        documents = exercise_documents(ids=exercise_ids) if exercise_ids else []
+        if any(doc_id.startswith("file:") for doc_id in scope):
+            documents += [doc for doc in file_documents() if doc.id in scope]
+        return documents
+
+    def _load_saved(self) -> Optional[VectorIndex]:
+        try:
+            index = VectorIndex.load(self.directory)
+        except (OSError, ValueError, KeyError):
+            return None
+        if index.meta.get("model") != self.model:
+            logger.info("Embedding model changed to %s; re-embedding the knowledge base", self.model)
+            return None
+        return index
+
+    def _open(self) -> VectorIndex:
+        """The index as saved on disk (another worker may have moved it on), or a new empty one."""
+        index = self._load_saved()
+        if index is not None:
+            return index
+        index = VectorIndex.empty(self.embedder.dim, self.directory)
+        index.meta = {"model": self.model, "chunks": {}}
+        index.save()
+        return index
+
+    def _embed(self, index: VectorIndex, rows: Dict[str, int], new: List[Chunk]) -> Tuple[np.ndarray, int]:
+        # Chunks whose content is already indexed (say, a paragraph that moved) reuse its vector
+        rows_by_hash = {meta["hash"]: rows[chunk_id] for chunk_id, meta in index.meta["chunks"].items() if chunk_id in rows}
+        vectors = np.empty((len(new), self.embedder.dim), dtype=np.float32)
+        missing = []
+        for i, chunk in enumerate(new):
+            row = rows_by_hash.get(chunk.hash)
+            if row is None:
+                missing.append(i)
+            else:
+                vectors[i] = index.vectors[row]
+        for start in range(0, len(missing), config.EMBED_BATCH_SIZE):
+            batch = missing[start:start + config.EMBED_BATCH_SIZE]
+            vectors[batch] = self.embedder.embed([new[i].text for i in batch])
+        return vectors, len(missing)
+
+    def sync(self, doc_ids: Optional[Iterable[str]] = None) -> dict:
+        """Bring the index in line with the documents: all of them, or just ``doc_ids``.
+
+        A document in ``doc_ids`` that no longer exists has its chunks removed.
+        """
+        scope = None if doc_ids is None else set(doc_ids)
+        with self._lock, _directory_lock(self.directory):
+            version = self._current_version()
+            index = self._open()
+            chunks = index.meta["chunks"]
+            rows = index.rows()
+            wanted = {chunk.id: chunk for document in self._documents(scope) for chunk in self.chunks(document)}
+
+            stale = [
+                chunk_id for chunk_id, meta in chunks.items()
+                if (scope is None or meta["doc_id"] in scope)
+                and (chunk_id not in wanted or wanted[chunk_id].hash != meta["hash"])
+            ]
+            new = [chunk for chunk_id, chunk in wanted.items() if chunks.get(chunk_id, {}).get("hash") != chunk.hash]
+            stats = {"added": len(new), "embedded": 0, "removed": len(stale)}
+            if new or stale:
+                vectors, stats["embedded"] = self._embed(index, rows, new)
+                index.remove(rows[chunk_id] for chunk_id in stale if chunk_id in rows)
+                for chunk_id in stale:
+                    del chunks[chunk_id]
+                index.add(vectors, [chunk.id for chunk in new])
+                chunks.update((chunk.id, chunk.meta()) for chunk in new)
+                if index.maintain(config.VECTOR_IVF_MIN_SIZE, config.VECTOR_IVF_LISTS):
+                    index.save()
+                else:
+                    index.write_manifest()
+                logger.info(
+                    "Knowledge index sync: %d chunks added (%d embedded), %d removed, %d total",
+                    stats["added"], stats["embedded"], stats["removed"], len(index)
+                )
+            self._index = index
+            self._version = max(self._version, version)
+        return stats
+
+    def load(self):
+        """Map the saved index now and bring it up to date on the worker thread."""
+        self._index = self._load_saved()
+        self.submit()
+
+    def start(self):
+        self.worker.start()
+
+    def stop(self):
+        self.worker.stop()
+
+    def submit(self, doc_ids: Optional[Iterable[str]] = None):
+        """Queue a background sync; returns immediately."""
+        self.worker.submit(doc_ids)
+
+    def _current_version(self) -> int:
+        with SessionLocal() as db:
+            return read_table_version(db, self.TABLE)
+
+    def search(self, question: str, k: int = 5) -> List[dict]:
+        version = table_versions.get(self.TABLE)
+        if version > self._version:
+            # Written through another worker; serve the current index while this one catches up
+            self._version = version
+            self.submit()
+        index = self._index
+        if index is None:
+            return []
+        chunks = index.meta["chunks"]
+        hits = index.search(self.embedder.embed([question]), k, nprobe=config.VECTOR_IVF_NPROBE)[0]
+        return [
+            {
+                "id": chunk_id,
+                "source": chunks[chunk_id]["source"],
+                "title": chunks[chunk_id]["title"],
+                "text": chunks[chunk_id]["text"],
+                "score": round(score, 4),
+            }
+            for chunk_id, score in hits
+        ]
+
+
+knowledge_base = KnowledgeBase()
@@ -0,0 +1,54 @@
+"""Operational commands, run once per deploy rather than in every worker.
+
+    python manage.py migrate          apply pending schema migrations
+    python manage.py showmigrations   list migrations and whether they're applied
+    python manage.py check            exit 1 if migrations are pending
+"""
+import argparse
+import logging
+import sys
+
+import config
+from db import engine
+from migrations import MIGRATIONS, applied_versions, pending_migrations, run_migrations
+
+logger = logging.getLogger("manage")
+
+
+def migrate(args) -> int:
+    ran = run_migrations(engine)
+    if ran:
+        logger.info("Applied migrations %s", ran)
+    else:
+        logger.info("Database schema is up to date")
+    return 0
+
+
+def show_migrations(args) -> int:
+    applied = applied_versions(engine)
+    for migration in MIGRATIONS:
+        print(f"[{'X' if migration.version in applied else ' '}] {migration.version} {migration.name}")
+    return 0
+
+
+def check(args) -> int:
+    pending = pending_migrations(engine)
+    for migration in pending:
+        logger.warning("Pending migration %d: %s", migration.version, migration.name)
+    return 1 if pending else 0
+
+
+COMMANDS = {
+    "migrate": migrate,
+    "showmigrations": show_migrations,
+    "check": check,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SmartFit management commands")
+    parser.add_argument("command", choices=COMMANDS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=config.LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    sys.exit(COMMANDS[args.command](args))
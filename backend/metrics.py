@@ -0,0 +1,236 @@
+"""Per-request instrumentation: latency, SQL statements, pool waits, in-flight requests.
+
+``RequestMetricsMiddleware`` opens a ``RequestMetrics`` for each request and
+keeps it in a context variable until the last byte of the body is sent, so
+streamed responses are charged for the queries that feed them. That variable follows the
+request into threadpool handlers and async engine calls, so the engine
+listeners installed by ``instrument_engine`` and the pool checkout timer in
+db.py can charge their time to it. Totals are kept per process and served in
+the Prometheus text format at ``/metrics``; with several workers, scrape each.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+import config
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Statements kept per request for the slow-request log
+SLOW_LOG_MAX_STATEMENTS = 100
+
+_current: ContextVar[Optional["RequestMetrics"]] = ContextVar("request_metrics", default=None)
+
+
+@dataclass
+class RequestMetrics:
+    start: float = field(default_factory=time.perf_counter)
+    statements: int = 0
+    db_seconds: float = 0.0
+    pool_wait_seconds: float = 0.0
+    # (milliseconds, SQL) of each statement, only collected when the slow log is on
+    sql: Optional[List[Tuple[float, str]]] = None
+
+    def server_timing(self, elapsed: float) -> str:
+        return (
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.statements} statements", '
+            f"pool;dur={self.pool_wait_seconds * 1000:.1f}, "
+            f"app;dur={max(0.0, elapsed - self.db_seconds - self.pool_wait_seconds) * 1000:.1f}, "
+            f"total;dur={elapsed * 1000:.1f}"
+        )
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name: str, **labels) -> List[str]:
+        lines, cumulative = [], 0
+        for bound, count in zip([*map(str, self.buckets), "+Inf"], self.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {cumulative}")
+        lines.append(f"{name}_sum{_labels(**labels)} {self.sum}")
+        lines.append(f"{name}_count{_labels(**labels)} {self.count}")
+        return lines
+
+
+def _labels(**labels) -> str:
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for value in labels.values())
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + "}"
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.requests: Dict[tuple, int] = defaultdict(int)
+        self.latency: Dict[tuple, Histogram] = {}
+        self.request_statements: Dict[tuple, int] = defaultdict(int)
+        self.request_db_seconds: Dict[tuple, float] = defaultdict(float)
+        self.request_pool_wait_seconds: Dict[tuple, float] = defaultdict(float)
+        # Every statement, including ones run outside a request (startup, background threads)
+        self.statements = 0
+        self.statement_seconds = 0.0
+
+    def begin_request(self) -> Tuple[RequestMetrics, object]:
+        current = RequestMetrics(sql=[] if config.SLOW_REQUEST_MS > 0 else None)
+        with self._lock:
+            self.in_flight += 1
+        return current, _current.set(current)
+
+    def end_request(self, method: str, route: str, status: int, current: RequestMetrics, token) -> float:
+        elapsed = time.perf_counter() - current.start
+        _current.reset(token)
+        key = (method, route)
+        with self._lock:
+            self.in_flight -= 1
+            self.requests[(method, route, status)] += 1
+            if key not in self.latency:
+                self.latency[key] = Histogram()
+            self.latency[key].observe(elapsed)
+            self.request_statements[key] += current.statements
+            self.request_db_seconds[key] += current.db_seconds
+            self.request_pool_wait_seconds[key] += current.pool_wait_seconds
+
+        if config.SLOW_REQUEST_MS > 0 and elapsed * 1000 >= config.SLOW_REQUEST_MS:
+            sql = "\n".join(f"  {ms:8.1f} ms  {statement}" for ms, statement in current.sql)
+            logger.warning(
+                "Slow request %s %s -> %d: %.1f ms, %d statements, %.1f ms in the database, %.1f ms waiting for a connection\n%s",
+                method, route, status, elapsed * 1000, current.statements,
+                current.db_seconds * 1000, current.pool_wait_seconds * 1000, sql
+            )
+        return elapsed
+
+    def record_statement(self, seconds: float, statement: str):
+        with self._lock:
+            self.statements += 1
+            self.statement_seconds += seconds
+        current = _current.get()
+        if current is not None:
+            current.statements += 1
+            current.db_seconds += seconds
+            if current.sql is not None and len(current.sql) < SLOW_LOG_MAX_STATEMENTS:
+                current.sql.append((seconds * 1000, " ".join(statement.split())))
+
+    def record_pool_wait(self, seconds: float):
+        current = _current.get()
+        if current is not None:
+            current.pool_wait_seconds += seconds
+
+    def render(self, pool_stats: dict) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{name}{labels} {value}" for labels, value in samples)
+
+        with self._lock:
+            metric("smartfit_http_requests_in_flight", "gauge", "Requests being handled.", [("", self.in_flight)])
+            metric("smartfit_http_requests_total", "counter", "Requests by route and status.", [
+                (_labels(method=method, route=route, status=status), count)
+                for (method, route, status), count in sorted(self.requests.items())
+            ])
+            lines.append("# HELP smartfit_http_request_duration_seconds Request latency by route.")
+            lines.append("# TYPE smartfit_http_request_duration_seconds histogram")
+            for (method, route), histogram in sorted(self.latency.items()):
+                lines.extend(histogram.samples("smartfit_http_request_duration_seconds", method=method, route=route))
+            metric("smartfit_http_request_db_statements_total", "counter", "SQL statements run by requests, by route.", [
+                (_labels(method=method, route=route), count) for (method, route), count in sorted(self.request_statements.items())
+            ])
+            metric("smartfit_http_request_db_seconds_total", "counter", "Time requests spent in SQL statements, by route.", [
+                (_labels(method=method, route=route), seconds) for (method, route), seconds in sorted(self.request_db_seconds.items())
+            ])
+            metric("smartfit_http_request_pool_wait_seconds_total", "counter", "Time requests waited for a pooled connection, by route.", [
+                (_labels(method=method, route=route), seconds) for (method, route), seconds in sorted(self.request_pool_wait_seconds.items())
+            ])
+            metric("smartfit_db_statements_total", "counter", "SQL statements run by this process.", [("", self.statements)])
+            metric("smartfit_db_statement_seconds_total", "counter", "Time spent in SQL statements.", [("", self.statement_seconds)])
+
+        pools = sorted(pool_stats.items())
+        metric("smartfit_db_pool_checkouts_total", "counter", "Connection checkouts.", [(_labels(pool=name), stats.checkouts) for name, stats in pools])
+        metric("smartfit_db_pool_timeouts_total", "counter", "Checkouts that timed out.", [(_labels(pool=name), stats.timeouts) for name, stats in pools])
+        metric("smartfit_db_pool_wait_seconds_total", "counter", "Time spent waiting for a connection.", [(_labels(pool=name), stats.wait_seconds_total) for name, stats in pools])
+        metric("smartfit_db_pool_wait_seconds_max", "gauge", "Longest wait for a connection.", [(_labels(pool=name), stats.wait_seconds_max) for name, stats in pools])
+        metric("smartfit_db_pool_checked_out", "gauge", "Connections currently checked out.", [
+            (_labels(pool=name), stats.engine.pool.checkedout()) for name, stats in pools
+            if stats.engine is not None and hasattr(stats.engine.pool, "checkedout")
+        ])
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("statement_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    metrics.record_statement(time.perf_counter() - conn.info["statement_start"].pop(), statement)
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute
+    starts = context.connection.info.get("statement_start") if context.connection is not None else None
+    if starts:
+        metrics.record_statement(time.perf_counter() - starts.pop(), context.statement or "")
+
+
+def instrument_engine(sync_engine):
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+class RequestMetricsMiddleware:
+    """Times each request from the first byte in to the last byte of the body out.
+
+    Plain ASGI rather than ``@app.middleware("http")``: that form returns as
+    soon as the handler hands back a response, before a streamed body has run
+    a single query.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not config.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        current, token = metrics.begin_request()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if config.SERVER_TIMING_ENABLED:
+                    # Headers go out before a streamed body, so this covers only the work done so far
+                    elapsed = time.perf_counter() - current.start
+                    MutableHeaders(scope=message).append("Server-Timing", current.server_timing(elapsed))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            # Label by route template, not the raw path, to keep the series count bounded
+            route = scope.get("route")
+            metrics.end_request(scope["method"], route.path if route else "unmatched", status, current, token)
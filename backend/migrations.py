@@ -0,0 +1,179 @@
+"""Versioned schema migrations.
+
+Each migration runs once per database and is recorded in ``schema_migrations``.
+Apply them with ``python manage.py migrate`` before starting new workers;
+workers only check for pending ones (see startup.py).
+"""
+import logging
+from dataclasses import dataclass
+from typing import Callable
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.sql import func
+
+from db import Base
+import models  # noqa: F401  registers every table on Base.metadata
+from rollups import rebuild_nutrition_totals, rebuild_workout_progress_totals
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary key for pg_advisory_lock so only one worker migrates at a time
+_MIGRATION_LOCK_ID = 7220150
+
+migration_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, default=func.now()),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
+    # Non-transactional migrations run on an AUTOCOMMIT connection, which
+    # Postgres requires for CREATE INDEX CONCURRENTLY
+    transactional: bool = True
+
+
+def _create_schema(conn: Connection):
+    Base.metadata.create_all(bind=conn)
+
+
+# Indexes on the hot query shapes. Fresh databases get them from create_all;
+# this migration adds them to databases created before they existed.
+HOT_INDEXES = (
+    ("nutrition", "ix_nutrition_user_date_id"),
+    ("nutrition", "ix_nutrition_user_meal_type"),
+    ("workout_progress", "ix_workout_progress_user_date_id"),
+    ("workout_plan_exercises", "ix_workout_plan_exercises_plan_order"),
+    ("exercise", "ix_exercise_category"),
+    ("exercise", "ix_exercise_difficulty"),
+)
+
+
+def _drop_if_invalid(conn: Connection, index_name: str):
+    """Drop an index left INVALID by a failed concurrent build.
+
+    IF NOT EXISTS would otherwise skip it, and the migration would be recorded
+    as applied with an index the planner never uses.
+    """
+    valid = conn.execute(text(
+        "SELECT i.indisvalid FROM pg_index i "
+        "JOIN pg_class c ON c.oid = i.indexrelid "
+        "JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE c.relname = :name AND n.nspname = current_schema()"
+    ), {"name": index_name}).scalar()
+    if valid is False:
+        logger.warning("Dropping invalid index %s left by an earlier failed build", index_name)
+        conn.exec_driver_sql(f'DROP INDEX CONCURRENTLY IF EXISTS "{index_name}"')
+
+
+def _create_index(conn: Connection, table_name: str, index_name: str):
+    table = Base.metadata.tables[table_name]
+    index = next(index for index in table.indexes if index.name == index_name)
+    sql = str(CreateIndex(index, if_not_exists=True).compile(dialect=conn.dialect))
+    if conn.dialect.name == "postgresql":
+        _drop_if_invalid(conn, index_name)
+        # Build without blocking writes to the table
+        sql = sql.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1)
+    logger.info("Creating index %s", index_name)
+    conn.exec_driver_sql(sql)
+
+
+def _create_hot_indexes(conn: Connection):
+    for table_name, index_name in HOT_INDEXES:
+        _create_index(conn, table_name, index_name)
+
+
+# (table, new index, index it replaces): the (user_id, date) indexes gain a
+# trailing id so keyset pagination on (date, id) needs no sort step
+KEYSET_INDEXES = (
+    ("workout_progress", "ix_workout_progress_user_date_id", "ix_workout_progress_user_date"),
+    ("nutrition", "ix_nutrition_user_date_id", "ix_nutrition_user_date"),
+)
+
+
+def _extend_keyset_indexes(conn: Connection):
+    drop = "DROP INDEX CONCURRENTLY IF EXISTS" if conn.dialect.name == "postgresql" else "DROP INDEX IF EXISTS"
+    for table_name, index_name, replaced in KEYSET_INDEXES:
+        _create_index(conn, table_name, index_name)
+        logger.info("Dropping index %s, now covered by %s", replaced, index_name)
+        conn.exec_driver_sql(f'{drop} "{replaced}"')
+
+
+def _backfill_nutrition_totals(conn: Connection):
+    with Session(bind=conn) as db:
+        rebuild_nutrition_totals(db)
+        db.flush()
+
+
+def _create_table_versions(conn: Connection):
+    Base.metadata.create_all(bind=conn, tables=[models.TableVersion.__table__])
+
+
+def _create_workout_progress_totals(conn: Connection):
+    Base.metadata.create_all(bind=conn, tables=[models.WorkoutProgressDailyTotals.__table__])
+    with Session(bind=conn) as db:
+        rebuild_workout_progress_totals(db)
+        db.flush()
+
+
+MIGRATIONS = (
+    Migration(1, "create schema", _create_schema),
+    Migration(2, "hot path indexes", _create_hot_indexes, transactional=False),
+    Migration(3, "backfill nutrition_daily_totals", _backfill_nutrition_totals),
+    Migration(4, "create table_versions", _create_table_versions),
+    Migration(5, "create and backfill workout_progress_daily_totals", _create_workout_progress_totals),
+    Migration(6, "extend user/date indexes with id for keyset pagination", _extend_keyset_indexes, transactional=False),
+)
+
+
+def _record(conn: Connection, migration: Migration):
+    conn.execute(schema_migrations.insert().values(version=migration.version, name=migration.name))
+
+
+def applied_versions(engine: Engine) -> set:
+    with engine.connect() as conn:
+        if not engine.dialect.has_table(conn, schema_migrations.name):
+            return set()
+        return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def pending_migrations(engine: Engine) -> list:
+    applied = applied_versions(engine)
+    return [migration for migration in MIGRATIONS if migration.version not in applied]
+
+
+def run_migrations(engine: Engine) -> list:
+    """Apply pending migrations in order and return the versions that ran."""
+    ran = []
+    with engine.connect() as lock_conn:
+        if engine.dialect.name == "postgresql":
+            lock_conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": _MIGRATION_LOCK_ID})
+            lock_conn.commit()
+        try:
+            migration_metadata.create_all(bind=engine)
+            for migration in pending_migrations(engine):
+                logger.info("Applying migration %d: %s", migration.version, migration.name)
+                if migration.transactional:
+                    with engine.begin() as conn:
+                        migration.apply(conn)
+                        _record(conn, migration)
+                else:
+                    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                        migration.apply(conn)
+                        _record(conn, migration)
+                ran.append(migration.version)
+        finally:
+            if engine.dialect.name == "postgresql":
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": _MIGRATION_LOCK_ID})
+                lock_conn.commit()
+    return ran
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Date, Float, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, Float, Text, Index
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy.sql import func
 from sqlalchemy import DateTime
@@ -20,6 +20,9 @@ class User(Base):
     activity_level = Column(String)
     created_at = Column(DateTime, default=func.now())
 
+    # Fetch created_at in the INSERT (RETURNING) instead of a SELECT after commit
+    __mapper_args__ = {"eager_defaults": True}
+
     workout_progress = relationship("WorkoutProgress", back_populates="user", cascade="all, delete-orphan")
     nutritional_logs = relationship("NutritionalLogs", back_populates="user", cascade="all, delete-orphan")
     
@@ -33,7 +36,7 @@ class WorkoutPlans(Base):
     plan_name = Column(String, nullable=False)
     difficulty_level = Column(String)
     duration = Column(String)
-    exercises = relationship("WorkoutPlanExercise", back_populates="workout_plan")
+    exercises = relationship("WorkoutPlanExercise", back_populates="workout_plan", order_by="WorkoutPlanExercise.order")
     progress = relationship("WorkoutProgress", back_populates="workout_plan")
 
 class Exercise(Base):
@@ -41,9 +44,9 @@ class Exercise(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     exercise_name = Column(String, nullable=False)
-    category = Column(String)
+    category = Column(String, index=True)
     equipment_needed = Column(String)
-    difficulty = Column(String)
+    difficulty = Column(String, index=True)
     instructions = Column(Text)
     target_muscle = Column(String)
 
@@ -52,6 +55,9 @@ class Exercise(Base):
 
 class WorkoutPlanExercise(Base):
     __tablename__ = "workout_plan_exercises"
+    __table_args__ = (
+        Index("ix_workout_plan_exercises_plan_order", "workout_plan_id", "order"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     workout_plan_id = Column(Integer, ForeignKey('workout_plans.id'), nullable=False)
@@ -69,6 +75,10 @@ class WorkoutPlanExercise(Base):
 
 class WorkoutProgress(Base):
     __tablename__ = "workout_progress"
+    __table_args__ = (
+        # Ends in id so keyset pages on (date, id) are read straight off the index
+        Index("ix_workout_progress_user_date_id", "user_id", "date", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
@@ -88,6 +98,10 @@ class WorkoutProgress(Base):
 
 class NutritionalLogs(Base):
     __tablename__ = "nutrition"
+    __table_args__ = (
+        Index("ix_nutrition_user_date_id", "user_id", "date", "id"),
+        Index("ix_nutrition_user_meal_type", "user_id", "meal_type"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
@@ -101,8 +115,42 @@ class NutritionalLogs(Base):
     serving_size = Column(String)
 
     user = relationship("User", back_populates="nutritional_logs")
-    
 
 
+class NutritionDailyTotals(Base):
+    """Per-user, per-day totals of NutritionalLogs, maintained by the nutrition routes."""
+    __tablename__ = "nutrition_daily_totals"
+
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    date = Column(Date, primary_key=True)
+    entries = Column(Integer, nullable=False, default=0)
+    calories = Column(Integer, nullable=False, default=0)
+    fat = Column(Float, nullable=False, default=0)
+    protein = Column(Float, nullable=False, default=0)
+    carbs = Column(Float, nullable=False, default=0)
+
+
+class WorkoutProgressDailyTotals(Base):
+    """Per-user, per-exercise, per-day totals of WorkoutProgress, maintained by the progress routes."""
+    __tablename__ = "workout_progress_daily_totals"
+    __table_args__ = (
+        Index("ix_workout_progress_daily_totals_user_week", "user_id", "week_start"),
+    )
+
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    exercise_id = Column(Integer, ForeignKey('exercise.id'), primary_key=True)
+    date = Column(Date, primary_key=True)
+    # Monday of the week, so weekly trends group on a plain column on every backend
+    week_start = Column(Date, nullable=False)
+    entries = Column(Integer, nullable=False, default=0)
+    sets = Column(Integer, nullable=False, default=0)
+    volume = Column(Integer, nullable=False, default=0)  # sum of sets x reps x weights
+    max_weight = Column(Integer, nullable=True)
+
 
+class TableVersion(Base):
+    """Counter bumped on every write to a cached table, so workers can tell when to reload."""
+    __tablename__ = "table_versions"
 
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,104 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Optional, Sequence
+
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _to_json(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _from_json(value, python_type):
+    if value is None:
+        return None
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(values: Sequence) -> str:
+    raw = json.dumps([_to_json(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor does not match ordering")
+        return tuple(_from_json(value, column.type.python_type) for value, column in zip(values, columns))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _after(columns: Sequence, values: Sequence, descending: bool):
+    """Row-value comparison ``(c1, c2, ...) > (v1, v2, ...)``.
+
+    Kept as one row comparison (Postgres and SQLite both have them) rather
+    than the OR-expanded form, so the planner can use it as a range bound on an
+    index over the same columns and start reading right at the cursor.
+    """
+    row = tuple_(*columns)
+    return row < tuple(values) if descending else row > tuple(values)
+
+
+def cursor_for(item, columns: Sequence) -> str:
+    return encode_cursor([getattr(item, column.key) for column in columns])
+
+
+def page_query(
+    query,
+    order_by: Sequence,
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    descending: bool = False,
+):
+    """Apply ordering, the keyset predicate (or offset) and the limit.
+
+    Works on both ORM ``Query`` objects and 2.0 ``select()`` statements.
+    """
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in order_by])
+    if cursor:
+        query = query.filter(_after(order_by, decode_cursor(cursor, order_by), descending))
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+
+def set_next_cursor(response: Response, items: Sequence, order_by: Sequence, limit: int):
+    if items and len(items) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = cursor_for(items[-1], order_by)
+
+
+def paginate(
+    query: Query,
+    order_by: Sequence,
+    response: Response,
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    descending: bool = False,
+) -> list:
+    """Return one page of ``query`` in a stable order.
+
+    ``order_by`` must end in a unique column (usually the primary key). With a
+    ``cursor`` the page starts right after the row it encodes, so deep pages
+    cost the same as the first; without one the old ``skip`` offset is used.
+    When the page is full, the cursor for the next page is sent in the
+    ``X-Next-Cursor`` response header.
+    """
+    items = page_query(query, order_by, limit, skip=skip, cursor=cursor, descending=descending).all()
+    set_next_cursor(response, items, order_by, limit)
+    return items
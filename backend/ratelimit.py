@@ -0,0 +1,174 @@
+import math
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+import config
+
+
+class RateLimiter(ABC):
+    """Token bucket per key: ``burst`` tokens, refilled at ``rate`` tokens per second."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+
+    def _refill(self, tokens: float, elapsed: float) -> float:
+        return min(self.burst, tokens + max(0.0, elapsed) * self.rate)
+
+    @abstractmethod
+    def acquire(self, key: str, cost: float = 1.0) -> float:
+        """Take ``cost`` tokens; return 0 if allowed, else the seconds until they're available."""
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryRateLimiter(RateLimiter):
+    """Process-local buckets.
+
+    Each key costs one ``(tokens, updated_at)`` tuple. Keys are kept in LRU
+    order and the least recently seen are dropped past ``max_keys``; an evicted
+    key just starts again with a full bucket.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 100000):
+        super().__init__(rate, burst)
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, cost: float = 1.0) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (self.burst, now))
+            tokens = self._refill(tokens, now - updated_at)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / self.rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class SQLiteRateLimiter(RateLimiter):
+    """Buckets in a SQLite file so every worker on the host draws from the same budget."""
+
+    # Every this many acquires, drop rows idle long enough to have refilled completely
+    SWEEP_EVERY = 1000
+
+    def __init__(self, path: str, rate: float, burst: float):
+        super().__init__(rate, burst)
+        self.path = path
+        self._local = threading.local()
+        self._calls = 0
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits ("
+                "key TEXT PRIMARY KEY, "
+                "tokens REAL NOT NULL, "
+                "updated_at REAL NOT NULL)"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def acquire(self, key: str, cost: float = 1.0) -> float:
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated_at FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            tokens = self._refill(row[0], now - row[1]) if row else self.burst
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / self.rate
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limits (key, tokens, updated_at) VALUES (?, ?, ?)",
+                (key, tokens, now),
+            )
+            self._calls += 1
+            if self._calls % self.SWEEP_EVERY == 0:
+                conn.execute("DELETE FROM rate_limits WHERE updated_at < ?", (now - self.burst / self.rate,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+# Refill and take in one round trip; the key expires once the bucket would be full again
+_REDIS_TOKEN_BUCKET = """
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local rate, burst, now, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local tokens = tonumber(bucket[1]) or burst
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated_at) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisRateLimiter(RateLimiter):
+    """Buckets in Redis, shared by every worker on every host."""
+
+    def __init__(self, url: str, rate: float, burst: float, prefix: str = "ratelimit:"):
+        import redis
+
+        super().__init__(rate, burst)
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(_REDIS_TOKEN_BUCKET)
+        self._prefix = prefix
+
+    def acquire(self, key: str, cost: float = 1.0) -> float:
+        wait = self._script(keys=[self._prefix + key], args=[self.rate, self.burst, time.time(), cost])
+        return float(wait)
+
+    def close(self) -> None:
+        self._client.close()
+
+
+def create_rate_limiter(backend: str = config.RATE_LIMIT_BACKEND) -> RateLimiter:
+    rate, burst = config.RATE_LIMIT_RATE, config.RATE_LIMIT_BURST
+    if backend == "memory":
+        return MemoryRateLimiter(rate, burst, config.RATE_LIMIT_MAX_KEYS)
+    if backend == "sqlite":
+        return SQLiteRateLimiter(config.RATE_LIMIT_SQLITE_PATH, rate, burst)
+    if backend == "redis":
+        return RedisRateLimiter(config.RATE_LIMIT_REDIS_URL, rate, burst)
+    raise ValueError(f"Unknown rate limit backend: {backend}")
+
+
+def retry_after_header(wait: float) -> str:
+    return str(max(1, math.ceil(wait)))
@@ -0,0 +1,248 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import Date, and_, cast, func, insert, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models import NutritionalLogs, NutritionDailyTotals, WorkoutProgress, WorkoutProgressDailyTotals
+
+_NUTRITION_FIELDS = ("calories", "fat", "protein", "carbs")
+
+
+def _upsert_insert(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    return None
+
+
+def _add_nutrition_totals(db: Session, user_id: int, day: date, delta: dict):
+    upsert = _upsert_insert(db)
+    if upsert is not None:
+        stmt = upsert(NutritionDailyTotals).values(user_id=user_id, date=day, **delta)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[NutritionDailyTotals.user_id, NutritionDailyTotals.date],
+            set_={key: getattr(NutritionDailyTotals, key) + stmt.excluded[key] for key in delta},
+        )
+        db.execute(stmt)
+    else:
+        row = db.query(NutritionDailyTotals).filter(
+            NutritionDailyTotals.user_id == user_id,
+            NutritionDailyTotals.date == day
+        ).with_for_update().first()
+        if row is None:
+            db.add(NutritionDailyTotals(user_id=user_id, date=day, **delta))
+        else:
+            for key, value in delta.items():
+                setattr(row, key, getattr(row, key) + value)
+            db.flush()
+
+    if delta["entries"] < 0:
+        # Drop days that no longer have any logs
+        db.query(NutritionDailyTotals).filter(
+            NutritionDailyTotals.user_id == user_id,
+            NutritionDailyTotals.date == day,
+            NutritionDailyTotals.entries <= 0
+        ).delete(synchronize_session=False)
+
+
+def apply_nutrition_logs(db: Session, user_id: int, logs: Iterable, sign: int = 1):
+    """Add (sign=1) or subtract (sign=-1) logs from the user's daily totals.
+
+    ``logs`` may be ORM rows or Pydantic models; anything with ``date`` and
+    the macro attributes works. Runs in the caller's transaction.
+    """
+    deltas = defaultdict(lambda: {"entries": 0, "calories": 0, "fat": 0.0, "protein": 0.0, "carbs": 0.0})
+    for log in logs:
+        delta = deltas[log.date]
+        delta["entries"] += sign
+        for field in _NUTRITION_FIELDS:
+            delta[field] += sign * (getattr(log, field) or 0)
+
+    for day, delta in deltas.items():
+        _add_nutrition_totals(db, user_id, day, delta)
+
+
+def clear_nutrition_totals(db: Session, user_id: int, start_date: date, end_date: date):
+    db.query(NutritionDailyTotals).filter(
+        NutritionDailyTotals.user_id == user_id,
+        NutritionDailyTotals.date >= start_date,
+        NutritionDailyTotals.date <= end_date
+    ).delete(synchronize_session=False)
+
+
+def rebuild_nutrition_totals(db: Session, user_id: Optional[int] = None):
+    """Recompute daily totals from NutritionalLogs, for every user or just one.
+
+    One ``INSERT ... SELECT ... GROUP BY``: the totals never pass through
+    Python, so a backfill runs in constant memory however large the table.
+    """
+    delete = db.query(NutritionDailyTotals)
+    if user_id is not None:
+        delete = delete.filter(NutritionDailyTotals.user_id == user_id)
+    delete.delete(synchronize_session=False)
+
+    totals = select(
+        NutritionalLogs.user_id,
+        NutritionalLogs.date,
+        func.count(NutritionalLogs.id),
+        func.coalesce(func.sum(NutritionalLogs.calories), 0),
+        func.coalesce(func.sum(NutritionalLogs.fat), 0),
+        func.coalesce(func.sum(NutritionalLogs.protein), 0),
+        func.coalesce(func.sum(NutritionalLogs.carbs), 0),
+    ).group_by(NutritionalLogs.user_id, NutritionalLogs.date)
+    if user_id is not None:
+        totals = totals.where(NutritionalLogs.user_id == user_id)
+
+    db.execute(insert(NutritionDailyTotals).from_select(
+        ["user_id", "date", "entries", "calories", "fat", "protein", "carbs"], totals
+    ))
+
+
+def week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def _greatest(db: Session, column, value):
+    """The larger of ``column`` and ``value``, ignoring a NULL on either side."""
+    larger = func.greatest if db.get_bind().dialect.name == "postgresql" else func.max
+    return larger(func.coalesce(column, value), func.coalesce(value, column))
+
+
+def _week_start_sql(db: Session, day):
+    """SQL for ``week_start(day)``, or None on backends without one here."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return cast(func.date_trunc("week", day), Date)
+    if dialect == "sqlite":
+        # The Sunday on or after the day, less six days
+        return func.date(day, "weekday 0", "-6 days")
+    return None
+
+
+def _progress_totals_select(*columns):
+    volume = func.coalesce(WorkoutProgress.sets, 0) * func.coalesce(WorkoutProgress.reps, 0) * func.coalesce(WorkoutProgress.weights, 0)
+    return select(
+        WorkoutProgress.user_id,
+        WorkoutProgress.exercise_id,
+        WorkoutProgress.date,
+        *columns,
+        func.count(WorkoutProgress.id),
+        func.coalesce(func.sum(WorkoutProgress.sets), 0),
+        func.coalesce(func.sum(volume), 0),
+        func.max(WorkoutProgress.weights),
+    ).group_by(WorkoutProgress.user_id, WorkoutProgress.exercise_id, WorkoutProgress.date)
+
+
+def _insert_progress_totals(db: Session, *criteria):
+    """Write the rollup rows for the WorkoutProgress rows matching ``criteria``.
+
+    An ``INSERT ... SELECT ... GROUP BY`` where ``week_start`` can be computed
+    in SQL; elsewhere the grouped rows are read back and inserted.
+    """
+    week = _week_start_sql(db, WorkoutProgress.date)
+    if week is not None:
+        db.execute(insert(WorkoutProgressDailyTotals).from_select(
+            ["user_id", "exercise_id", "date", "week_start", "entries", "sets", "volume", "max_weight"],
+            _progress_totals_select(week).where(*criteria)
+        ))
+        return
+
+    rows = [
+        {
+            "user_id": row[0], "exercise_id": row[1], "date": row[2], "week_start": week_start(row[2]),
+            "entries": row[3], "sets": row[4], "volume": row[5], "max_weight": row[6],
+        }
+        for row in db.execute(_progress_totals_select().where(*criteria))
+    ]
+    if rows:
+        db.execute(insert(WorkoutProgressDailyTotals), rows)
+
+
+def refresh_workout_progress_totals(db: Session, user_id: int, keys: Iterable):
+    """Recompute the rollup rows for ``(exercise_id, date)`` keys from WorkoutProgress.
+
+    Used after updates and deletes, where a maximum can't be maintained
+    incrementally. Runs in the caller's transaction.
+    """
+    keys = set(keys)
+    if not keys:
+        return
+    db.flush()
+
+    def matching(model):
+        return or_(*[and_(model.exercise_id == exercise_id, model.date == day) for exercise_id, day in keys])
+
+    db.query(WorkoutProgressDailyTotals).filter(
+        WorkoutProgressDailyTotals.user_id == user_id,
+        matching(WorkoutProgressDailyTotals)
+    ).delete(synchronize_session=False)
+    _insert_progress_totals(db, WorkoutProgress.user_id == user_id, matching(WorkoutProgress))
+
+
+def apply_workout_progress(db: Session, user_id: int, items: Iterable):
+    """Add new progress entries to the user's per-exercise daily totals.
+
+    ``items`` may be ORM rows or Pydantic models with ``exercise_id``, ``date``,
+    ``sets``, ``reps`` and ``weights``. Runs in the caller's transaction.
+    """
+    deltas = {}
+    for item in items:
+        key = (item.exercise_id, item.date)
+        delta = deltas.setdefault(key, {"entries": 0, "sets": 0, "volume": 0, "max_weight": None})
+        delta["entries"] += 1
+        delta["sets"] += item.sets or 0
+        delta["volume"] += (item.sets or 0) * (item.reps or 0) * (item.weights or 0)
+        if item.weights is not None:
+            delta["max_weight"] = max(item.weights, delta["max_weight"] or item.weights)
+    if not deltas:
+        return
+
+    upsert = _upsert_insert(db)
+    if upsert is None:
+        refresh_workout_progress_totals(db, user_id, deltas)
+        return
+
+    stmt = upsert(WorkoutProgressDailyTotals)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[WorkoutProgressDailyTotals.user_id, WorkoutProgressDailyTotals.exercise_id, WorkoutProgressDailyTotals.date],
+        set_={
+            "entries": WorkoutProgressDailyTotals.entries + stmt.excluded.entries,
+            "sets": WorkoutProgressDailyTotals.sets + stmt.excluded.sets,
+            "volume": WorkoutProgressDailyTotals.volume + stmt.excluded.volume,
+            "max_weight": _greatest(db, WorkoutProgressDailyTotals.max_weight, stmt.excluded.max_weight),
+        },
+    )
+    db.execute(stmt, [
+        {"user_id": user_id, "exercise_id": exercise_id, "date": day, "week_start": week_start(day), **delta}
+        for (exercise_id, day), delta in deltas.items()
+    ])
+
+
+def clear_workout_progress_totals(db: Session, user_id: int, start_date: date, end_date: date):
+    db.query(WorkoutProgressDailyTotals).filter(
+        WorkoutProgressDailyTotals.user_id == user_id,
+        WorkoutProgressDailyTotals.date >= start_date,
+        WorkoutProgressDailyTotals.date <= end_date
+    ).delete(synchronize_session=False)
+
+
+def rebuild_workout_progress_totals(db: Session, user_id: Optional[int] = None):
+    """Recompute per-exercise daily totals from WorkoutProgress, for every user or just one."""
+    delete = db.query(WorkoutProgressDailyTotals)
+    if user_id is not None:
+        delete = delete.filter(WorkoutProgressDailyTotals.user_id == user_id)
+    delete.delete(synchronize_session=False)
+
+    if user_id is not None:
+        _insert_progress_totals(db, WorkoutProgress.user_id == user_id)
+    elif _week_start_sql(db, WorkoutProgress.date) is not None:
+        _insert_progress_totals(db)
+    else:
+        # Rows pass through Python here, so go one user at a time to bound memory
+        for (each_user_id,) in db.execute(select(WorkoutProgress.user_id).distinct()).all():
+            _insert_progress_totals(db, WorkoutProgress.user_id == each_user_id)
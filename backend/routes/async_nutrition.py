@@ -0,0 +1,112 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from db import get_async_db, get_async_read_db
+from models import NutritionalLogs
+from typing import List, Optional
+from datetime import date
+from pagination import page_query, set_next_cursor
+from rollups import apply_nutrition_logs
+from routes.async_user import get_current_user
+from routes.user import CurrentUser
+from routes.nutrition import (
+    NutritionalLogCreate, NutritionalLogResponse, NutritionalLogBulkResponse,
+    insert_nutrition_logs, nutrition_summary_query, nutrition_summary_response, read_bulk_logs,
+)
+
+# Async versions of the hot routes in routes/nutrition.py, mounted ahead of them
+# when SMARTFIT_DB_MODE=async. Everything else is still served by the sync router.
+router = APIRouter(prefix="/nutrition")
+
+
+@router.post("/logs", response_model=NutritionalLogResponse)
+async def create_nutrition_log(
+    nutrition_log: NutritionalLogCreate,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create a new nutrition log entry for the authenticated user"""
+    db_nutrition_log = NutritionalLogs(
+        user_id=current_user.id,
+        **nutrition_log.model_dump()
+    )
+    db.add(db_nutrition_log)
+    await db.run_sync(apply_nutrition_logs, current_user.id, [db_nutrition_log])
+    await db.commit()
+    return db_nutrition_log
+
+@router.post("/logs/bulk", response_model=NutritionalLogBulkResponse)
+async def create_nutrition_logs_bulk(
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    logs = await read_bulk_logs(request)
+    ids = await db.run_sync(insert_nutrition_logs, current_user.id, logs)
+    await db.commit()
+    return {"count": len(ids), "ids": ids}
+
+@router.get("/logs", response_model=List[NutritionalLogResponse])
+async def get_nutrition_logs(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    date_filter: Optional[date] = None,
+    meal_type: Optional[str] = None,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    stmt = select(NutritionalLogs).where(NutritionalLogs.user_id == current_user.id)
+
+    if date_filter:
+        stmt = stmt.where(NutritionalLogs.date == date_filter)
+
+    if meal_type:
+        stmt = stmt.where(NutritionalLogs.meal_type == meal_type)
+
+    order_by = [NutritionalLogs.date, NutritionalLogs.id]
+    nutrition_logs = (await db.scalars(
+        page_query(stmt, order_by, limit, skip=skip, cursor=cursor, descending=True)
+    )).all()
+    set_next_cursor(response, nutrition_logs, order_by, limit)
+    return nutrition_logs
+
+@router.get("/logs/{log_id}", response_model=NutritionalLogResponse)
+async def get_nutrition_log(
+    log_id: int,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    nutrition_log = await db.scalar(select(NutritionalLogs).where(
+        NutritionalLogs.id == log_id,
+        NutritionalLogs.user_id == current_user.id
+    ))
+
+    if nutrition_log is None:
+        raise HTTPException(status_code=404, detail="Nutrition log not found")
+
+    return nutrition_log
+
+@router.get("/logs/date/{target_date}", response_model=List[NutritionalLogResponse])
+async def get_nutrition_logs_by_date(
+    target_date: date,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    nutrition_logs = await db.scalars(select(NutritionalLogs).where(
+        NutritionalLogs.user_id == current_user.id,
+        NutritionalLogs.date == target_date
+    ))
+
+    return nutrition_logs.all()
+
+@router.get("/summary")
+async def get_nutrition_summary(
+    start_date: date,
+    end_date: date,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    totals = (await db.execute(nutrition_summary_query(current_user.id, start_date, end_date))).one()
+    return nutrition_summary_response(start_date, end_date, totals)
@@ -0,0 +1,90 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+import config
+from credentials import dummy_verify, hash_password, needs_rehash, verify_password
+from db import get_async_db
+from models import User
+from routes.user import (
+    CurrentUser, Register, Login, SESSION_EXPIRY, INVALID_LOGIN,
+    USERS_TABLE, add_session_to_cache, cache_user, get_cached_user, get_session_id, get_session_user_id,
+)
+from versions import table_versions
+
+# Async versions of the routes in routes/user.py, mounted ahead of them when
+# SMARTFIT_DB_MODE=async.
+router = APIRouter(prefix="/auth")
+
+
+async def _in_session_store(func, *args):
+    # The memory store is a dict lookup; the sqlite and redis stores do blocking I/O
+    if config.SESSION_BACKEND == "memory":
+        return func(*args)
+    return await run_in_threadpool(func, *args)
+
+
+async def get_current_user(request: Request, db: AsyncSession = Depends(get_async_db)) -> CurrentUser:
+    user_id = await _in_session_store(get_session_user_id, request)
+    # Read before the lookup, so a write that lands in between still invalidates the entry
+    version = await table_versions.get_async(USERS_TABLE)
+    current_user = get_cached_user(user_id, version)
+    if current_user is not None:
+        return current_user
+
+    user = await db.get(User, user_id)
+    # Hand the connection back now; read-only handlers take a second session
+    await db.close()
+    if not user:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+    current_user = CurrentUser.from_user(user)
+    cache_user(version, current_user)
+    return current_user
+
+
+@router.post("/register")
+async def register(user: Register, db: AsyncSession = Depends(get_async_db)):
+    fields = user.model_dump()
+    fields["password"] = await hash_password(user.password)
+    new_user = User(**fields)
+    db.add(new_user)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="User already exists")
+    return {"status":200,"message":"User registered successfully"}
+
+
+@router.get("/user/{user_id}", response_model=CurrentUser)
+async def get_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    user = await db.get(User, user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return CurrentUser.from_user(user)
+
+
+@router.post("/login")
+async def login(user: Login, response: Response, db: AsyncSession = Depends(get_async_db)):
+    credentials = (await db.execute(select(User.id, User.password).where(User.email == user.email))).first()
+    # Same status, message and hashing work for an unknown email as for a wrong
+    # password, so login can't be used to find out which accounts exist
+    if credentials is None:
+        await dummy_verify(user.password)
+        raise HTTPException(status_code=401, detail=INVALID_LOGIN)
+
+    user_id, stored_password = credentials
+    if not await verify_password(user.password, stored_password):
+        raise HTTPException(status_code=401, detail=INVALID_LOGIN)
+
+    if needs_rehash(stored_password):
+        await db.execute(update(User).where(User.id == user_id).values(password=await hash_password(user.password)))
+        await db.commit()
+
+    session_id = get_session_id()
+    await _in_session_store(add_session_to_cache, session_id, user_id)
+
+    response.set_cookie(key="session_id", value=session_id, httponly=True, secure=True, max_age=SESSION_EXPIRY)
+    return {"status":200,"message":"Login Successful"}
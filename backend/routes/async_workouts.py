@@ -0,0 +1,155 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from db import get_async_db, get_async_read_db
+from models import WorkoutPlans, Exercise, WorkoutProgress, WorkoutPlanExercise
+from typing import List, Optional
+from datetime import date
+from pagination import page_query, set_next_cursor
+from http_cache import cached_json_async
+from routes.async_user import get_current_user
+from routes.user import CurrentUser
+from rollups import apply_workout_progress
+from catalog import exercise_catalog
+from versions import table_versions
+from routes.workouts import (
+    WorkoutPlanExerciseResponse, WorkoutPlanDetailResponse,
+    WorkoutProgressCreate, WorkoutProgressResponse, WorkoutProgressStatsResponse, PLAN_DETAIL_TABLES,
+    cache_plan_detail, get_cached_plan_detail,
+    progress_stats_queries, progress_stats_response, read_bulk_progress,
+)
+
+# Async versions of the hot routes in routes/workouts.py, mounted ahead of them
+# when SMARTFIT_DB_MODE=async. Everything else is still served by the sync router.
+router = APIRouter(prefix="/workouts")
+
+
+@router.get("/plans/{plan_id}/exercises", response_model=List[WorkoutPlanExerciseResponse])
+async def get_plan_exercises(plan_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    # Built from the primary: the cached body must be as new as the ETag's table versions
+    async def build(response: Response):
+        plan_exercises = await db.scalars(
+            select(WorkoutPlanExercise).options(
+                joinedload(WorkoutPlanExercise.exercise)
+            ).where(
+                WorkoutPlanExercise.workout_plan_id == plan_id
+            ).order_by(WorkoutPlanExercise.order)
+        )
+        return plan_exercises.all()
+
+    return await cached_json_async(request, PLAN_DETAIL_TABLES, List[WorkoutPlanExerciseResponse], build)
+
+async def load_workout_plan_detail(db: AsyncSession, plan_id: int) -> WorkoutPlanDetailResponse:
+    versions = tuple([await table_versions.get_async(table) for table in PLAN_DETAIL_TABLES])
+    detail = get_cached_plan_detail(plan_id, versions)
+    if detail is not None:
+        return detail
+
+    # Filled from the primary so a lagging replica can't re-cache a stale plan
+    plan = (await db.scalars(
+        select(WorkoutPlans).options(
+            joinedload(WorkoutPlans.exercises).joinedload(WorkoutPlanExercise.exercise)
+        ).where(WorkoutPlans.id == plan_id)
+    )).unique().first()
+    if plan is None:
+        raise HTTPException(status_code=404, detail="Workout plan not found")
+
+    detail = WorkoutPlanDetailResponse.model_validate(plan)
+    cache_plan_detail(plan_id, versions, detail)
+    return detail
+
+@router.get("/plans/{plan_id}/detail", response_model=WorkoutPlanDetailResponse)
+async def get_workout_plan_detail(plan_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def build(response: Response):
+        return await load_workout_plan_detail(db, plan_id)
+
+    return await cached_json_async(request, PLAN_DETAIL_TABLES, WorkoutPlanDetailResponse, build)
+
+@router.post("/progress", response_model=WorkoutProgressResponse)
+async def log_workout_progress(progress: WorkoutProgressCreate, current_user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    # Check if workout plan exists
+    if await db.get(WorkoutPlans, progress.workout_id) is None:
+        raise HTTPException(status_code=404, detail="Workout plan not found")
+
+    # Check if exercise exists
+    if await db.get(Exercise, progress.exercise_id) is None:
+        raise HTTPException(status_code=404, detail="Exercise not found")
+
+    db_progress = WorkoutProgress(
+        user_id=current_user.id,
+        **progress.model_dump()
+    )
+    db.add(db_progress)
+    await db.run_sync(apply_workout_progress, current_user.id, [db_progress])
+    await db.commit()
+    return db_progress
+
+@router.post("/progress/bulk", response_model=List[WorkoutProgressResponse])
+async def log_workout_progress_bulk(current_user: CurrentUser = Depends(get_current_user), progress_items: List[WorkoutProgressCreate] = Depends(read_bulk_progress), db: AsyncSession = Depends(get_async_db)):
+    if not progress_items:
+        return []
+
+    # Validate every referenced plan and exercise with one IN query each
+    workout_ids = {item.workout_id for item in progress_items}
+    found_workouts = set(await db.scalars(select(WorkoutPlans.id).where(WorkoutPlans.id.in_(workout_ids))))
+    missing_workouts = sorted(workout_ids - found_workouts)
+    if missing_workouts:
+        raise HTTPException(status_code=404, detail=f"Workout plan(s) not found: {missing_workouts}")
+
+    exercise_ids = {item.exercise_id for item in progress_items}
+    found_exercises = set(await db.scalars(select(Exercise.id).where(Exercise.id.in_(exercise_ids))))
+    missing_exercises = sorted(exercise_ids - found_exercises)
+    if missing_exercises:
+        raise HTTPException(status_code=404, detail=f"Exercise(s) not found: {missing_exercises}")
+
+    rows = [{"user_id": current_user.id, **item.model_dump()} for item in progress_items]
+    progress = (await db.scalars(
+        insert(WorkoutProgress).returning(WorkoutProgress, sort_by_parameter_order=True),
+        rows
+    )).all()
+    await db.run_sync(apply_workout_progress, current_user.id, progress)
+    await db.commit()
+    return progress
+
+@router.get("/progress", response_model=List[WorkoutProgressResponse])
+async def get_workout_progress(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    order_by = [WorkoutProgress.date, WorkoutProgress.id]
+    stmt = select(WorkoutProgress).where(WorkoutProgress.user_id == current_user.id)
+    progress = (await db.scalars(
+        page_query(stmt, order_by, limit, skip=skip, cursor=cursor, descending=True)
+    )).all()
+    set_next_cursor(response, progress, order_by, limit)
+    return progress
+
+@router.get("/progress/stats", response_model=WorkoutProgressStatsResponse)
+async def get_workout_progress_stats(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    exercise_id: Optional[int] = None,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    summary, records, weekly = progress_stats_queries(current_user.id, start_date, end_date, exercise_id)
+    summary, records, weekly = (await db.execute(summary)).all(), (await db.execute(records)).all(), (await db.execute(weekly)).all()
+    # Exercise names come from the catalog; a rebuild it needs runs off the event loop
+    await exercise_catalog.refresh_async()
+    return progress_stats_response(start_date, end_date, summary, records, weekly)
+
+@router.get("/progress/{progress_id}", response_model=WorkoutProgressResponse)
+async def get_workout_progress_by_id(progress_id: int, current_user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_async_read_db)):
+    progress = await db.scalar(select(WorkoutProgress).where(
+        WorkoutProgress.id == progress_id,
+        WorkoutProgress.user_id == current_user.id
+    ))
+
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Workout progress not found")
+    return progress
@@ -0,0 +1,33 @@
+from typing import List
+
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel, Field
+
+import config
+from knowledge import knowledge_base
+from routes.user import CurrentUser, get_current_user
+
+router = APIRouter(prefix="/chat")
+
+
+class ChatQuestion(BaseModel):
+    question: str = Field(min_length=1)
+    k: int = Field(default=config.CHAT_TOP_K, ge=1, le=50)
+
+class RetrievedContext(BaseModel):
+    id: str
+    source: str
+    title: str
+    text: str
+    score: float
+
+class ChatAnswer(BaseModel):
+    question: str
+    contexts: List[RetrievedContext]
+
+
+@router.post("/ask", response_model=ChatAnswer)
+def ask(question: ChatQuestion, current_user: CurrentUser = Depends(get_current_user)):
+    """Retrieve the exercise and knowledge passages most relevant to the question"""
+    contexts = knowledge_base.search(question.question, question.k)
+    return {"question": question.question, "contexts": contexts}
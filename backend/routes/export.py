@@ -0,0 +1,92 @@
+import csv
+import io
+import json
+from datetime import date
+from typing import Iterator, Literal, Sequence
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+import config
+from db import read_session_factory
+from models import NutritionalLogs, WorkoutProgress
+from routes.user import CurrentUser, get_current_user
+
+router = APIRouter(prefix="/export")
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+NUTRITION_COLUMNS = [
+    NutritionalLogs.id, NutritionalLogs.date, NutritionalLogs.meal_type, NutritionalLogs.food_name,
+    NutritionalLogs.calories, NutritionalLogs.fat, NutritionalLogs.protein, NutritionalLogs.carbs,
+    NutritionalLogs.serving_size,
+]
+
+PROGRESS_COLUMNS = [
+    WorkoutProgress.id, WorkoutProgress.date, WorkoutProgress.workout_id, WorkoutProgress.exercise_id,
+    WorkoutProgress.sets, WorkoutProgress.reps, WorkoutProgress.weights, WorkoutProgress.duration,
+    WorkoutProgress.notes,
+]
+
+
+def _ndjson_lines(keys: Sequence[str], rows) -> str:
+    lines = []
+    for row in rows:
+        record = {key: value.isoformat() if isinstance(value, date) else value for key, value in zip(keys, row)}
+        lines.append(json.dumps(record, separators=(",", ":")))
+        lines.append("\n")
+    return "".join(lines)
+
+
+def _csv_lines(rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+def stream_rows(session_factory, columns: Sequence, user_column, user_id: int, fmt: str) -> Iterator[str]:
+    """Yield one user's rows in ``fmt``, a batch at a time.
+
+    Plain column rows are read through a server-side cursor, so memory stays
+    flat however long the history is. The generator owns its session because
+    it outlives the request's dependencies.
+    """
+    keys = [column.key for column in columns]
+    if fmt == "csv":
+        yield _csv_lines([keys])
+
+    stmt = select(*columns).where(user_column == user_id).order_by(columns[1], columns[0]).execution_options(
+        stream_results=True, yield_per=config.EXPORT_BATCH_SIZE
+    )
+    db = session_factory()
+    try:
+        for rows in db.execute(stmt).partitions():
+            yield _csv_lines(rows) if fmt == "csv" else _ndjson_lines(keys, rows)
+    finally:
+        db.close()
+
+
+def export_response(request: Request, name: str, columns: Sequence, user_column, user_id: int, fmt: str) -> StreamingResponse:
+    return StreamingResponse(
+        stream_rows(read_session_factory(request), columns, user_column, user_id, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
+
+
+@router.get("/nutrition")
+def export_nutrition_logs(request: Request, format: ExportFormat = "ndjson", current_user: CurrentUser = Depends(get_current_user)):
+    """Stream every nutrition log of the authenticated user, oldest first"""
+    return export_response(request, "nutrition_logs", NUTRITION_COLUMNS, NutritionalLogs.user_id, current_user.id, format)
+
+
+@router.get("/progress")
+def export_workout_progress(request: Request, format: ExportFormat = "ndjson", current_user: CurrentUser = Depends(get_current_user)):
+    """Stream every workout progress entry of the authenticated user, oldest first"""
+    return export_response(request, "workout_progress", PROGRESS_COLUMNS, WorkoutProgress.user_id, current_user.id, format)
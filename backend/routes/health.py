@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Response
+
+from startup import check_ready, state
+
+router = APIRouter(prefix="/health")
+
+
+@router.get("/live")
+async def live():
+    """The process is up and serving; never touches the database"""
+    return {"status": "alive"}
+
+
+@router.get("/ready")
+async def ready(response: Response):
+    """Booted, schema current and the database reachable; 503 otherwise"""
+    is_ready = await check_ready()
+    if not is_ready:
+        response.status_code = 503
+    return {
+        "status": "ready" if is_ready else "not ready",
+        "reason": state.reason,
+        "startup_ms": state.timings,
+    }
@@ -0,0 +1,48 @@
+import tempfile
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+
+from importer import detect_format, run_import_file
+from routes.user import CurrentUser, get_admin_user, get_current_user
+
+router = APIRouter(prefix="/import")
+
+ImportKind = Literal["exercises", "nutrition", "progress"]
+ImportFormat = Literal["csv", "ndjson"]
+
+
+def get_importing_user(kind: ImportKind, current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
+    # Exercises are the catalog every user shares; the other kinds only touch the caller's own history
+    if kind == "exercises":
+        return get_admin_user(current_user)
+    return current_user
+
+
+@router.post("/{kind}")
+async def import_file(
+    kind: ImportKind,
+    request: Request,
+    format: Optional[ImportFormat] = None,
+    current_user: CurrentUser = Depends(get_importing_user)
+):
+    """Import a CSV or NDJSON upload sent as the raw request body.
+
+    The upload is spooled to a temporary file and imported in chunks, so large
+    files don't have to fit in memory. Nutrition logs and progress entries are
+    added to the authenticated user's history; exercises (upserted into the
+    shared catalog) need an admin, one of ``SMARTFIT_ADMIN_EMAILS``.
+    """
+    if format is None:
+        try:
+            format = detect_format(content_type=request.headers.get("content-type"))
+        except ValueError as e:
+            raise HTTPException(status_code=415, detail=str(e))
+
+    with tempfile.TemporaryFile() as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        report = await run_in_threadpool(run_import_file, kind, spool, format, current_user.id)
+    return report.as_dict()
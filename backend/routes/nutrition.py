@@ -1,11 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+import datetime
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from sqlalchemy import delete, func, insert, select
 from sqlalchemy.orm import Session
-from db import get_db
-from models import NutritionalLogs, User
+from db import get_db, get_read_db
+from models import NutritionalLogs, NutritionDailyTotals
+from rollups import apply_nutrition_logs, clear_nutrition_totals
 from typing import List, Optional
 from datetime import date
-from routes.user import get_current_user
+from routes.user import CurrentUser, get_current_user
+import config
+from bulk import read_body, stream_body, too_many_entries, validation_detail
+from pagination import paginate
 
 router = APIRouter(prefix="/nutrition")
 
@@ -23,7 +30,8 @@ class NutritionalLogCreate(NutritionalLogBase):
     pass
 
 class NutritionalLogUpdate(BaseModel):
-    date: Optional[date] = None
+    # Spelled datetime.date: a bare ``date`` here resolves to the field's own None default
+    date: Optional[datetime.date] = None
     meal_type: Optional[str] = None
     food_name: Optional[str] = None
     calories: Optional[int] = None
@@ -42,7 +50,7 @@ class NutritionalLogResponse(NutritionalLogBase):
 @router.post("/logs", response_model=NutritionalLogResponse)
 def create_nutrition_log(
     nutrition_log: NutritionalLogCreate, 
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Create a new nutrition log entry for the authenticated user"""
@@ -51,18 +59,100 @@ def create_nutrition_log(
         **nutrition_log.model_dump()
     )
     db.add(db_nutrition_log)
+    apply_nutrition_logs(db, current_user.id, [db_nutrition_log])
     db.commit()
-    db.refresh(db_nutrition_log)
     return db_nutrition_log
 
+class NutritionalLogBulkResponse(BaseModel):
+    count: int
+    ids: List[int]
+
+_log_list_adapter = TypeAdapter(List[NutritionalLogCreate])
+
+async def _read_ndjson_logs(request: Request) -> List[NutritionalLogCreate]:
+    logs = []
+    buffer = b""
+    line_number = 0
+
+    def parse(line: bytes):
+        nonlocal line_number
+        line_number += 1
+        if not line.strip():
+            return
+        if len(logs) >= config.NUTRITION_BULK_MAX_ENTRIES:
+            raise too_many_entries(config.NUTRITION_BULK_MAX_ENTRIES)
+        try:
+            logs.append(NutritionalLogCreate.model_validate_json(line))
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=validation_detail(e, line_number))
+
+    async for chunk in stream_body(request):
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            parse(line)
+    parse(buffer)
+    return logs
+
+async def _read_json_logs(request: Request) -> List[NutritionalLogCreate]:
+    # The byte limit bounds what validation can cost before the entry count is known
+    body = await read_body(request)
+    try:
+        logs = _log_list_adapter.validate_json(body)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=validation_detail(e))
+    if len(logs) > config.NUTRITION_BULK_MAX_ENTRIES:
+        raise too_many_entries(config.NUTRITION_BULK_MAX_ENTRIES)
+    return logs
+
+async def read_bulk_logs(request: Request) -> List[NutritionalLogCreate]:
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        return await _read_ndjson_logs(request)
+    return await _read_json_logs(request)
+
+def insert_nutrition_logs(db: Session, user_id: int, logs: List[NutritionalLogCreate]) -> List[int]:
+    if not logs:
+        return []
+    rows = [{"user_id": user_id, **log.model_dump()} for log in logs]
+    # One multi-row INSERT ... RETURNING (batched by the driver) instead of a refresh per row
+    ids = db.scalars(
+        insert(NutritionalLogs).returning(NutritionalLogs.id, sort_by_parameter_order=True),
+        rows
+    ).all()
+    apply_nutrition_logs(db, user_id, logs)
+    return ids
+
+def _insert_nutrition_logs_and_commit(db: Session, user_id: int, logs: List[NutritionalLogCreate]) -> List[int]:
+    ids = insert_nutrition_logs(db, user_id, logs)
+    db.commit()
+    return ids
+
+@router.post("/logs/bulk", response_model=NutritionalLogBulkResponse)
+async def create_nutrition_logs_bulk(
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Create many nutrition logs in one transaction.
+
+    Accepts a JSON array, or one JSON object per line when sent as
+    ``application/x-ndjson``. The whole batch is validated before anything is written.
+    """
+    logs = await read_bulk_logs(request)
+    ids = await run_in_threadpool(_insert_nutrition_logs_and_commit, db, current_user.id, logs)
+    return {"count": len(ids), "ids": ids}
+
 @router.get("/logs", response_model=List[NutritionalLogResponse])
 def get_nutrition_logs(
+    response: Response,
     skip: int = 0, 
     limit: int = 100,
+    cursor: Optional[str] = None,
     date_filter: Optional[date] = None,
     meal_type: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
 ):
     query = db.query(NutritionalLogs).filter(NutritionalLogs.user_id == current_user.id)
     
@@ -72,14 +162,18 @@ def get_nutrition_logs(
     if meal_type:
         query = query.filter(NutritionalLogs.meal_type == meal_type)
     
-    nutrition_logs = query.offset(skip).limit(limit).all()
+    # Newest first; keyed on (date, id) so deep pages cost the same as the first
+    nutrition_logs = paginate(
+        query, [NutritionalLogs.date, NutritionalLogs.id], response, limit,
+        skip=skip, cursor=cursor, descending=True
+    )
     return nutrition_logs
 
 @router.get("/logs/{log_id}", response_model=NutritionalLogResponse)
 def get_nutrition_log(
     log_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
 ):
     nutrition_log = db.query(NutritionalLogs).filter(
         NutritionalLogs.id == log_id,
@@ -94,8 +188,8 @@ def get_nutrition_log(
 @router.get("/logs/date/{target_date}", response_model=List[NutritionalLogResponse])
 def get_nutrition_logs_by_date(
     target_date: date,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
 ):
     nutrition_logs = db.query(NutritionalLogs).filter(
         NutritionalLogs.user_id == current_user.id,
@@ -104,28 +198,26 @@ def get_nutrition_logs_by_date(
     
     return nutrition_logs
 
-@router.get("/summary")
-def get_nutrition_summary(
-    start_date: date,
-    end_date: date,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    logs = db.query(NutritionalLogs).filter(
-        NutritionalLogs.user_id == current_user.id,
-        NutritionalLogs.date >= start_date,
-        NutritionalLogs.date <= end_date
-    ).all()
-    
-    total_calories = sum(log.calories or 0 for log in logs)
-    total_fat = sum(log.fat or 0 for log in logs)
-    total_protein = sum(log.protein or 0 for log in logs)
-    total_carbs = sum(log.carbs or 0 for log in logs)
-    
+def nutrition_summary_query(user_id: int, start_date: date, end_date: date):
+    # Aggregate the per-day rollup in SQL: O(days in range) rather than O(logs)
+    return select(
+        func.coalesce(func.sum(NutritionDailyTotals.entries), 0),
+        func.coalesce(func.sum(NutritionDailyTotals.calories), 0),
+        func.coalesce(func.sum(NutritionDailyTotals.fat), 0),
+        func.coalesce(func.sum(NutritionDailyTotals.protein), 0),
+        func.coalesce(func.sum(NutritionDailyTotals.carbs), 0),
+    ).where(
+        NutritionDailyTotals.user_id == user_id,
+        NutritionDailyTotals.date >= start_date,
+        NutritionDailyTotals.date <= end_date
+    )
+
+def nutrition_summary_response(start_date: date, end_date: date, totals) -> dict:
+    total_entries, total_calories, total_fat, total_protein, total_carbs = totals
     return {
         "start_date": start_date,
         "end_date": end_date,
-        "total_entries": len(logs),
+        "total_entries": total_entries,
         "total_calories": total_calories,
         "total_fat": round(total_fat, 2),
         "total_protein": round(total_protein, 2),
@@ -133,11 +225,21 @@ def get_nutrition_summary(
         "daily_average_calories": round(total_calories / max(1, (end_date - start_date).days + 1), 2)
     }
 
+@router.get("/summary")
+def get_nutrition_summary(
+    start_date: date,
+    end_date: date,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    totals = db.execute(nutrition_summary_query(current_user.id, start_date, end_date)).one()
+    return nutrition_summary_response(start_date, end_date, totals)
+
 @router.put("/logs/{log_id}", response_model=NutritionalLogResponse)
 def update_nutrition_log(
     log_id: int,
     nutrition_log_update: NutritionalLogUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     nutrition_log = db.query(NutritionalLogs).filter(
@@ -149,19 +251,20 @@ def update_nutrition_log(
         raise HTTPException(status_code=404, detail="Nutrition log not found")
     
     # Update only provided fields
+    apply_nutrition_logs(db, current_user.id, [nutrition_log], sign=-1)
     update_data = nutrition_log_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(nutrition_log, field, value)
+    apply_nutrition_logs(db, current_user.id, [nutrition_log])
     
     db.commit()
-    db.refresh(nutrition_log)
     return nutrition_log
 
 
 @router.delete("/logs/{log_id}")
 def delete_nutrition_log(
     log_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     nutrition_log = db.query(NutritionalLogs).filter(
@@ -173,24 +276,46 @@ def delete_nutrition_log(
         raise HTTPException(status_code=404, detail="Nutrition log not found")
     
     db.delete(nutrition_log)
+    apply_nutrition_logs(db, current_user.id, [nutrition_log], sign=-1)
     db.commit()
     
     return {"message": "Nutrition log deleted successfully"}
 
+def delete_nutrition_logs_between(db: Session, user_id: int, start_date: date, end_date: date) -> List[int]:
+    # One set-based DELETE ... RETURNING instead of loading and deleting each row
+    ids = db.scalars(
+        delete(NutritionalLogs).where(
+            NutritionalLogs.user_id == user_id,
+            NutritionalLogs.date >= start_date,
+            NutritionalLogs.date <= end_date
+        ).returning(NutritionalLogs.id),
+        execution_options={"synchronize_session": False}
+    ).all()
+    clear_nutrition_totals(db, user_id, start_date, end_date)
+    return ids
+
 @router.delete("/logs/date/{target_date}")
 def delete_nutrition_logs_by_date(
     target_date: date,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    nutrition_logs = db.query(NutritionalLogs).filter(
-        NutritionalLogs.user_id == current_user.id,
-        NutritionalLogs.date == target_date
-    ).all()
-    
-    for log in nutrition_logs:
-        db.delete(log)
-    
+    ids = delete_nutrition_logs_between(db, current_user.id, target_date, target_date)
     db.commit()
     
-    return {"message": f"Deleted {len(nutrition_logs)} nutrition log(s) for {target_date}"}
+    return {"message": f"Deleted {len(ids)} nutrition log(s) for {target_date}"}
+
+@router.delete("/logs")
+def delete_nutrition_logs_in_range(
+    start_date: date,
+    end_date: date,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+
+    ids = delete_nutrition_logs_between(db, current_user.id, start_date, end_date)
+    db.commit()
+
+    return {"message": f"Deleted {len(ids)} nutrition log(s) from {start_date} to {end_date}", "count": len(ids)}
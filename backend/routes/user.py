@@ -1,37 +1,88 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, EmailStr
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from db import get_db
 from models import User
 import uuid
-import time
+from dataclasses import dataclass
 from fastapi import Request, Response
+import config
+from cache import TTLCache
+from sessions import create_session_store
+from credentials import dummy_verify, hash_password, needs_rehash, verify_password
+from versions import bump_table_version, table_versions
 
 
 router = APIRouter(prefix="/auth")
 
 
-session_cache = {}
-SESSION_EXPIRY = 3600
+session_store = create_session_store()
+SESSION_EXPIRY = config.SESSION_EXPIRY
 
 def get_session_id():
     return str(uuid.uuid4())
 
 def add_session_to_cache(session_id: str, user_id: int):
-    session_cache[session_id] = {
-        "user_id": user_id,
-        "expires_at": time.time() + SESSION_EXPIRY
-    }
+    session_store.add(session_id, user_id, SESSION_EXPIRY)
 
 def get_user_from_cache(session_id: str):
-    if session_id in session_cache:
-        if session_cache[session_id]["expires_at"] > time.time():
-            return session_cache[session_id]["user_id"]
-        else:
-            del session_cache[session_id]
-    return None
-
-def get_current_user(request: Request, db: Session = Depends(get_db)):
+    return session_store.get(session_id)
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """Lightweight, session-independent snapshot of the authenticated user."""
+    id: int
+    name: str
+    email: str
+    age: int | None = None
+    weight: int | None = None
+    height: int | None = None
+    fitness_goals: str | None = None
+    medical_conditions: str | None = None
+    activity_level: str | None = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "CurrentUser":
+        return cls(
+            id=user.id,
+            name=user.name,
+            email=user.email,
+            age=user.age,
+            weight=user.weight,
+            height=user.height,
+            fitness_goals=user.fitness_goals,
+            medical_conditions=user.medical_conditions,
+            activity_level=user.activity_level,
+        )
+
+
+# user_id -> (users table version when loaded, CurrentUser). A profile update in
+# any worker bumps the version, so the other workers drop their copies within
+# TABLE_VERSION_CHECK_INTERVAL instead of serving them until the TTL runs out.
+user_cache = TTLCache(maxsize=config.USER_CACHE_SIZE, ttl=config.USER_CACHE_TTL)
+USERS_TABLE = "users"
+
+def get_cached_user(user_id: int, current_version: int | None = None) -> CurrentUser | None:
+    entry = user_cache.get(user_id)
+    if entry is None:
+        return None
+    version, current_user = entry
+    if current_version is None:
+        current_version = table_versions.get(USERS_TABLE)
+    if version < current_version:
+        return None
+    return current_user
+
+def cache_user(version: int, current_user: CurrentUser):
+    user_cache.set(current_user.id, (version, current_user))
+
+def invalidate_cached_user(user_id: int):
+    table_versions.expire(USERS_TABLE)
+    user_cache.pop(user_id)
+
+def get_session_user_id(request: Request) -> int:
     session_id = request.cookies.get("session_id")
     if not session_id:
         raise HTTPException(status_code=401, detail="Unauthorized")
@@ -39,16 +90,37 @@ def get_current_user(request: Request, db: Session = Depends(get_db)):
     user_id = get_user_from_cache(session_id)
     if not user_id:
         raise HTTPException(status_code=401, detail="Unauthorized")
-    
+    return user_id
+
+def get_current_user(request: Request, db: Session = Depends(get_db)) -> CurrentUser:
+    user_id = get_session_user_id(request)
+    current_user = get_cached_user(user_id)
+    if current_user is not None:
+        return current_user
+
+    # Read before the lookup, so a write that lands in between still invalidates the entry
+    version = table_versions.get(USERS_TABLE)
     user = db.query(User).filter(User.id == user_id).first()
+    # Hand the connection back now: read-only handlers take a second session, and
+    # holding both for the whole request can drain the pool under concurrency
+    db.close()
     if not user:
         raise HTTPException(status_code=401, detail="Unauthorized")
     
-    return user
+    current_user = CurrentUser.from_user(user)
+    cache_user(version, current_user)
+    return current_user
+
+def is_admin(user: CurrentUser) -> bool:
+    return user.email.lower() in config.ADMIN_EMAILS
+
+def get_admin_user(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
+    if not is_admin(current_user):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
 
 def remove_session_from_cache(session_id: str):
-    if session_id in session_cache:
-        del session_cache[session_id]
+    session_store.remove(session_id)
 
 
 class Register(BaseModel):
@@ -62,40 +134,91 @@ class Register(BaseModel):
     medical_conditions: str | None = None
     activity_level: str | None = None
 
-@router.post("/register")
-def register(user: Register, db : Session = Depends(get_db)):
-    existing_user = db.query(User).filter(User.email == user.email).first()
-    if existing_user:
+def _create_user(db: Session, fields: dict):
+    db.add(User(**fields))
+    # The unique constraint on email catches duplicates without a lookup first
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
         raise HTTPException(status_code=400, detail="User already exists")
-    new_user = User(**user.model_dump())
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+
+@router.post("/register")
+async def register(user: Register, db : Session = Depends(get_db)):
+    # Hashing runs in the credentials process pool, the insert in the threadpool
+    fields = user.model_dump()
+    fields["password"] = await hash_password(user.password)
+    await run_in_threadpool(_create_user, db, fields)
     return {"status":200,"message":"User registered successfully"}
 
 
-@router.get("/user/{user_id}")
+@router.get("/user/{user_id}", response_model=CurrentUser)
 def get_user(user_id:int, db: Session = Depends(get_db)):
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
-        return HTTPException(status_code=404, detail="User not found")
-    return user
+        raise HTTPException(status_code=404, detail="User not found")
+    # Never the whole row: it carries the password hash
+    return CurrentUser.from_user(user)
+
+
+class ProfileUpdate(BaseModel):
+    name: str | None = None
+    age: int | None = None
+    weight: int | None = None
+    height: int | None = None
+    fitness_goals: str | None = None
+    medical_conditions: str | None = None
+    activity_level: str | None = None
+
+@router.put("/profile")
+def update_profile(profile: ProfileUpdate, current_user: CurrentUser = Depends(get_current_user), db: Session = Depends(get_db)):
+    db_user = db.query(User).filter(User.id == current_user.id).first()
+    if db_user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # Update only provided fields
+    for field, value in profile.model_dump(exclude_unset=True).items():
+        setattr(db_user, field, value)
+
+    bump_table_version(db, USERS_TABLE)
+    db.commit()
+    invalidate_cached_user(db_user.id)
+    return {"status":200,"message":"Profile updated successfully"}
 
 
 class Login(BaseModel):
     email: str
     password: str
+
+INVALID_LOGIN = "Incorrect email or password"
+
+def _find_credentials(db: Session, email: str):
+    # Only the two columns login needs
+    return db.query(User.id, User.password).filter(User.email == email).first()
+
+def _store_password_hash(db: Session, user_id: int, password_hash: str):
+    db.query(User).filter(User.id == user_id).update({User.password: password_hash}, synchronize_session=False)
+    db.commit()
+
 @router.post("/login")
-def login(user: Login, response: Response, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if db_user is None:
-        return HTTPException(status_code=404, detail="User not found")
+async def login(user: Login, response: Response, db: Session = Depends(get_db)):
+    credentials = await run_in_threadpool(_find_credentials, db, user.email)
+    # Same status, message and hashing work for an unknown email as for a wrong
+    # password, so login can't be used to find out which accounts exist
+    if credentials is None:
+        await dummy_verify(user.password)
+        raise HTTPException(status_code=401, detail=INVALID_LOGIN)
     
-    if db_user.password != user.password:
-        return HTTPException(status_code=500, detail="Incorrect Password")
+    user_id, stored_password = credentials
+    if not await verify_password(user.password, stored_password):
+        raise HTTPException(status_code=401, detail=INVALID_LOGIN)
+
+    # Plaintext rows and hashes with outdated cost parameters are upgraded transparently
+    if needs_rehash(stored_password):
+        await run_in_threadpool(_store_password_hash, db, user_id, await hash_password(user.password))
     
     session_id = get_session_id()
-    add_session_to_cache(session_id, db_user.id)
+    add_session_to_cache(session_id, user_id)
 
     response.set_cookie(key="session_id", value=session_id, httponly=True, secure=True, max_age=SESSION_EXPIRY)
     return {"status":200,"message":"Login Successful"}
@@ -1,11 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
-from sqlalchemy.orm import Session
-from db import get_db
-from models import WorkoutPlans, Exercise, WorkoutProgress, WorkoutPlanExercise, User
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session, joinedload
+from db import get_db, get_read_db
+from models import WorkoutPlans, Exercise, WorkoutProgress, WorkoutPlanExercise, WorkoutProgressDailyTotals
 from typing import List, Optional
 from datetime import date
-from routes.user import get_current_user
+from routes.user import CurrentUser, get_current_user
+from pagination import paginate, decode_cursor, encode_cursor, NEXT_CURSOR_HEADER
+from catalog import exercise_catalog
+from knowledge import exercise_document_id, knowledge_base
+from versions import bump_table_version, table_versions
+from http_cache import cached_json
+from cache import TTLCache
+from bulk import read_body, too_many_entries, validation_detail
+from rollups import apply_workout_progress, clear_workout_progress_totals, refresh_workout_progress_totals
+import config
 
 router = APIRouter(prefix="/workouts")
 
@@ -59,6 +69,9 @@ class WorkoutPlanExerciseResponse(WorkoutPlanExerciseBase):
     class Config:
         from_attributes = True
 
+class WorkoutPlanDetailResponse(WorkoutPlanResponse):
+    exercises: List[WorkoutPlanExerciseResponse]
+
 class WorkoutProgressBase(BaseModel):
     workout_id: int
     exercise_id: int
@@ -79,26 +92,111 @@ class WorkoutProgressResponse(WorkoutProgressBase):
     class Config:
         from_attributes = True
 
+class WeeklyVolume(BaseModel):
+    week_start: date
+    entries: int
+    volume: int
+    max_weight: Optional[int] = None
+    # Volume compared with the previous week that has entries
+    volume_change: Optional[int] = None
+
+class PersonalRecord(BaseModel):
+    weight: int
+    date: date
+
+class ExerciseProgressStats(BaseModel):
+    exercise_id: int
+    exercise_name: Optional[str] = None
+    entries: int
+    total_sets: int
+    total_volume: int
+    best_day_volume: int
+    first_date: date
+    last_date: date
+    personal_record: Optional[PersonalRecord] = None
+    weekly: List[WeeklyVolume] = []
+
+class WorkoutProgressStatsResponse(BaseModel):
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    exercises: List[ExerciseProgressStats]
+
+# Version counters behind the ETags of the cached GET endpoints
+EXERCISE_TABLES = ("exercise",)
+PLAN_TABLES = ("workout_plans",)
+PLAN_DETAIL_TABLES = ("workout_plans", "exercise")
+
+# plan_id -> (PLAN_DETAIL_TABLES versions when loaded, fully materialized plan view).
+# A plan or exercise write in any worker bumps a version, so every worker stops
+# serving its copy within TABLE_VERSION_CHECK_INTERVAL; the writing worker also
+# drops its entries right away.
+plan_cache = TTLCache(maxsize=config.PLAN_CACHE_SIZE, ttl=config.PLAN_CACHE_TTL)
+
+def plan_detail_versions() -> tuple:
+    return tuple(table_versions.get(table) for table in PLAN_DETAIL_TABLES)
+
+def get_cached_plan_detail(plan_id: int, versions: tuple) -> Optional[WorkoutPlanDetailResponse]:
+    entry = plan_cache.get(plan_id)
+    if entry is None or entry[0] != versions:
+        return None
+    return entry[1]
+
+def cache_plan_detail(plan_id: int, versions: tuple, detail: WorkoutPlanDetailResponse):
+    plan_cache.set(plan_id, (versions, detail))
+
+def plans_changed(plan_id: Optional[int] = None):
+    """Drop cached views of a plan (or all plans) after a committed write."""
+    if plan_id is None:
+        plan_cache.clear()
+    else:
+        plan_cache.pop(plan_id)
+    table_versions.expire("workout_plans")
+
 # Exercise CRUD operations
 @router.post("/exercises", response_model=ExerciseResponse)
 def create_exercise(exercise: ExerciseCreate, db: Session = Depends(get_db)):
     db_exercise = Exercise(**exercise.model_dump())
     db.add(db_exercise)
+    bump_table_version(db, "exercise")
     db.commit()
-    db.refresh(db_exercise)
+    exercise_catalog.reload()
+    knowledge_base.submit([exercise_document_id(db_exercise.id)])
     return db_exercise
 
 @router.get("/exercises", response_model=List[ExerciseResponse])
-def get_exercises(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    exercises = db.query(Exercise).offset(skip).limit(limit).all()
-    return exercises
+def get_exercises(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    category: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    target_muscle: Optional[str] = None,
+    equipment_needed: Optional[str] = None
+):
+    # Served from the in-memory catalog; facets combine with AND
+    def build(response: Response):
+        after_id = decode_cursor(cursor, [Exercise.id])[0] if cursor else None
+        exercises = exercise_catalog.filter(
+            skip=skip, limit=limit, after_id=after_id,
+            category=category, difficulty=difficulty,
+            target_muscle=target_muscle, equipment_needed=equipment_needed
+        )
+        if exercises and len(exercises) == limit:
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor([exercises[-1].id])
+        return exercises
+
+    return cached_json(request, EXERCISE_TABLES, List[ExerciseResponse], build)
 
 @router.get("/exercises/{exercise_id}", response_model=ExerciseResponse)
-def get_exercise(exercise_id: int, db: Session = Depends(get_db)):
-    exercise = db.query(Exercise).filter(Exercise.id == exercise_id).first()
-    if exercise is None:
-        raise HTTPException(status_code=404, detail="Exercise not found")
-    return exercise
+def get_exercise(exercise_id: int, request: Request):
+    def build(response: Response):
+        exercise = exercise_catalog.get(exercise_id)
+        if exercise is None:
+            raise HTTPException(status_code=404, detail="Exercise not found")
+        return exercise
+
+    return cached_json(request, EXERCISE_TABLES, ExerciseResponse, build)
 
 @router.put("/exercises/{exercise_id}", response_model=ExerciseResponse)
 def update_exercise(exercise_id: int, exercise: ExerciseCreate, db: Session = Depends(get_db)):
@@ -108,9 +206,12 @@ def update_exercise(exercise_id: int, exercise: ExerciseCreate, db: Session = De
     
     for key, value in exercise.model_dump().items():
         setattr(db_exercise, key, value)
+    bump_table_version(db, "exercise")
     
     db.commit()
-    db.refresh(db_exercise)
+    exercise_catalog.reload()
+    plans_changed()
+    knowledge_base.submit([exercise_document_id(exercise_id)])
     return db_exercise
 
 @router.delete("/exercises/{exercise_id}")
@@ -120,7 +221,11 @@ def delete_exercise(exercise_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Exercise not found")
     
     db.delete(exercise)
+    bump_table_version(db, "exercise")
     db.commit()
+    exercise_catalog.reload()
+    plans_changed()
+    knowledge_base.submit([exercise_document_id(exercise_id)])
     return {"message": "Exercise deleted successfully"}
 
 # Workout Plan CRUD operations
@@ -128,21 +233,30 @@ def delete_exercise(exercise_id: int, db: Session = Depends(get_db)):
 def create_workout_plan(plan: WorkoutPlanCreate, db: Session = Depends(get_db)):
     db_plan = WorkoutPlans(**plan.model_dump())
     db.add(db_plan)
+    bump_table_version(db, "workout_plans")
     db.commit()
-    db.refresh(db_plan)
+    plans_changed(db_plan.id)
     return db_plan
 
+# Cached endpoints build their bodies from the primary, like load_workout_plan_detail:
+# the ETag carries the primary's table versions, so a body read from a lagging
+# replica would be cached (and served, to the writer too) under the new version.
 @router.get("/plans", response_model=List[WorkoutPlanResponse])
-def get_workout_plans(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    plans = db.query(WorkoutPlans).offset(skip).limit(limit).all()
-    return plans
+def get_workout_plans(request: Request, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    def build(response: Response):
+        return paginate(db.query(WorkoutPlans), [WorkoutPlans.id], response, limit, skip=skip, cursor=cursor)
+
+    return cached_json(request, PLAN_TABLES, List[WorkoutPlanResponse], build)
 
 @router.get("/plans/{plan_id}", response_model=WorkoutPlanResponse)
-def get_workout_plan(plan_id: int, db: Session = Depends(get_db)):
-    plan = db.query(WorkoutPlans).filter(WorkoutPlans.id == plan_id).first()
-    if plan is None:
-        raise HTTPException(status_code=404, detail="Workout plan not found")
-    return plan
+def get_workout_plan(plan_id: int, request: Request, db: Session = Depends(get_db)):
+    def build(response: Response):
+        plan = db.query(WorkoutPlans).filter(WorkoutPlans.id == plan_id).first()
+        if plan is None:
+            raise HTTPException(status_code=404, detail="Workout plan not found")
+        return plan
+
+    return cached_json(request, PLAN_TABLES, WorkoutPlanResponse, build)
 
 @router.put("/plans/{plan_id}", response_model=WorkoutPlanResponse)
 def update_workout_plan(plan_id: int, plan: WorkoutPlanCreate, db: Session = Depends(get_db)):
@@ -152,9 +266,10 @@ def update_workout_plan(plan_id: int, plan: WorkoutPlanCreate, db: Session = Dep
     
     for key, value in plan.model_dump().items():
         setattr(db_plan, key, value)
+    bump_table_version(db, "workout_plans")
     
     db.commit()
-    db.refresh(db_plan)
+    plans_changed(plan_id)
     return db_plan
 
 @router.delete("/plans/{plan_id}")
@@ -164,7 +279,9 @@ def delete_workout_plan(plan_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Workout plan not found")
     
     db.delete(plan)
+    bump_table_version(db, "workout_plans")
     db.commit()
+    plans_changed(plan_id)
     return {"message": "Workout plan deleted successfully"}
 
 # Workout Plan Exercise CRUD operations
@@ -184,17 +301,51 @@ def add_exercise_to_plan(plan_id: int, plan_exercise: WorkoutPlanExerciseCreate,
         workout_plan_id=plan_id,
         **plan_exercise.model_dump()
     )
+    # Already loaded above; saves a lazy load when the response is serialized
+    db_plan_exercise.exercise = exercise
     db.add(db_plan_exercise)
+    bump_table_version(db, "workout_plans")
     db.commit()
-    db.refresh(db_plan_exercise)
+    plans_changed(plan_id)
     return db_plan_exercise
 
 @router.get("/plans/{plan_id}/exercises", response_model=List[WorkoutPlanExerciseResponse])
-def get_plan_exercises(plan_id: int, db: Session = Depends(get_db)):
-    plan_exercises = db.query(WorkoutPlanExercise).filter(
-        WorkoutPlanExercise.workout_plan_id == plan_id
-    ).order_by(WorkoutPlanExercise.order).all()
-    return plan_exercises
+def get_plan_exercises(plan_id: int, request: Request, db: Session = Depends(get_db)):
+    def build(response: Response):
+        return db.query(WorkoutPlanExercise).options(
+            joinedload(WorkoutPlanExercise.exercise)
+        ).filter(
+            WorkoutPlanExercise.workout_plan_id == plan_id
+        ).order_by(WorkoutPlanExercise.order).all()
+
+    return cached_json(request, PLAN_DETAIL_TABLES, List[WorkoutPlanExerciseResponse], build)
+
+def load_workout_plan_detail(db: Session, plan_id: int) -> WorkoutPlanDetailResponse:
+    # Read before the lookup, so a write that lands in between still invalidates the entry
+    versions = plan_detail_versions()
+    detail = get_cached_plan_detail(plan_id, versions)
+    if detail is not None:
+        return detail
+
+    # Filled from the primary (not the replica) so a lagging replica can't put a
+    # stale plan back into the cache right after a write invalidated it.
+    # Plan, ordered plan exercises and their exercises in a single joined query
+    plan = db.query(WorkoutPlans).options(
+        joinedload(WorkoutPlans.exercises).joinedload(WorkoutPlanExercise.exercise)
+    ).filter(WorkoutPlans.id == plan_id).first()
+    if plan is None:
+        raise HTTPException(status_code=404, detail="Workout plan not found")
+
+    detail = WorkoutPlanDetailResponse.model_validate(plan)
+    cache_plan_detail(plan_id, versions, detail)
+    return detail
+
+@router.get("/plans/{plan_id}/detail", response_model=WorkoutPlanDetailResponse)
+def get_workout_plan_detail(plan_id: int, request: Request, db: Session = Depends(get_db)):
+    return cached_json(
+        request, PLAN_DETAIL_TABLES, WorkoutPlanDetailResponse,
+        lambda response: load_workout_plan_detail(db, plan_id)
+    )
 
 @router.put("/plans/{plan_id}/exercises/{exercise_id}", response_model=WorkoutPlanExerciseResponse)
 def update_plan_exercise(plan_id: int, exercise_id: int, plan_exercise: WorkoutPlanExerciseCreate, db: Session = Depends(get_db)):
@@ -208,9 +359,10 @@ def update_plan_exercise(plan_id: int, exercise_id: int, plan_exercise: WorkoutP
     
     for key, value in plan_exercise.model_dump().items():
         setattr(db_plan_exercise, key, value)
+    bump_table_version(db, "workout_plans")
     
     db.commit()
-    db.refresh(db_plan_exercise)
+    plans_changed(plan_id)
     return db_plan_exercise
 
 @router.delete("/plans/{plan_id}/exercises/{exercise_id}")
@@ -224,12 +376,14 @@ def remove_exercise_from_plan(plan_id: int, exercise_id: int, db: Session = Depe
         raise HTTPException(status_code=404, detail="Plan exercise not found")
     
     db.delete(plan_exercise)
+    bump_table_version(db, "workout_plans")
     db.commit()
+    plans_changed(plan_id)
     return {"message": "Exercise removed from plan successfully"}
 
 # Workout Progress CRUD operations
 @router.post("/progress", response_model=WorkoutProgressResponse)
-def log_workout_progress(progress: WorkoutProgressCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def log_workout_progress(progress: WorkoutProgressCreate, current_user: CurrentUser = Depends(get_current_user), db: Session = Depends(get_db)):
     # Check if workout plan exists
     workout = db.query(WorkoutPlans).filter(WorkoutPlans.id == progress.workout_id).first()
     if workout is None:
@@ -245,24 +399,187 @@ def log_workout_progress(progress: WorkoutProgressCreate, current_user: User = D
         **progress.model_dump()
     )
     db.add(db_progress)
+    apply_workout_progress(db, current_user.id, [db_progress])
     db.commit()
-    db.refresh(db_progress)
     return db_progress
 
+_progress_list_adapter = TypeAdapter(List[WorkoutProgressCreate])
+
+async def read_bulk_progress(request: Request) -> List[WorkoutProgressCreate]:
+    """The JSON array body of a bulk progress request, size-checked before it is validated.
+
+    Declare it after ``get_current_user``: dependencies resolve in order, so an
+    anonymous client is turned away before any of the body is read.
+    """
+    body = await read_body(request)
+    try:
+        items = _progress_list_adapter.validate_json(body)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=validation_detail(e))
+    if len(items) > config.WORKOUT_PROGRESS_BULK_MAX_ENTRIES:
+        raise too_many_entries(config.WORKOUT_PROGRESS_BULK_MAX_ENTRIES)
+    return items
+
+@router.post("/progress/bulk", response_model=List[WorkoutProgressResponse])
+def log_workout_progress_bulk(current_user: CurrentUser = Depends(get_current_user), progress_items: List[WorkoutProgressCreate] = Depends(read_bulk_progress), db: Session = Depends(get_db)):
+    if not progress_items:
+        return []
+
+    # Validate every referenced plan and exercise with one IN query each
+    workout_ids = {item.workout_id for item in progress_items}
+    found_workouts = {row[0] for row in db.query(WorkoutPlans.id).filter(WorkoutPlans.id.in_(workout_ids))}
+    missing_workouts = sorted(workout_ids - found_workouts)
+    if missing_workouts:
+        raise HTTPException(status_code=404, detail=f"Workout plan(s) not found: {missing_workouts}")
+
+    exercise_ids = {item.exercise_id for item in progress_items}
+    found_exercises = {row[0] for row in db.query(Exercise.id).filter(Exercise.id.in_(exercise_ids))}
+    missing_exercises = sorted(exercise_ids - found_exercises)
+    if missing_exercises:
+        raise HTTPException(status_code=404, detail=f"Exercise(s) not found: {missing_exercises}")
+
+    rows = [{"user_id": current_user.id, **item.model_dump()} for item in progress_items]
+    progress = db.scalars(
+        insert(WorkoutProgress).returning(WorkoutProgress, sort_by_parameter_order=True),
+        rows
+    ).all()
+    apply_workout_progress(db, current_user.id, progress)
+    db.commit()
+    return progress
+
 @router.get("/progress", response_model=List[WorkoutProgressResponse])
 def get_workout_progress(
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
-    current_user: User = Depends(get_current_user), 
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    current_user: CurrentUser = Depends(get_current_user), 
+    db: Session = Depends(get_read_db)
 ):
-    progress = db.query(WorkoutProgress).filter(
-        WorkoutProgress.user_id == current_user.id
-    ).offset(skip).limit(limit).all()
+    # Newest first; keyed on (date, id) so the user_id/date index serves every page
+    query = db.query(WorkoutProgress).filter(WorkoutProgress.user_id == current_user.id)
+    progress = paginate(
+        query, [WorkoutProgress.date, WorkoutProgress.id], response, limit,
+        skip=skip, cursor=cursor, descending=True
+    )
     return progress
 
+def progress_stats_queries(user_id: int, start_date: Optional[date], end_date: Optional[date], exercise_id: Optional[int]):
+    """Per-exercise totals, personal records and weekly series, all from the daily rollup."""
+    totals = WorkoutProgressDailyTotals
+    criteria = [totals.user_id == user_id]
+    if start_date:
+        criteria.append(totals.date >= start_date)
+    if end_date:
+        criteria.append(totals.date <= end_date)
+    if exercise_id:
+        criteria.append(totals.exercise_id == exercise_id)
+
+    summary = select(
+        totals.exercise_id,
+        func.sum(totals.entries),
+        func.sum(totals.sets),
+        func.sum(totals.volume),
+        func.max(totals.volume),
+        func.min(totals.date),
+        func.max(totals.date),
+    ).where(*criteria).group_by(totals.exercise_id).order_by(totals.exercise_id)
+
+    # Heaviest weight per exercise, and the first day it was lifted
+    ranked = select(
+        totals.exercise_id,
+        totals.max_weight,
+        totals.date,
+        func.row_number().over(
+            partition_by=totals.exercise_id, order_by=(totals.max_weight.desc(), totals.date)
+        ).label("rank"),
+    ).where(*criteria, totals.max_weight.isnot(None)).subquery()
+    records = select(ranked.c.exercise_id, ranked.c.max_weight, ranked.c.date).where(ranked.c.rank == 1)
+
+    weeks = select(
+        totals.exercise_id,
+        totals.week_start,
+        func.sum(totals.entries).label("entries"),
+        func.sum(totals.volume).label("volume"),
+        func.max(totals.max_weight).label("max_weight"),
+    ).where(*criteria).group_by(totals.exercise_id, totals.week_start).subquery()
+    weekly = select(
+        weeks.c.exercise_id,
+        weeks.c.week_start,
+        weeks.c.entries,
+        weeks.c.volume,
+        weeks.c.max_weight,
+        weeks.c.volume - func.lag(weeks.c.volume).over(partition_by=weeks.c.exercise_id, order_by=weeks.c.week_start),
+    ).order_by(weeks.c.exercise_id, weeks.c.week_start)
+
+    return summary, records, weekly
+
+def progress_stats_response(start_date: Optional[date], end_date: Optional[date], summary, records, weekly) -> dict:
+    personal_records = {exercise_id: {"weight": weight, "date": day} for exercise_id, weight, day in records}
+    weeks = {}
+    for exercise_id, week, entries, volume, max_weight, change in weekly:
+        weeks.setdefault(exercise_id, []).append({
+            "week_start": week, "entries": entries, "volume": volume,
+            "max_weight": max_weight, "volume_change": change,
+        })
+
+    exercises = []
+    for exercise_id, entries, total_sets, total_volume, best_day_volume, first_date, last_date in summary:
+        exercise = exercise_catalog.get(exercise_id)
+        exercises.append({
+            "exercise_id": exercise_id,
+            "exercise_name": exercise.exercise_name if exercise else None,
+            "entries": entries,
+            "total_sets": total_sets,
+            "total_volume": total_volume,
+            "best_day_volume": best_day_volume,
+            "first_date": first_date,
+            "last_date": last_date,
+            "personal_record": personal_records.get(exercise_id),
+            "weekly": weeks.get(exercise_id, []),
+        })
+    return {"start_date": start_date, "end_date": end_date, "exercises": exercises}
+
+@router.delete("/progress")
+def delete_workout_progress_in_range(
+    start_date: date,
+    end_date: date,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+
+    # One set-based DELETE ... RETURNING; every rollup day in the range is now empty
+    ids = db.scalars(
+        delete(WorkoutProgress).where(
+            WorkoutProgress.user_id == current_user.id,
+            WorkoutProgress.date >= start_date,
+            WorkoutProgress.date <= end_date
+        ).returning(WorkoutProgress.id),
+        execution_options={"synchronize_session": False}
+    ).all()
+    clear_workout_progress_totals(db, current_user.id, start_date, end_date)
+    db.commit()
+
+    return {"message": f"Deleted {len(ids)} workout progress record(s) from {start_date} to {end_date}", "count": len(ids)}
+
+@router.get("/progress/stats", response_model=WorkoutProgressStatsResponse)
+def get_workout_progress_stats(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    exercise_id: Optional[int] = None,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """Per-exercise volume (sets x reps x weights), personal records and weekly trend"""
+    summary, records, weekly = progress_stats_queries(current_user.id, start_date, end_date, exercise_id)
+    return progress_stats_response(
+        start_date, end_date, db.execute(summary).all(), db.execute(records).all(), db.execute(weekly).all()
+    )
+
 @router.get("/progress/{progress_id}", response_model=WorkoutProgressResponse)
-def get_workout_progress_by_id(progress_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_workout_progress_by_id(progress_id: int, current_user: CurrentUser = Depends(get_current_user), db: Session = Depends(get_read_db)):
     progress = db.query(WorkoutProgress).filter(
         WorkoutProgress.id == progress_id,
         WorkoutProgress.user_id == current_user.id
@@ -273,7 +590,7 @@ def get_workout_progress_by_id(progress_id: int, current_user: User = Depends(ge
     return progress
 
 @router.put("/progress/{progress_id}", response_model=WorkoutProgressResponse)
-def update_workout_progress(progress_id: int, progress: WorkoutProgressCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def update_workout_progress(progress_id: int, progress: WorkoutProgressCreate, current_user: CurrentUser = Depends(get_current_user), db: Session = Depends(get_db)):
     db_progress = db.query(WorkoutProgress).filter(
         WorkoutProgress.id == progress_id,
         WorkoutProgress.user_id == current_user.id
@@ -282,15 +599,16 @@ def update_workout_progress(progress_id: int, progress: WorkoutProgressCreate, c
     if db_progress is None:
         raise HTTPException(status_code=404, detail="Workout progress not found")
     
+    old_key = (db_progress.exercise_id, db_progress.date)
     for key, value in progress.model_dump().items():
         setattr(db_progress, key, value)
+    refresh_workout_progress_totals(db, current_user.id, [old_key, (db_progress.exercise_id, db_progress.date)])
     
     db.commit()
-    db.refresh(db_progress)
     return db_progress
 
 @router.delete("/progress/{progress_id}")
-def delete_workout_progress(progress_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def delete_workout_progress(progress_id: int, current_user: CurrentUser = Depends(get_current_user), db: Session = Depends(get_db)):
     progress = db.query(WorkoutProgress).filter(
         WorkoutProgress.id == progress_id,
         WorkoutProgress.user_id == current_user.id
@@ -300,21 +618,28 @@ def delete_workout_progress(progress_id: int, current_user: User = Depends(get_c
         raise HTTPException(status_code=404, detail="Workout progress not found")
     
     db.delete(progress)
+    refresh_workout_progress_totals(db, current_user.id, [(progress.exercise_id, progress.date)])
     db.commit()
     return {"message": "Workout progress deleted successfully"}
 
 # Additional utility endpoints
 @router.get("/exercises/category/{category}")
-def get_exercises_by_category(category: str, db: Session = Depends(get_db)):
-    exercises = db.query(Exercise).filter(Exercise.category == category).all()
-    return exercises
+def get_exercises_by_category(category: str, request: Request):
+    return cached_json(
+        request, EXERCISE_TABLES, List[ExerciseResponse],
+        lambda response: exercise_catalog.filter(category=category)
+    )
 
 @router.get("/exercises/difficulty/{difficulty}")
-def get_exercises_by_difficulty(difficulty: str, db: Session = Depends(get_db)):
-    exercises = db.query(Exercise).filter(Exercise.difficulty == difficulty).all()
-    return exercises
+def get_exercises_by_difficulty(difficulty: str, request: Request):
+    return cached_json(
+        request, EXERCISE_TABLES, List[ExerciseResponse],
+        lambda response: exercise_catalog.filter(difficulty=difficulty)
+    )
 
 @router.get("/plans/difficulty/{difficulty_level}")
-def get_plans_by_difficulty(difficulty_level: str, db: Session = Depends(get_db)):
-    plans = db.query(WorkoutPlans).filter(WorkoutPlans.difficulty_level == difficulty_level).all()
-    return plans
+def get_plans_by_difficulty(difficulty_level: str, request: Request, db: Session = Depends(get_db)):
+    return cached_json(
+        request, PLAN_TABLES, List[WorkoutPlanResponse],
+        lambda response: db.query(WorkoutPlans).filter(WorkoutPlans.difficulty_level == difficulty_level).all()
+    )
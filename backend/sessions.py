@@ -0,0 +1,200 @@
+import heapq
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStore(ABC):
+    """Maps session ids to user ids until they expire."""
+
+    @abstractmethod
+    def add(self, session_id: str, user_id: int, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[int]:
+        ...
+
+    @abstractmethod
+    def remove(self, session_id: str) -> None:
+        ...
+
+    def sweep(self) -> int:
+        """Drop expired sessions and return how many were removed."""
+        return 0
+
+    def close(self) -> None:
+        pass
+
+
+class MemorySessionStore(SessionStore):
+    """Process-local store.
+
+    Lookups are a dict access. Expiry is tracked in a min-heap ordered by
+    ``expires_at`` so sweeping only ever touches sessions that are actually
+    expired, and every ``add`` sweeps first so memory stays bounded by the
+    number of live sessions even without the background sweeper.
+    """
+
+    def __init__(self):
+        self._sessions = {}
+        self._expiry = []
+        self._lock = threading.Lock()
+
+    def add(self, session_id: str, user_id: int, ttl: float) -> None:
+        now = time.time()
+        expires_at = now + ttl
+        with self._lock:
+            self._sweep_locked(now)
+            self._sessions[session_id] = (user_id, expires_at)
+            heapq.heappush(self._expiry, (expires_at, session_id))
+
+    def get(self, session_id: str) -> Optional[int]:
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        user_id, expires_at = entry
+        if expires_at <= time.time():
+            self.remove(session_id)
+            return None
+        return user_id
+
+    def remove(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def sweep(self) -> int:
+        with self._lock:
+            return self._sweep_locked(time.time())
+
+    def _sweep_locked(self, now: float) -> int:
+        removed = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, session_id = heapq.heappop(self._expiry)
+            entry = self._sessions.get(session_id)
+            # Skip heap entries whose session was removed or re-added later
+            if entry is not None and entry[1] == expires_at:
+                del self._sessions[session_id]
+                removed += 1
+        return removed
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Store backed by a SQLite file so every worker on the host shares sessions.
+
+    ``session_id`` is the primary key and ``expires_at`` is indexed, so lookups
+    and sweeps are both index operations.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, "
+                "user_id INTEGER NOT NULL, "
+                "expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_sessions_expires_at ON sessions (expires_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, session_id: str, user_id: int, ttl: float) -> None:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO sessions (session_id, user_id, expires_at) VALUES (?, ?, ?)",
+            (session_id, user_id, time.time() + ttl),
+        )
+
+    def get(self, session_id: str) -> Optional[int]:
+        row = self._conn().execute(
+            "SELECT user_id FROM sessions WHERE session_id = ? AND expires_at > ?",
+            (session_id, time.time()),
+        ).fetchone()
+        return row[0] if row else None
+
+    def remove(self, session_id: str) -> None:
+        self._conn().execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def sweep(self) -> int:
+        cursor = self._conn().execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),))
+        return cursor.rowcount
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class RedisSessionStore(SessionStore):
+    """Store backed by Redis; keys expire server-side so no sweeping is needed."""
+
+    def __init__(self, url: str, prefix: str = "session:"):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def add(self, session_id: str, user_id: int, ttl: float) -> None:
+        self._client.set(self._prefix + session_id, user_id, ex=max(1, int(ttl)))
+
+    def get(self, session_id: str) -> Optional[int]:
+        value = self._client.get(self._prefix + session_id)
+        return int(value) if value is not None else None
+
+    def remove(self, session_id: str) -> None:
+        self._client.delete(self._prefix + session_id)
+
+    def close(self) -> None:
+        self._client.close()
+
+
+def create_session_store(backend: str = config.SESSION_BACKEND) -> SessionStore:
+    if backend == "memory":
+        return MemorySessionStore()
+    if backend == "sqlite":
+        return SQLiteSessionStore(config.SESSION_SQLITE_PATH)
+    if backend == "redis":
+        return RedisSessionStore(config.SESSION_REDIS_URL)
+    raise ValueError(f"Unknown session backend: {backend}")
+
+
+class SessionSweeper(threading.Thread):
+    """Daemon thread that periodically removes expired sessions from a store."""
+
+    def __init__(self, store: SessionStore, interval: float = config.SESSION_SWEEP_INTERVAL):
+        super().__init__(name="session-sweeper", daemon=True)
+        self.store = store
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                removed = self.store.sweep()
+                if removed:
+                    logger.debug("Swept %d expired sessions", removed)
+            except Exception:
+                logger.exception("Session sweep failed")
+
+    def stop(self):
+        self._stopped.set()
@@ -0,0 +1,137 @@
+"""Worker boot and readiness.
+
+Booting checks that the schema is current and then warms the worker up: it
+opens pool connections and loads the reference caches. It does not migrate
+(unless ``SMARTFIT_MIGRATE_ON_STARTUP`` is set); run ``python manage.py migrate``
+once per deploy. A worker whose database is unreachable or behind on
+migrations still starts and answers ``/health/live``. ``/health/ready`` stays
+503 until a later probe finds the schema current and finishes the boot.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.pool import QueuePool
+
+import config
+import credentials
+from catalog import exercise_catalog
+from db import async_engine, engine, has_replica, read_engine
+from knowledge import knowledge_base
+from migrations import pending_migrations, run_migrations
+
+logger = logging.getLogger(__name__)
+
+# Roughly process start: app.py imports this module first thing
+_imported_at = time.perf_counter()
+
+
+class StartupState:
+    def __init__(self):
+        self.ready = False
+        self.reason: Optional[str] = "starting"
+        # Milliseconds per boot step, plus "total" once ready
+        self.timings: Dict[str, float] = {}
+        self._lock = asyncio.Lock()
+
+
+state = StartupState()
+
+
+def _warm_connections(pool) -> int:
+    size = pool.size() if isinstance(pool, QueuePool) else 1
+    return min(config.DB_POOL_WARM_CONNECTIONS, size)
+
+
+def warm_pool(sync_engine):
+    """Open the pool's connections now instead of on the first requests."""
+    held = []
+    try:
+        for _ in range(_warm_connections(sync_engine.pool)):
+            conn = sync_engine.connect()
+            held.append(conn)
+            conn.exec_driver_sql("SELECT 1")
+    finally:
+        for conn in held:
+            conn.close()
+
+
+async def warm_async_pool(engine_):
+    held = []
+    try:
+        for _ in range(_warm_connections(engine_.sync_engine.pool)):
+            conn = await engine_.connect()
+            held.append(conn)
+            await conn.exec_driver_sql("SELECT 1")
+    finally:
+        for conn in held:
+            await conn.close()
+
+
+def ping_database():
+    with engine.connect() as conn:
+        conn.exec_driver_sql("SELECT 1")
+
+
+async def _step(name: str, func, *args):
+    start = time.perf_counter()
+    if asyncio.iscoroutinefunction(func):
+        result = await func(*args)
+    else:
+        result = await run_in_threadpool(func, *args)
+    state.timings[name] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+
+async def boot() -> bool:
+    """Bring this worker to ready. Safe to call again after it returned False."""
+    async with state._lock:
+        if state.ready:
+            return True
+        try:
+            if config.MIGRATE_ON_STARTUP:
+                ran = await _step("migrations", run_migrations, engine)
+                if ran:
+                    logger.info("Applied migrations %s", ran)
+            pending = await _step("schema check", pending_migrations, engine)
+            if pending:
+                state.reason = "migrations pending: " + ", ".join(str(migration.version) for migration in pending)
+                logger.warning("Not ready: %s. Run `python manage.py migrate`.", state.reason)
+                return False
+            await _step("connection pool", warm_pool, engine)
+            if has_replica():
+                await _step("replica pool", warm_pool, read_engine)
+            if async_engine is not None:
+                await _step("async pool", warm_async_pool, async_engine)
+            await _step("exercise catalog", exercise_catalog.load)
+            await _step("knowledge base", knowledge_base.load)
+            # Worker processes take a second or more to spawn; readiness doesn't wait for them
+            await _step("password hashing", credentials.warm_up, False)
+        except Exception as e:
+            state.reason = f"startup failed: {type(e).__name__}"
+            logger.exception("Worker boot failed; not ready")
+            return False
+
+        state.ready = True
+        state.reason = None
+        state.timings["total"] = round((time.perf_counter() - _imported_at) * 1000, 1)
+        logger.info(
+            "Ready in %.0f ms (%s)", state.timings["total"],
+            ", ".join(f"{name} {ms:.0f} ms" for name, ms in state.timings.items() if name != "total")
+        )
+        return True
+
+
+async def check_ready() -> bool:
+    if not state.ready and not await boot():
+        return False
+    try:
+        await run_in_threadpool(ping_database)
+    except Exception as e:
+        state.reason = f"database unreachable: {type(e).__name__}"
+        logger.warning("Not ready: %s", state.reason)
+        return False
+    state.reason = None
+    return True
@@ -0,0 +1,57 @@
+import os
+import sys
+import tempfile
+import uuid
+
+# Configuration is read at import time, so point it at a scratch database
+# (and scratch index directories) before anything from the app is imported.
+_scratch = tempfile.mkdtemp(prefix="smartfit-tests-")
+os.environ.setdefault("SMARTFIT_DATABASE_URL", f"sqlite:///{os.path.join(_scratch, 'test.db')}")
+os.environ.setdefault("SMARTFIT_MIGRATE_ON_STARTUP", "1")
+os.environ.setdefault("SMARTFIT_RATE_LIMIT_ENABLED", "0")
+os.environ.setdefault("SMARTFIT_PASSWORD_SCRYPT_N", "16")
+os.environ.setdefault("SMARTFIT_KNOWLEDGE_DIR", os.path.join(_scratch, "knowledge"))
+os.environ.setdefault("SMARTFIT_VECTOR_INDEX_DIR", os.path.join(_scratch, "vector_index"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app import app
+
+    # Runs the startup handlers (migrations included) once for the whole run
+    with TestClient(app):
+        yield app
+
+
+@pytest.fixture
+def db(app):
+    from db import SessionLocal
+
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def client(app):
+    """A client logged in as a new user of its own."""
+    client = TestClient(app)
+    email = f"{uuid.uuid4().hex}@example.com"
+    client.post("/auth/register", json={"name": "Test", "email": email, "password": "password"}).raise_for_status()
+    response = client.post("/auth/login", json={"email": email, "password": "password"})
+    response.raise_for_status()
+    # The cookie is marked Secure, so it isn't sent back over http on its own
+    client.cookies.set("session_id", response.cookies["session_id"])
+    client.email = email
+    return client
+
+
+@pytest.fixture
+def user_id(client, db):
+    from models import User
+
+    return db.query(User.id).filter(User.email == client.email).scalar()
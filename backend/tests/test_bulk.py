@@ -0,0 +1,9 @@
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.mark.parametrize("path", ["/workouts/progress/bulk", "/nutrition/logs/bulk"])
+def test_anonymous_bulk_writes_are_refused_before_the_body_is_read(app, path):
+    response = TestClient(app).post(path, content=b"[{not json", headers={"Content-Type": "application/json"})
+
+    assert response.status_code == 401
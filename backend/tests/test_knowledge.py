@@ -0,0 +1,83 @@
+import pytest
+
+from knowledge import Document, KnowledgeBase, chunk_text, content_hash
+from vector_index import HashingEmbedder
+
+
+class CountingEmbedder(HashingEmbedder):
+    def __init__(self, dim: int = 64):
+        super().__init__(dim)
+        self.calls = []
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        return super().embed(texts)
+
+
+@pytest.fixture
+def documents():
+    return {
+        "file:squat.md": Document("file:squat.md", "knowledge", "squat", "Brace and sit between the hips."),
+        "file:deadlift.md": Document("file:deadlift.md", "knowledge", "deadlift", "Keep the bar close to the shins."),
+    }
+
+
+@pytest.fixture
+def knowledge(app, tmp_path, monkeypatch, documents):
+    knowledge = KnowledgeBase(str(tmp_path), CountingEmbedder())
+    monkeypatch.setattr(
+        knowledge, "_documents",
+        lambda scope: [doc for doc_id, doc in documents.items() if scope is None or doc_id in scope]
+    )
+    return knowledge
+
+
+def test_a_repeat_sync_embeds_nothing(knowledge):
+    assert knowledge.sync() == {"added": 2, "embedded": 2, "removed": 0}
+    assert knowledge.sync() == {"added": 0, "embedded": 0, "removed": 0}
+
+
+def test_an_edit_embeds_only_the_changed_chunk(knowledge, documents):
+    knowledge.sync()
+    documents["file:squat.md"] = Document("file:squat.md", "knowledge", "squat", "Brace, then sit between the hips.")
+
+    assert knowledge.sync() == {"added": 1, "embedded": 1, "removed": 1}
+    assert knowledge.embedder.calls[-1] == ["Brace, then sit between the hips."]
+    assert knowledge.search("brace then sit", k=1)[0]["id"] == "file:squat.md#0"
+
+
+def test_identical_content_reuses_the_indexed_vector(knowledge, documents):
+    knowledge.sync()
+    documents["file:copy.md"] = Document("file:copy.md", "knowledge", "copy", "Keep the bar close to the shins.")
+
+    assert knowledge.sync() == {"added": 1, "embedded": 0, "removed": 0}
+
+
+def test_removed_documents_are_tombstoned_and_survive_a_reload(knowledge, documents):
+    knowledge.sync()
+    del documents["file:deadlift.md"]
+
+    assert knowledge.sync(["file:deadlift.md"]) == {"added": 0, "embedded": 0, "removed": 1}
+    reloaded = KnowledgeBase(knowledge.directory, CountingEmbedder())._load_saved()
+    assert set(reloaded.rows()) == {"file:squat.md#0"}
+    assert set(reloaded.meta["chunks"]) == {"file:squat.md#0"}
+
+
+def test_a_different_model_re_embeds_everything(knowledge, documents):
+    knowledge.sync()
+    other = KnowledgeBase(knowledge.directory, CountingEmbedder(dim=32))
+    other._documents = knowledge._documents
+
+    assert other.sync() == {"added": 2, "embedded": 2, "removed": 0}
+
+
+def test_chunk_text_packs_paragraphs_up_to_the_limit():
+    text = "one two\n\nthree four\n\n" + " ".join(f"w{i}" for i in range(7))
+
+    assert chunk_text(text, max_tokens=4) == ["one two\n\nthree four", "w0 w1 w2 w3", "w4 w5 w6"]
+    assert chunk_text("  \n\n  ", max_tokens=4) == []
+
+
+def test_content_hash_depends_on_the_model():
+    assert content_hash("squat", "a/64") == content_hash("squat", "a/64")
+    assert content_hash("squat", "a/64") != content_hash("squat", "a/32")
@@ -0,0 +1,58 @@
+import asyncio
+from types import SimpleNamespace
+
+import config
+from metrics import RequestMetricsMiddleware, metrics
+
+
+def test_streamed_export_is_charged_for_its_queries(client, monkeypatch):
+    # Collect each request's own statements (the slow log's list) without ever logging
+    monkeypatch.setattr(config, "SLOW_REQUEST_MS", 10 ** 9)
+    finished = []
+    end_request = metrics.end_request
+
+    def record(method, route, status, current, token):
+        # A snapshot: statements that run after this point are never charged to the route
+        finished.append((route, list(current.sql), current.statements))
+        return end_request(method, route, status, current, token)
+
+    monkeypatch.setattr(metrics, "end_request", record)
+
+    response = client.get("/export/progress")
+
+    assert response.status_code == 200
+    [(route, sql, statements)] = finished
+    assert route == "/export/progress"
+    # The rows are read while the body streams, after the handler has returned
+    assert any("FROM workout_progress" in statement for _, statement in sql)
+    assert statements == len(sql)
+
+
+def test_statements_between_headers_and_the_last_chunk_are_charged():
+    async def streaming_app(scope, receive, send):
+        scope["route"] = SimpleNamespace(path="/test/streamed")
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        for more_body in (True, False):
+            metrics.record_statement(0.001, "SELECT next batch")
+            await send({"type": "http.response.body", "body": b"rows", "more_body": more_body})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/test/streamed", "headers": []}
+    asyncio.run(RequestMetricsMiddleware(streaming_app)(scope, None, send))
+
+    assert metrics.request_statements[("GET", "/test/streamed")] == 2
+    assert metrics.requests[("GET", "/test/streamed", 200)] == 1
+    assert [name for name, _ in sent[0]["headers"]] == ([b"server-timing"] if config.SERVER_TIMING_ENABLED else [])
+
+
+def test_server_timing_covers_the_handlers_queries(client):
+    response = client.get("/nutrition/logs")
+
+    assert response.status_code == 200
+    timing = response.headers["Server-Timing"]
+    assert timing.startswith("db;dur=") and "total;dur=" in timing
+    assert '"0 statements"' not in timing
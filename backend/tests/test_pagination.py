@@ -0,0 +1,85 @@
+from datetime import date, datetime
+
+import pytest
+from fastapi import HTTPException
+
+from models import NutritionalLogs
+from pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+
+ORDER = [NutritionalLogs.date, NutritionalLogs.id]
+
+
+def test_cursor_round_trips_dates_and_ids():
+    cursor = encode_cursor([date(2024, 2, 29), 17])
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, ORDER) == (date(2024, 2, 29), 17)
+
+
+def test_cursor_round_trips_datetimes_and_nulls():
+    columns = [NutritionalLogs.date, NutritionalLogs.meal_type, NutritionalLogs.id]
+    values = (date(2024, 1, 1), None, 3)
+
+    assert decode_cursor(encode_cursor(values), columns) == values
+    assert encode_cursor([datetime(2024, 1, 1, 12, 30)]) == encode_cursor(["2024-01-01T12:30:00"])
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    encode_cursor([1]),
+    encode_cursor(["2024-01-01", 1, 2]),
+    encode_cursor(["yesterday", 1]),
+])
+def test_bad_cursors_are_a_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, ORDER)
+    assert error.value.status_code == 400
+
+
+def log(client, day: str, food: str) -> int:
+    response = client.post("/nutrition/logs", json={"date": day, "food_name": food})
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+def walk(client, limit: int) -> list:
+    """Every page of /nutrition/logs, following X-Next-Cursor."""
+    pages, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/nutrition/logs", params=params)
+        response.raise_for_status()
+        pages.append([entry["id"] for entry in response.json()])
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return pages
+
+
+def test_pages_break_ties_on_id(client):
+    # Five entries on one day: only the id orders them, and a page boundary falls inside the day
+    same_day = [log(client, "2024-03-01", f"meal {n}") for n in range(5)]
+    earlier = log(client, "2024-02-01", "earlier")
+    later = log(client, "2024-04-01", "later")
+
+    pages = walk(client, limit=2)
+
+    assert [entry for page in pages for entry in page] == [later, *sorted(same_day, reverse=True), earlier]
+    assert [len(page) for page in pages] == [2, 2, 2, 1]
+
+
+def test_a_full_last_page_ends_with_an_empty_one(client):
+    for n in range(4):
+        log(client, "2024-03-01", f"meal {n}")
+
+    assert [len(page) for page in walk(client, limit=2)] == [2, 2, 0]
+
+
+def test_rows_added_ahead_of_the_cursor_are_not_repeated(client):
+    ids = [log(client, "2024-03-01", f"meal {n}") for n in range(4)]
+    first = client.get("/nutrition/logs", params={"limit": 2})
+    cursor = first.headers[NEXT_CURSOR_HEADER]
+
+    log(client, "2024-05-01", "newer than the first page")
+    second = client.get("/nutrition/logs", params={"limit": 2, "cursor": cursor}).json()
+
+    assert [entry["id"] for entry in first.json()] + [entry["id"] for entry in second] == sorted(ids, reverse=True)
@@ -0,0 +1,41 @@
+from models import WorkoutPlans
+from routes.workouts import cache_plan_detail, get_cached_plan_detail, plan_detail_versions
+from versions import bump_table_version, table_versions
+
+
+def create_plan(client, name: str) -> int:
+    response = client.post("/workouts/plans", json={"plan_name": name})
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+def rename_elsewhere(db, plan_id: int, name: str):
+    """Rename a plan the way another worker would: this process's caches are left alone."""
+    db.query(WorkoutPlans).filter(WorkoutPlans.id == plan_id).update({WorkoutPlans.plan_name: name})
+    bump_table_version(db, "workout_plans")
+    db.commit()
+    # Stands in for TABLE_VERSION_CHECK_INTERVAL running out
+    table_versions.expire("workout_plans")
+
+
+def test_detail_follows_a_write_from_another_worker(client, db):
+    plan_id = create_plan(client, "Push day")
+    assert client.get(f"/workouts/plans/{plan_id}/detail").json()["plan_name"] == "Push day"
+
+    rename_elsewhere(db, plan_id, "Pull day")
+
+    assert client.get(f"/workouts/plans/{plan_id}").json()["plan_name"] == "Pull day"
+    assert client.get(f"/workouts/plans/{plan_id}/detail").json()["plan_name"] == "Pull day"
+
+
+def test_a_view_loaded_before_a_write_is_not_served_after_it(client, db):
+    plan_id = create_plan(client, "Leg day")
+    versions = plan_detail_versions()
+    detail = client.get(f"/workouts/plans/{plan_id}/detail").json()
+
+    rename_elsewhere(db, plan_id, "Legs and core")
+    # A slow read that started before the write stores its copy afterwards
+    cache_plan_detail(plan_id, versions, detail)
+
+    assert get_cached_plan_detail(plan_id, plan_detail_versions()) is None
+    assert client.get(f"/workouts/plans/{plan_id}/detail").json()["plan_name"] == "Legs and core"
@@ -0,0 +1,132 @@
+import pytest
+
+import ratelimit
+from ratelimit import MemoryRateLimiter, RateLimiter, SQLiteRateLimiter, retry_after_header
+
+
+class Clock:
+    """Stands in for the time module; both clocks advance together."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def limiter(request, tmp_path, clock):
+    # 2 tokens a second, bursts of 5
+    if request.param == "memory":
+        limiter = MemoryRateLimiter(rate=2.0, burst=5.0)
+    else:
+        limiter = SQLiteRateLimiter(str(tmp_path / "ratelimit.db"), rate=2.0, burst=5.0)
+    yield limiter
+    limiter.close()
+
+
+def test_a_full_bucket_allows_the_burst(limiter):
+    assert [limiter.acquire("a") for _ in range(5)] == [0.0] * 5
+    # Out of tokens: the next one arrives in 1 / rate seconds
+    assert limiter.acquire("a") == pytest.approx(0.5)
+
+
+def test_refused_requests_take_no_tokens(limiter):
+    for _ in range(5):
+        limiter.acquire("a")
+
+    assert limiter.acquire("a") == pytest.approx(0.5)
+    assert limiter.acquire("a") == pytest.approx(0.5)
+
+
+def test_tokens_refill_at_the_rate(limiter, clock):
+    for _ in range(5):
+        limiter.acquire("a")
+
+    clock.advance(0.25)
+    assert limiter.acquire("a") == pytest.approx(0.25)
+    clock.advance(0.25)
+    assert limiter.acquire("a") == 0.0
+    assert limiter.acquire("a") == pytest.approx(0.5)
+
+
+def test_refill_stops_at_the_burst(limiter, clock):
+    limiter.acquire("a")
+    clock.advance(3600)
+
+    assert [limiter.acquire("a") for _ in range(5)] == [0.0] * 5
+    assert limiter.acquire("a") > 0
+
+
+def test_keys_have_separate_buckets(limiter):
+    for _ in range(5):
+        limiter.acquire("a")
+
+    assert limiter.acquire("a") > 0
+    assert limiter.acquire("b") == 0.0
+
+
+def test_a_large_cost_waits_for_the_shortfall(limiter):
+    assert limiter.acquire("a", cost=4) == 0.0
+    assert limiter.acquire("a", cost=3) == pytest.approx(1.0)
+
+
+def test_memory_limiter_forgets_the_least_recently_seen_keys(clock):
+    limiter = MemoryRateLimiter(rate=1.0, burst=1.0, max_keys=2)
+    limiter.acquire("a")
+    limiter.acquire("b")
+    limiter.acquire("a")
+    limiter.acquire("c")  # evicts b
+
+    assert len(limiter) == 2
+    assert limiter.acquire("a") > 0
+    assert limiter.acquire("b") == 0.0
+
+
+def test_sqlite_limiters_share_buckets(tmp_path, clock):
+    path = str(tmp_path / "ratelimit.db")
+    first, second = SQLiteRateLimiter(path, rate=1.0, burst=2.0), SQLiteRateLimiter(path, rate=1.0, burst=2.0)
+
+    first.acquire("a")
+    second.acquire("a")
+
+    assert first.acquire("a") == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("wait, header", [(0.01, "1"), (1.0, "1"), (1.2, "2"), (59.5, "60")])
+def test_retry_after_rounds_up_to_whole_seconds(wait, header):
+    assert retry_after_header(wait) == header
+
+
+def test_the_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        RateLimiter(1.0, 1.0)
+
+
+def test_middleware_answers_429_with_retry_after(app, client, monkeypatch):
+    import app as app_module
+
+    monkeypatch.setattr(app_module, "rate_limiter", MemoryRateLimiter(rate=0.5, burst=2.0))
+    entry = {"date": "2024-01-01", "food_name": "oats"}
+
+    statuses = [client.post("/nutrition/logs", json=entry).status_code for _ in range(3)]
+    refused = client.post("/nutrition/logs", json=entry)
+
+    assert statuses == [200, 200, 429]
+    assert refused.status_code == 429
+    assert refused.headers["Retry-After"] == "2"
+    # Reads aren't limited
+    assert client.get("/nutrition/logs").status_code == 200
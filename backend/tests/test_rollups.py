@@ -0,0 +1,186 @@
+import uuid
+from datetime import date, timedelta
+
+import pytest
+
+from models import NutritionalLogs, NutritionDailyTotals, WorkoutProgressDailyTotals
+from rollups import apply_nutrition_logs, rebuild_nutrition_totals, rebuild_workout_progress_totals, week_start
+
+MONDAY = date(2024, 1, 1)
+TUESDAY = date(2024, 1, 2)
+
+
+def log(client, day: date, calories: int, protein: float = 10.0) -> int:
+    response = client.post("/nutrition/logs", json={
+        "date": day.isoformat(), "food_name": "oats", "calories": calories, "protein": protein,
+    })
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+def nutrition_totals(db, user_id: int) -> dict:
+    db.expire_all()
+    rows = db.query(NutritionDailyTotals).filter(NutritionDailyTotals.user_id == user_id)
+    return {row.date: (row.entries, row.calories, row.protein) for row in rows}
+
+
+def rebuilt_nutrition_totals(db, user_id: int) -> dict:
+    rebuild_nutrition_totals(db, user_id)
+    totals = nutrition_totals(db, user_id)
+    db.rollback()
+    return totals
+
+
+def test_create_adds_to_the_day(client, db, user_id):
+    log(client, MONDAY, 300)
+    log(client, MONDAY, 200, protein=5.0)
+
+    assert nutrition_totals(db, user_id) == {MONDAY: (2, 500, 15.0)}
+
+
+def test_update_moves_the_entry_between_days(client, db, user_id):
+    first = log(client, MONDAY, 300)
+    log(client, MONDAY, 200)
+
+    client.put(f"/nutrition/logs/{first}", json={"date": TUESDAY.isoformat(), "calories": 400}).raise_for_status()
+
+    totals = nutrition_totals(db, user_id)
+    assert totals == {MONDAY: (1, 200, 10.0), TUESDAY: (1, 400, 10.0)}
+    assert totals == rebuilt_nutrition_totals(db, user_id)
+
+
+def test_update_within_a_day_keeps_the_entry_count(client, db, user_id):
+    entry = log(client, MONDAY, 300)
+
+    client.put(f"/nutrition/logs/{entry}", json={"calories": 350}).raise_for_status()
+
+    assert nutrition_totals(db, user_id) == {MONDAY: (1, 350, 10.0)}
+
+
+def test_deleting_the_last_entry_drops_the_day(client, db, user_id):
+    first = log(client, MONDAY, 300)
+    second = log(client, MONDAY, 200)
+
+    client.delete(f"/nutrition/logs/{first}").raise_for_status()
+    assert nutrition_totals(db, user_id) == {MONDAY: (1, 200, 10.0)}
+
+    client.delete(f"/nutrition/logs/{second}").raise_for_status()
+    assert nutrition_totals(db, user_id) == {}
+
+
+def test_range_delete_clears_only_the_range(client, db, user_id):
+    log(client, MONDAY, 300)
+    log(client, TUESDAY, 200)
+
+    client.delete(f"/nutrition/logs/date/{MONDAY.isoformat()}").raise_for_status()
+
+    assert nutrition_totals(db, user_id) == {TUESDAY: (1, 200, 10.0)}
+
+
+def test_summary_reads_the_rollup(client):
+    log(client, MONDAY, 300)
+    log(client, TUESDAY, 100)
+
+    summary = client.get("/nutrition/summary", params={"start_date": MONDAY.isoformat(), "end_date": TUESDAY.isoformat()}).json()
+
+    assert summary["total_entries"] == 2
+    assert summary["total_calories"] == 400
+    assert summary["daily_average_calories"] == 200
+
+
+def test_subtracting_and_re_adding_is_a_no_op(client, db, user_id):
+    log(client, MONDAY, 300)
+    logs = db.query(NutritionalLogs).filter(NutritionalLogs.user_id == user_id).all()
+
+    apply_nutrition_logs(db, user_id, logs, sign=-1)
+    apply_nutrition_logs(db, user_id, logs)
+    db.commit()
+
+    assert nutrition_totals(db, user_id) == {MONDAY: (1, 300, 10.0)}
+
+
+@pytest.fixture
+def exercise_and_plan(client):
+    exercise = client.post("/workouts/exercises", json={"exercise_name": f"squat {uuid.uuid4().hex}"}).json()["id"]
+    plan = client.post("/workouts/plans", json={"plan_name": "legs"}).json()["id"]
+    return exercise, plan
+
+
+def lift(client, exercise_and_plan, day: date, sets: int, reps: int, weights: int) -> int:
+    exercise, plan = exercise_and_plan
+    response = client.post("/workouts/progress", json={
+        "workout_id": plan, "exercise_id": exercise, "date": day.isoformat(),
+        "sets": sets, "reps": reps, "weights": weights,
+    })
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+def progress_totals(db, user_id: int) -> dict:
+    db.expire_all()
+    rows = db.query(WorkoutProgressDailyTotals).filter(WorkoutProgressDailyTotals.user_id == user_id)
+    return {row.date: (row.entries, row.sets, row.volume, row.max_weight, row.week_start) for row in rows}
+
+
+def rebuilt_progress_totals(db, user_id: int) -> dict:
+    rebuild_workout_progress_totals(db, user_id)
+    totals = progress_totals(db, user_id)
+    db.rollback()
+    return totals
+
+
+def test_progress_create_accumulates_the_day(client, db, user_id, exercise_and_plan):
+    lift(client, exercise_and_plan, MONDAY, 3, 5, 100)
+    lift(client, exercise_and_plan, MONDAY, 2, 5, 120)
+
+    assert progress_totals(db, user_id) == {MONDAY: (2, 5, 1500 + 1200, 120, MONDAY)}
+
+
+def test_progress_update_recomputes_both_days(client, db, user_id, exercise_and_plan):
+    lift(client, exercise_and_plan, MONDAY, 3, 5, 100)
+    heaviest = lift(client, exercise_and_plan, MONDAY, 1, 1, 140)
+    exercise, plan = exercise_and_plan
+
+    client.put(f"/workouts/progress/{heaviest}", json={
+        "workout_id": plan, "exercise_id": exercise, "date": TUESDAY.isoformat(), "sets": 1, "reps": 2, "weights": 130,
+    }).raise_for_status()
+
+    totals = progress_totals(db, user_id)
+    # The day's maximum can't be decremented; it is recomputed from what is left
+    assert totals == {MONDAY: (1, 3, 1500, 100, MONDAY), TUESDAY: (1, 1, 260, 130, MONDAY)}
+    assert totals == rebuilt_progress_totals(db, user_id)
+
+
+def test_progress_delete_drops_empty_days(client, db, user_id, exercise_and_plan):
+    light = lift(client, exercise_and_plan, MONDAY, 3, 5, 100)
+    heavy = lift(client, exercise_and_plan, MONDAY, 1, 1, 140)
+
+    client.delete(f"/workouts/progress/{heavy}").raise_for_status()
+    assert progress_totals(db, user_id) == {MONDAY: (1, 3, 1500, 100, MONDAY)}
+
+    client.delete(f"/workouts/progress/{light}").raise_for_status()
+    assert progress_totals(db, user_id) == {}
+
+
+def test_rebuild_computes_week_start_in_sql(client, db, user_id, exercise_and_plan):
+    days = [date(2024, 1, 6) + timedelta(days=n) for n in range(3)]  # Saturday to Monday
+    for day in days:
+        lift(client, exercise_and_plan, day, 1, 1, 50)
+
+    totals = rebuilt_progress_totals(db, user_id)
+
+    assert {day: row[4] for day, row in totals.items()} == {day: week_start(day) for day in days}
+    assert totals == progress_totals(db, user_id)
+
+
+def test_stats_report_the_personal_record(client, exercise_and_plan):
+    lift(client, exercise_and_plan, MONDAY, 3, 5, 100)
+    lift(client, exercise_and_plan, TUESDAY, 1, 1, 140)
+    lift(client, exercise_and_plan, date(2024, 1, 9), 1, 1, 140)
+
+    [stats] = client.get("/workouts/progress/stats").json()["exercises"]
+
+    assert stats["entries"] == 3
+    assert stats["total_volume"] == 1500 + 140 + 140
+    assert stats["personal_record"] == {"weight": 140, "date": TUESDAY.isoformat()}
+    assert [week["volume"] for week in stats["weekly"]] == [1640, 140]
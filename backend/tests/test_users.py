@@ -0,0 +1,7 @@
+def test_user_lookup_never_returns_the_password_hash(client, user_id):
+    response = client.get(f"/auth/user/{user_id}")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["id"] == user_id and body["email"] == client.email
+    assert "password" not in body
@@ -0,0 +1,198 @@
+import os
+
+import numpy as np
+import pytest
+
+from vector_index import HashingEmbedder, VectorIndex
+
+
+def clustered(n: int = 2000, dim: int = 32, clusters: int = 20, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    return centers[rng.integers(clusters, size=n)] + 0.3 * rng.normal(size=(n, dim))
+
+
+def ids_for(n: int, prefix: str = "doc") -> list:
+    return [f"{prefix}{i}" for i in range(n)]
+
+
+def brute_force(vectors: np.ndarray, ids: list, query: np.ndarray, k: int) -> list:
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = vectors @ (query / np.linalg.norm(query))
+    return [ids[i] for i in np.argsort(-scores)[:k]]
+
+
+def hit_ids(results) -> list:
+    return [doc_id for doc_id, _ in results]
+
+
+def test_exact_search_matches_brute_force():
+    vectors = clustered(500)
+    index = VectorIndex.build(vectors, ids_for(500))
+    queries = clustered(10, seed=1)
+
+    for query, results in zip(queries, index.search(queries, k=5)):
+        assert hit_ids(results) == brute_force(vectors, ids_for(500), query, 5)
+        scores = [score for _, score in results]
+        assert scores == sorted(scores, reverse=True)
+
+
+def test_k_larger_than_the_index_returns_everything():
+    index = VectorIndex.build(clustered(3), ids_for(3))
+
+    assert sorted(hit_ids(index.search(clustered(1, seed=1), k=10)[0])) == ids_for(3)
+    assert VectorIndex.empty(32).search(clustered(1), k=3) == [[]]
+
+
+def test_tombstoned_rows_are_never_returned():
+    vectors = clustered(200)
+    index = VectorIndex.build(vectors, ids_for(200))
+    query = vectors[7]
+    assert hit_ids(index.search(query, k=1)[0]) == ["doc7"]
+
+    index.remove([7])
+
+    assert "doc7" not in hit_ids(index.search(query, k=200)[0])
+    assert len(index) == 199
+    assert "doc7" not in index.rows()
+
+
+def test_compaction_keeps_results_and_renumbers_rows():
+    vectors = clustered(300)
+    index = VectorIndex.build(vectors, ids_for(300))
+    index.remove(range(0, 300, 2))
+    queries = clustered(5, seed=2)
+    before = index.search(queries, k=10)
+
+    index.compact()
+
+    assert len(index.ids) == len(index) == 150
+    assert index.rows() == {doc_id: row for row, doc_id in enumerate(index.ids)}
+    assert [hit_ids(r) for r in index.search(queries, k=10)] == [hit_ids(r) for r in before]
+
+
+def test_maintain_compacts_past_the_dead_fraction():
+    index = VectorIndex.build(clustered(100), ids_for(100))
+    index.remove(range(20))
+    assert not index.maintain(ivf_min_size=10000)
+
+    index.remove(range(20, 30))
+    assert index.maintain(ivf_min_size=10000)
+    assert len(index.ids) == 70
+
+
+def test_ivf_recall_against_exact_search():
+    vectors = clustered(4000)
+    ids = ids_for(4000)
+    exact = VectorIndex.build(vectors, ids)
+    ivf = VectorIndex.build(vectors, ids)
+    ivf.train_ivf(nlist=40)
+    queries = clustered(50, seed=3)
+
+    truth = exact.search(queries, k=10)
+    approx = ivf.search(queries, k=10, nprobe=8)
+    recall = np.mean([len(set(hit_ids(a)) & set(hit_ids(t))) / 10 for a, t in zip(approx, truth)])
+
+    assert recall >= 0.95
+    # Probing every cluster is exact
+    assert [hit_ids(r) for r in ivf.search(queries, k=10, nprobe=40)] == [hit_ids(r) for r in truth]
+
+
+def test_rows_added_after_training_are_searched():
+    vectors = clustered(1000)
+    index = VectorIndex.build(vectors, ids_for(1000))
+    index.train_ivf(nlist=10)
+    extra = clustered(5, seed=4)
+
+    index.add(extra, ids_for(5, "new"))
+
+    for i, vector in enumerate(extra):
+        assert hit_ids(index.search(vector, k=1, nprobe=1)[0]) == [f"new{i}"]
+
+
+def test_maintain_trains_ivf_once_large_enough():
+    index = VectorIndex.build(clustered(400), ids_for(400))
+
+    assert index.maintain(ivf_min_size=300, ivf_lists=8)
+    assert index.centroids is not None and len(index.centroids) == 8
+    assert index.offsets[-1] == 400
+    assert not index.maintain(ivf_min_size=300, ivf_lists=8)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = VectorIndex.build(clustered(500), ids_for(500))
+    index.train_ivf(nlist=10)
+    index.remove([3, 4])
+    index.meta = {"model": "test"}
+    queries = clustered(5, seed=5)
+    expected = index.search(queries, k=5)
+
+    index.save(str(tmp_path))
+    loaded = VectorIndex.load(str(tmp_path))
+
+    assert loaded.ids == index.ids
+    assert loaded.meta == {"model": "test"}
+    assert len(loaded) == 498
+    assert [hit_ids(r) for r in loaded.search(queries, k=5)] == [hit_ids(r) for r in expected]
+
+
+def test_appends_to_a_saved_index_survive_a_reload(tmp_path):
+    index = VectorIndex.build(clustered(50), ids_for(50))
+    index.save(str(tmp_path))
+    extra = clustered(3, seed=6)
+
+    index.add(extra, ids_for(3, "new"))
+    index.remove([0])
+    index.write_manifest()
+    loaded = VectorIndex.load(str(tmp_path))
+
+    assert len(loaded) == 52
+    assert hit_ids(loaded.search(extra[1], k=1)[0]) == ["new1"]
+    assert "doc0" not in loaded.rows()
+
+
+def test_an_add_interrupted_before_the_manifest_leaves_no_trace(tmp_path):
+    vectors = clustered(4, seed=7)
+    index = VectorIndex.build(vectors[:2], ["a", "b"])
+    index.save(str(tmp_path))
+    # The rows reach the file, but the worker dies before writing the manifest
+    index.add(vectors[2], ["c"])
+
+    reloaded = VectorIndex.load(str(tmp_path))
+    reloaded.add(vectors[3], ["d"])
+    reloaded.write_manifest()
+    loaded = VectorIndex.load(str(tmp_path))
+
+    assert loaded.ids == ["a", "b", "d"]
+    assert os.path.getsize(tmp_path / "vectors.1.f32") == 3 * loaded.dim * 4
+    assert loaded.search(vectors[3], k=1)[0][0][0] == "d"
+    assert loaded.search(vectors[3], k=1)[0][0][1] == pytest.approx(1.0)
+
+
+def test_resave_switches_generations_through_the_manifest(tmp_path):
+    index = VectorIndex.build(clustered(50), ids_for(50))
+    index.save(str(tmp_path))
+    reader = VectorIndex.load(str(tmp_path))
+
+    index.remove(range(20))
+    index.maintain(ivf_min_size=10, ivf_lists=4)
+    index.save()
+
+    # The old generation's files are gone; a fresh load only ever sees the new one
+    assert sorted(os.listdir(tmp_path)) == ["index.json", "ivf.2.npz", "vectors.2.f32"]
+    loaded = VectorIndex.load(str(tmp_path))
+    assert loaded.generation == 2
+    assert len(loaded) == 30
+    # A reader mapped before the rewrite keeps searching its own generation
+    assert len(reader) == 50
+    assert hit_ids(reader.search(np.asarray(reader.vectors[0]), k=1)[0]) == ["doc0"]
+
+
+def test_hashing_embedder_is_deterministic_and_normalised():
+    embedder = HashingEmbedder(dim=64)
+    first, second = embedder.embed(["Barbell back squat", "barbell back squat!"]), embedder.embed(["Barbell back squat"])
+
+    np.testing.assert_array_equal(first[0], second[0])
+    np.testing.assert_array_equal(first[0], first[1])
+    assert np.linalg.norm(first[0]) == pytest.approx(1.0)
+    assert not embedder.embed([""]).any()
@@ -0,0 +1,29 @@
+import asyncio
+import threading
+
+from versions import TableVersions, bump_table_version, read_table_version
+
+
+def test_get_async_only_leaves_the_event_loop_to_refresh(app):
+    versions = TableVersions(check_interval=60)
+    loop_thread = threading.get_ident()
+    reads = []
+    refresh = versions.get
+    versions.get = lambda name: reads.append(threading.get_ident()) or refresh(name)
+
+    async def read_twice():
+        return [await versions.get_async("exercise"), await versions.get_async("exercise")]
+
+    first, second = asyncio.run(read_twice())
+
+    assert first == second
+    # One refresh, run on a worker thread; the second read is served from the cache
+    assert len(reads) == 1 and reads[0] != loop_thread
+
+
+def test_bump_creates_then_increments_the_counter(db):
+    bump_table_version(db, "bump_test")
+    bump_table_version(db, "bump_test")
+    db.commit()
+
+    assert read_table_version(db, "bump_test") == 2
@@ -0,0 +1,300 @@
+"""In-process vector search.
+
+Embeddings live in one contiguous float32 matrix with L2-normalised rows, so
+cosine similarity is a single matrix product. An index bound to a directory
+keeps the matrix in a raw ``vectors.<generation>.f32`` file opened with
+``np.memmap``: every worker maps the same file and the OS shares the pages
+between them. Adds append rows to that file and deletes only tombstone rows,
+so neither rewrites it; ``maintain`` compacts (and re-clusters) once enough
+has changed. A rewrite goes to files of the next generation, and replacing
+``index.json`` switches readers over in one atomic rename, so a reader never
+pairs one generation's manifest with another's vectors.
+"""
+import hashlib
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+MANIFEST_FILE = "index.json"
+VECTORS_FILE = "vectors.{}.f32"
+IVF_FILE = "ivf.{}.npz"
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class HashingEmbedder:
+    """Deterministic local embedder: signed feature hashing of words and word pairs.
+
+    No model download and the same vector on every machine, which is what
+    tests and offline setups need. Swap in a real model behind ``embed``.
+    """
+
+    name = "hashing-v1"
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    @staticmethod
+    @lru_cache(maxsize=200000)
+    def _slot(token: str) -> Tuple[int, float]:
+        digest = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+        return digest >> 1, 1.0 if digest & 1 else -1.0
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = _TOKEN.findall(text.lower())
+            for token in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                slot, sign = self._slot(token)
+                vectors[row, slot % self.dim] += sign
+        return _normalize(vectors)
+
+
+def _write_atomic(path: str, write):
+    tmp = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+    with open(tmp, "wb") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class VectorIndex:
+    """Top-k cosine search over a float32 matrix, exact or IVF (cluster-pruned).
+
+    Exact search scores every row. ``train_ivf`` groups rows into clusters
+    (spherical k-means) stored as contiguous slices, and searches then only
+    score the ``nprobe`` clusters closest to each query, plus any rows added
+    since training. ``meta`` is caller data saved alongside the ids.
+    """
+
+    def __init__(self, vectors: np.ndarray, ids: Sequence[str], directory: Optional[str] = None):
+        if len(vectors) != len(ids):
+            raise ValueError("vectors and ids differ in length")
+        self.vectors = vectors
+        self.ids = list(ids)
+        self.directory = directory
+        self.alive = np.ones(len(self.ids), dtype=bool)
+        self.centroids: Optional[np.ndarray] = None
+        # Cluster c holds rows offsets[c]:offsets[c + 1]; rows past offsets[-1] are unclustered
+        self.offsets: Optional[np.ndarray] = None
+        self.meta: dict = {}
+        # Bumped by every save; names the vector and IVF files the manifest points at
+        self.generation = 0
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, ids: Sequence[str], directory: Optional[str] = None) -> "VectorIndex":
+        return cls(np.ascontiguousarray(_normalize(np.asarray(vectors, dtype=np.float32))), ids, directory)
+
+    @classmethod
+    def empty(cls, dim: int, directory: Optional[str] = None) -> "VectorIndex":
+        return cls(np.empty((0, dim), dtype=np.float32), [], directory)
+
+    def __len__(self):
+        return int(self.alive.sum())
+
+    @property
+    def dim(self) -> int:
+        return self.vectors.shape[1]
+
+    def rows(self) -> dict:
+        """id -> row for live rows."""
+        return {self.ids[row]: row for row in np.flatnonzero(self.alive)}
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _map(self, count: int) -> np.ndarray:
+        if count == 0:
+            return np.empty((0, self.dim), dtype=np.float32)
+        return np.memmap(self._path(VECTORS_FILE.format(self.generation)), dtype=np.float32, mode="r", shape=(count, self.dim))
+
+    def add(self, vectors: np.ndarray, ids: Sequence[str]):
+        vectors = np.ascontiguousarray(_normalize(np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)))
+        if len(vectors) != len(ids):
+            raise ValueError("vectors and ids differ in length")
+        if not len(vectors):
+            return
+        if self.directory is None:
+            self.vectors = np.concatenate([self.vectors, vectors])
+        else:
+            # Append in place; readers only map as many rows as the manifest lists
+            with open(self._path(VECTORS_FILE.format(self.generation)), "r+b") as f:
+                # Cut rows an interrupted add left past the ones this index knows about
+                f.truncate(len(self.ids) * self.dim * vectors.itemsize)
+                f.seek(0, os.SEEK_END)
+                f.write(vectors.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            self.vectors = self._map(len(self.ids) + len(vectors))
+        self.ids.extend(ids)
+        self.alive = np.concatenate([self.alive, np.ones(len(vectors), dtype=bool)])
+
+    def remove(self, rows: Iterable[int]):
+        rows = list(rows)
+        if rows:
+            self.alive[rows] = False
+
+    def compact(self):
+        keep = np.flatnonzero(self.alive)
+        self.vectors = np.ascontiguousarray(self.vectors[keep])
+        self.ids = [self.ids[row] for row in keep]
+        self.alive = np.ones(len(self.ids), dtype=bool)
+        self.centroids = None
+        self.offsets = None
+
+    def train_ivf(self, nlist: int, iterations: int = 10, seed: int = 0):
+        if not self.alive.all():
+            self.compact()
+        n = len(self.ids)
+        nlist = max(1, min(nlist, n))
+        rng = np.random.default_rng(seed)
+        vectors = np.asarray(self.vectors)
+        centroids = vectors[rng.choice(n, nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(vectors @ centroids.T, axis=1)
+            for cluster in range(nlist):
+                members = vectors[assignment == cluster]
+                if len(members):
+                    centroids[cluster] = members.sum(axis=0)
+            centroids = _normalize(centroids)
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+
+        # Reorder rows so each cluster is one contiguous slice
+        order = np.argsort(assignment, kind="stable")
+        self.vectors = np.ascontiguousarray(vectors[order])
+        self.ids = [self.ids[i] for i in order]
+        self.centroids = centroids.astype(np.float32)
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=nlist))])
+
+    def maintain(self, ivf_min_size: int, ivf_lists: int = 0, max_dead_fraction: float = 0.25) -> bool:
+        """Compact and re-cluster once tombstones or unclustered rows pile up.
+
+        Returns True when the index was rewritten (so row numbers changed).
+        """
+        total = len(self.ids)
+        dead = total - len(self)
+        clustered = int(self.offsets[-1]) if self.offsets is not None else 0
+        wants_ivf = len(self) >= ivf_min_size
+        if not (
+            (total and dead / total > max_dead_fraction)
+            or (wants_ivf and self.centroids is None)
+            or (self.centroids is not None and (not wants_ivf or total - clustered > max_dead_fraction * max(1, clustered)))
+        ):
+            return False
+        self.compact()
+        if wants_ivf:
+            self.train_ivf(ivf_lists or int(np.sqrt(len(self))))
+        return True
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Best ``k`` columns per row of ``scores``, highest first; argpartition keeps it O(n)."""
+        k = min(k, scores.shape[1])
+        if k == 0:
+            return np.empty((len(scores), 0), dtype=np.float32), np.empty((len(scores), 0), dtype=np.int64)
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        part_scores = np.take_along_axis(scores, part, axis=1)
+        order = np.argsort(-part_scores, axis=1)
+        return np.take_along_axis(part_scores, order, axis=1), np.take_along_axis(part, order, axis=1)
+
+    def search(self, queries: np.ndarray, k: int, nprobe: int = 8) -> List[List[Tuple[str, float]]]:
+        """(id, score) pairs for each query row, best first."""
+        queries = _normalize(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        if len(self) == 0:
+            return [[] for _ in queries]
+        if self.centroids is None:
+            scores = queries @ self.vectors.T
+            scores[:, ~self.alive] = -np.inf
+            scores, rows = self._top_k(scores, k)
+            return [
+                [(self.ids[row], float(score)) for row, score in zip(query_rows, query_scores) if score > -np.inf]
+                for query_rows, query_scores in zip(rows, scores)
+            ]
+
+        results = []
+        _, probes = self._top_k(queries @ self.centroids.T, nprobe)
+        unclustered = np.arange(self.offsets[-1], len(self.ids))
+        for query, clusters in zip(queries, probes):
+            candidates = np.concatenate(
+                [np.arange(self.offsets[c], self.offsets[c + 1]) for c in clusters] + [unclustered]
+            )
+            candidates = candidates[self.alive[candidates]]
+            scores, picked = self._top_k((self.vectors[candidates] @ query)[None, :], k)
+            results.append([
+                (self.ids[candidates[i]], float(score)) for i, score in zip(picked[0], scores[0])
+            ])
+        return results
+
+    def write_manifest(self):
+        """Persist ids, tombstones and ``meta``; vectors must already be on disk."""
+        manifest = {
+            "dim": self.dim,
+            "ids": self.ids,
+            "dead": np.flatnonzero(~self.alive).tolist(),
+            "generation": self.generation,
+            "ivf": self.centroids is not None,
+            "meta": self.meta,
+        }
+        _write_atomic(self._path(MANIFEST_FILE), lambda f: f.write(json.dumps(manifest).encode()))
+
+    def save(self, directory: Optional[str] = None):
+        """Rewrite the whole index into ``directory`` as a new generation and bind to it."""
+        previous = self.generation if directory in (None, self.directory) else None
+        self.directory = directory or self.directory
+        os.makedirs(self.directory, exist_ok=True)
+        self.generation += 1
+        vectors = np.ascontiguousarray(self.vectors, dtype=np.float32)
+        _write_atomic(self._path(VECTORS_FILE.format(self.generation)), lambda f: f.write(vectors.tobytes()))
+        if self.centroids is not None:
+            _write_atomic(
+                self._path(IVF_FILE.format(self.generation)),
+                lambda f: np.savez(f, centroids=self.centroids, offsets=self.offsets)
+            )
+        self.write_manifest()
+        self.vectors = self._map(len(self.ids))
+        if previous is not None:
+            # Workers that already mapped the old files keep reading them until they reload
+            for name in (VECTORS_FILE, IVF_FILE):
+                try:
+                    os.remove(self._path(name.format(previous)))
+                except FileNotFoundError:
+                    pass
+
+    @classmethod
+    def load(cls, directory: str, attempts: int = 3) -> "VectorIndex":
+        for attempt in range(attempts):
+            with open(os.path.join(directory, MANIFEST_FILE), "rb") as f:
+                manifest = json.loads(f.read())
+            try:
+                return cls._from_manifest(directory, manifest)
+            except FileNotFoundError:
+                # A save replaced this generation between reading the manifest and
+                # opening its files; the manifest now names the new one
+                if attempt == attempts - 1:
+                    raise
+
+    @classmethod
+    def _from_manifest(cls, directory: str, manifest: dict) -> "VectorIndex":
+        index = cls.empty(manifest["dim"], directory)
+        index.generation = manifest["generation"]
+        index.ids = manifest["ids"]
+        index.vectors = index._map(len(index.ids))
+        index.alive = np.ones(len(index.ids), dtype=bool)
+        index.remove(manifest["dead"])
+        index.meta = manifest.get("meta", {})
+        if manifest["ivf"]:
+            with np.load(os.path.join(directory, IVF_FILE.format(index.generation))) as ivf:
+                index.centroids = ivf["centroids"]
+                index.offsets = ivf["offsets"]
+        return index
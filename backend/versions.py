@@ -0,0 +1,74 @@
+import threading
+import time
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+import config
+from db import SessionLocal
+from models import TableVersion
+from rollups import _upsert_insert
+
+
+def read_table_version(db: Session, name: str) -> int:
+    version = db.query(TableVersion.version).filter(TableVersion.name == name).scalar()
+    return version or 0
+
+
+def bump_table_version(db: Session, name: str):
+    """Increment ``name``'s version in the caller's transaction."""
+    upsert = _upsert_insert(db)
+    if upsert is not None:
+        # One statement, so two first writes to a table can't both try to insert its row
+        stmt = upsert(TableVersion).values(name=name, version=1)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[TableVersion.name],
+            set_={"version": TableVersion.version + 1},
+        ))
+        return
+    updated = db.query(TableVersion).filter(TableVersion.name == name).update(
+        {TableVersion.version: TableVersion.version + 1}, synchronize_session=False
+    )
+    if not updated:
+        db.add(TableVersion(name=name, version=1))
+        db.flush()
+
+
+class TableVersions:
+    """Process-local view of the table version counters.
+
+    ``get`` re-reads a counter from the database at most once every
+    ``check_interval`` seconds, so hot read paths can compare versions without
+    a query per request.
+    """
+
+    def __init__(self, session_factory=SessionLocal, check_interval: float = config.TABLE_VERSION_CHECK_INTERVAL):
+        self.session_factory = session_factory
+        self.check_interval = check_interval
+        self._cached = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> int:
+        cached = self._cached.get(name)
+        now = time.monotonic()
+        if cached is not None and now - cached[1] < self.check_interval:
+            return cached[0]
+        with self.session_factory() as db:
+            version = read_table_version(db, name)
+        with self._lock:
+            self._cached[name] = (version, now)
+        return version
+
+    async def get_async(self, name: str) -> int:
+        """``get`` for async handlers: only a refresh leaves the event loop."""
+        cached = self._cached.get(name)
+        if cached is not None and time.monotonic() - cached[1] < self.check_interval:
+            return cached[0]
+        return await run_in_threadpool(self.get, name)
+
+    def expire(self, name: str):
+        with self._lock:
+            self._cached.pop(name, None)
+
+
+table_versions = TableVersions()